@@ -1,73 +1,333 @@
+import os
+import sys
 import time
 import random
 import logging
 import urllib.parse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Shared browser sessions live in the main project (src/core/browser.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.core.browser import pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+WHATSAPP_URL = 'https://web.whatsapp.com'
+
+# Send paths: 'navigate' loads web.whatsapp.com/send?phone=... for every message;
+# 'inpage' keeps the app loaded and opens each chat through a click-to-chat link.
+SEND_MODES = ('navigate', 'inpage')
+
+# Resolves once #main holds a chat (different from `previous`) with its compose box
+WAIT_CHAT_READY_JS = """
+const previous = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+const ready = () => {
+    const main = document.querySelector('#main');
+    return main && main !== previous && main.querySelector('footer [role="textbox"]');
+};
+if (ready()) { done(true); return; }
+const observer = new MutationObserver(() => {
+    if (ready()) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
+# Resolves once a new outgoing message shows a check mark (left the phone's queue)
+WAIT_SENT_TICK_JS = """
+const before = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+const TICKS = '[data-icon="msg-check"], [data-icon="msg-dblcheck"], [data-icon="msg-dblcheck-ack"]';
+const sent = () => {
+    const out = document.querySelectorAll('#main .message-out');
+    return out.length > before && out[out.length - 1].querySelector(TICKS);
+};
+if (sent()) { done(true); return; }
+const observer = new MutationObserver(() => {
+    if (sent()) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(document.querySelector('#main') || document.body, {childList: true, subtree: true, attributes: true});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
+# Clicks a click-to-chat link inside the loaded app; WhatsApp Web routes it
+# itself (as for the links it renders in messages), for saved and new contacts alike
+OPEN_CHAT_LINK_JS = """
+const link = document.createElement('a');
+link.href = arguments[0];
+link.style.display = 'none';
+(document.querySelector('#app') || document.body).appendChild(link);
+link.click();
+link.remove();
+"""
+CHAT_LINK = 'https://wa.me/{digits}'
+
+# Whether the chat open in #main is the one of the number (header text or message JIDs)
+CHAT_IS_PHONE_JS = """
+const digits = arguments[0];
+const main = document.querySelector('#main');
+if (!main) return false;
+const header = main.querySelector('header');
+if (header && (header.innerText || '').replace(/\\D/g, '').includes(digits)) return true;
+return !!main.querySelector('[data-id*="' + digits + '@"]');
+"""
+
+# Status icon of the last outgoing message in the open chat
+LAST_TICK_JS = """
+const out = document.querySelectorAll('#main .message-out');
+if (!out.length) return null;
+const icon = out[out.length - 1].querySelector('[data-icon^="msg-"]');
+return icon ? {icon: icon.getAttribute('data-icon'), label: (icon.getAttribute('aria-label') || '').trim().toLowerCase()} : null;
+"""
+
+# What the page says about the session (see WhatsAppBot.state)
+PROBE_SESSION_JS = """
+if (document.querySelector('#side')) {
+    const offline = document.querySelector('[data-icon="alert-phone"], [data-icon="alert-computer"], [data-testid="alert-phone"]');
+    return offline ? 'degraded' : 'connected';
+}
+if (document.querySelector('[data-ref] canvas, canvas[aria-label], [data-testid="qrcode"]')) return 'logged_out';
+const text = ((document.body && document.body.innerText) || '').slice(0, 2000).toLowerCase();
+if (/banned|banido|not allowed to use whatsapp|não tem permissão para usar o whatsapp/.test(text)) return 'banned';
+return 'degraded';
+"""
+
+# Session states: 'degraded' covers loading screens, phone offline and unknown pages
+STATE_CONNECTED = 'connected'
+STATE_DEGRADED = 'degraded'
+STATE_LOGGED_OUT = 'logged_out'
+STATE_BANNED = 'banned'
+
+# Reconnect backoff (seconds): first wait, cap, and how long to wait in total (e.g. for a QR scan)
+RECONNECT_BACKOFF = (2, 60)
+RECONNECT_TIMEOUT = 15 * 60
+
+# Why the last send_message returned False, when it was the contact's fault (not the account's)
+FAILURE_NOT_ON_WHATSAPP = 'not_on_whatsapp'
+
+# Note on a send that returned True without confirmation: Enter was pressed,
+# then the session dropped, so the message may or may not have left
+SENT_UNCONFIRMED = 'unconfirmed'
+
+# Seconds a chat may take to open in-page before falling back to URL navigation
+INPAGE_OPEN_TIMEOUT = 5
+
+# A send is retried at most this many times after the session came back
+MAX_SEND_ATTEMPTS = 3
+
+# Human-like pauses (seconds) around each send, to avoid bans
+PRE_SEND_DELAY = (8, 15)
+PRE_ENTER_DELAY = (3, 6)
+POST_SEND_DELAY = (5, 8)
+
+
+class SessionUnavailable(RuntimeError):
+    """The WhatsApp Web session did not come back (banned, or not reconnected in time)."""
+
+    def __init__(self, state, message):
+        super().__init__(message)
+        self.state = state
+
+
+def profile_for_account(account=None):
+    """Chrome profile holding the login of a WhatsApp account (one QR scan per account)."""
+    return 'whatsapp' if account in (None, '', 'default') else f"whatsapp-{account}"
+
+
 class WhatsAppBot:
-    def __init__(self):
+    def __init__(self, account=None, pre_send_delay=PRE_SEND_DELAY, pre_enter_delay=PRE_ENTER_DELAY,
+                 post_send_delay=POST_SEND_DELAY, send_mode='navigate', reconnect_timeout=RECONNECT_TIMEOUT,
+                 base_url=WHATSAPP_URL, site='whatsapp'):
+        if send_mode not in SEND_MODES:
+            raise ValueError(f"send_mode must be one of {SEND_MODES}")
+        self.account = account or 'default'
+        self.send_mode = send_mode
+        # Site profile and address of WhatsApp Web (the simulator in simulator.py replaces both)
+        self.base_url = base_url.rstrip('/')
+        self.site = site
+        # Per-message latency of each stage (seconds), deliberate delays excluded
+        self.stage_timings = []
+        self.last_failure = None
+        self.last_unconfirmed = False
+        # Cleared when a click-to-chat link reloaded the page: this build does not route
+        # them in-page, so 'inpage' goes straight to URL navigation from then on
+        self.inpage_links = True
+        # Optional background work run during the deliberate pauses: idle_task(bot, deadline)
+        self.idle_task = None
+        # Session state machine; on_state_change(bot, old, new, reason) is the metrics hook
+        self.state = None
+        self.on_state_change = None
+        self.reconnect_timeout = reconnect_timeout
+        self.reconnect_backoff = RECONNECT_BACKOFF
+        self.reconnects = 0
+        self.downtime = 0.0
+        self.pre_send_delay = pre_send_delay
+        self.pre_enter_delay = pre_enter_delay
+        self.post_send_delay = post_send_delay
         self.driver = None
         self.wait = None
+        self.session = None
 
     def start(self):
-        """Initializes the Chrome driver and opens WhatsApp Web."""
-        logging.info("Starting WhatsApp Bot...")
-        service = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
-        # options.add_argument("--headless") # Headless mode doesn't work well for WA Web login
-        self.driver = webdriver.Chrome(service=service, options=options)
+        """Acquires a WhatsApp Web session from the shared pool."""
+        logging.info(f"Starting WhatsApp Bot (account: {self.account})...")
+        # Headless mode doesn't work well for WA Web login.
+        # The persistent profile (data/profiles/whatsapp[-<account>]) keeps the QR login between runs.
+        profile_name = profile_for_account(self.account)
+        if self.site != 'whatsapp':
+            profile_name = f"{self.site}-{self.account}"
+        self.session = pool.acquire(self.site, headless=False, ensure_login=False, profile_name=profile_name)
+        self.driver = self.session.driver
         self.wait = WebDriverWait(self.driver, 60)
         
         logging.info("Opening WhatsApp Web...")
-        self.driver.get("https://web.whatsapp.com/")
-        
+        if not self.session.ensure_logged_in(login=self._wait_for_qr_scan, timeout=15):
+            logging.error("Login failed or timeout.")
+            self.stop()
+            raise RuntimeError("WhatsApp Web login failed")
+        logging.info("Login detected!")
+        self._set_state(STATE_CONNECTED, 'logged in')
+
+    def _wait_for_qr_scan(self, driver):
+        """Waits for the user to scan the QR code."""
+        # We look for an element that appears only after login, e.g., the side pane.
+        logging.info("Please scan the QR code if not already logged in.")
         try:
-            # Wait for the user to scan the QR code.
-            # We look for an element that appears only after login, e.g., the side pane.
-            logging.info("Please scan the QR code if not already logged in.")
             self.wait.until(EC.presence_of_element_located((By.XPATH, '//*[@id="side"]')))
-            logging.info("Login detected!")
-        except Exception as e:
-            logging.error(f"Login failed or timeout: {e}")
-            self.stop()
-            raise
+            return True
+        except TimeoutException:
+            return False
 
     def stop(self):
-        """Closes the browser."""
-        if self.driver:
+        """Returns the browser to the pool (it is closed when the process exits)."""
+        if self.session:
             logging.info("Stopping bot...")
-            self.driver.quit()
+            if self.stage_timings:
+                summary = ', '.join(f"{stage} {value * 1000:.0f} ms" for stage, value in self.latency_summary().items())
+                logging.info(f"[{self.account}] Median send latency over {len(self.stage_timings)} messages: {summary}")
+            if self.reconnects:
+                logging.info(f"[{self.account}] Reconnected {self.reconnects} time(s), {self.downtime:.0f}s offline.")
+            pool.release(self.session)
+            self.session = None
             self.driver = None
 
-    def send_message(self, phone, message):
+    def send_message(self, phone, message, encoded=None):
         """
         Sends a message to a specific phone number.
         
         Args:
             phone (str): The phone number in international format (e.g., "5511999999999").
             message (str): The message content.
+            encoded (str): Optional URL-encoded message, prepared for the whole campaign beforehand.
+
+        Returns True/False for sent/failed. Raises SessionUnavailable when the
+        session is lost for good, so the caller can hand the contact back.
         """
         if not self.driver:
             raise RuntimeError("Bot is not running. Call start() first.")
 
+        # Random delay before starting new action to mimic human behavior
+        # Increased delay to avoid ban (8-15 seconds by default)
+        self._pause(random.uniform(*self.pre_send_delay))
+        self.last_failure = None
+        self.last_unconfirmed = False
+
+        # The send helpers return None when the session dropped before the
+        # message was submitted; reconnecting happens here, once, and the same
+        # message is retried. After Enter they never return None (see _submitted).
+        for _ in range(MAX_SEND_ATTEMPTS):
+            if self.state != STATE_CONNECTED:
+                self.ensure_connected()
+            if self.send_mode == 'inpage':
+                result = self._send_inpage(phone, message, encoded)
+            else:
+                result = self._send_via_url(phone, message, encoded)
+            if result is not None:
+                return result
+        raise SessionUnavailable(self.state, f"session kept dropping while sending to {phone}")
+
+    def _set_state(self, state, reason=''):
+        old = self.state
+        if state == old:
+            return
+        self.state = state
+        log = logging.info if state == STATE_CONNECTED else logging.warning
+        log(f"[{self.account}] Session {old or 'new'} -> {state}{f' ({reason})' if reason else ''}")
+        if self.on_state_change:
+            try:
+                self.on_state_change(self, old, state, reason)
+            except Exception as e:
+                logging.warning(f"State hook failed: {e}")
+
+    def probe_state(self):
+        """Reads the session state from the page (no navigation)."""
+        try:
+            return self.driver.execute_script(PROBE_SESSION_JS) or STATE_DEGRADED
+        except Exception as e:
+            logging.debug(f"Session probe failed: {e}")
+            return STATE_DEGRADED
+
+    def _session_lost(self, reason):
+        """Records why the chat could not be used; returns None so send_message reconnects."""
+        self._set_state(self.probe_state(), reason)
+        if self.state == STATE_CONNECTED:
+            self._set_state(STATE_DEGRADED, reason)
+        return None
+
+    def _submitted(self, phone, reason):
+        """The session dropped after Enter: the message is not sent again, only marked unconfirmed."""
+        logging.warning(f"Message to {phone} was submitted but not confirmed ({reason}); not resending.")
+        self.last_unconfirmed = True
+        self._set_state(self.probe_state(), reason)
+        return True
+
+    def ensure_connected(self, timeout=None):
+        """
+        Waits for the session to come back, with bounded exponential backoff.
+
+        A logged-out session waits for the QR scan (the page refreshes the code
+        itself); a degraded one is reloaded between waits. Raises
+        SessionUnavailable if the account is banned or `timeout` runs out.
+        """
+        timeout = self.reconnect_timeout if timeout is None else timeout
+        started = time.monotonic()
+        was_down = self.state not in (None, STATE_CONNECTED)
+        delay, max_delay = self.reconnect_backoff
+        while True:
+            state = self.probe_state()
+            self._set_state(state)
+            if state == STATE_CONNECTED:
+                if was_down:
+                    self.reconnects += 1
+                    self.downtime += time.monotonic() - started
+                return True
+            if state == STATE_BANNED:
+                raise SessionUnavailable(state, "WhatsApp account banned")
+            if time.monotonic() - started + delay > timeout:
+                raise SessionUnavailable(state, f"not reconnected after {timeout:.0f}s ({state})")
+            if state == STATE_LOGGED_OUT:
+                logging.warning(f"[{self.account}] Logged out: scan the QR code. Retrying in {delay:.0f}s...")
+            time.sleep(delay)
+            if state == STATE_DEGRADED:
+                try:
+                    self.driver.get(self.base_url)
+                except Exception as e:
+                    logging.warning(f"[{self.account}] Reload failed: {e}")
+            delay = min(delay * 2, max_delay)
+
+    def _send_via_url(self, phone, message, encoded=None):
+        """Opens the chat by loading web.whatsapp.com/send (reloads the whole app)."""
+        submitted = False
         try:
-            # Random delay before starting new action to mimic human behavior
-            # Increased delay to avoid ban (8-15 seconds)
-            time.sleep(random.uniform(8, 15))
-            
             # Format URL to open chat with specific number
-            encoded_message = urllib.parse.quote(message)
-            url = f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
+            encoded_message = encoded or urllib.parse.quote(message)
+            url = f"{self.base_url}/send?phone={phone}&text={encoded_message}"
+            started = time.perf_counter()
             self.driver.get(url)
             
             # Wait for the chat to load and the send button to be clickable
@@ -105,34 +365,15 @@ class WhatsAppBot:
                          click_ok = self.driver.find_element(By.XPATH, '//*[@data-testid="popup-controls-ok"]')
                          click_ok.click()
                          logging.warning(f"Invalid number detected for {phone}.")
+                         self.last_failure = FAILURE_NOT_ON_WHATSAPP
                          return False
                 except Exception:
                     pass
 
                 # Check 2: Disconnected / Logged Out (QR Code page)
-                # If the side pane is gone, we are likely logged out.
+                # If the side pane is gone, send_message reconnects and retries this contact.
                 if len(self.driver.find_elements(By.XPATH, '//*[@id="side"]')) == 0:
-                    logging.warning("WhatsApp Web session disconnected! Waiting for QR Code scan...")
-                    
-                    # Wait for user to scan QR code again
-                    while True:
-                        try:
-                            # Check if back online
-                            if len(self.driver.find_elements(By.XPATH, '//*[@id="side"]')) > 0:
-                                logging.info("Re-connection successful! Resuming...")
-                                # Retry sending the message to this user
-                                # We need to reload the url because we might be on a landing page
-                                self.driver.get(url)
-                                break
-                            time.sleep(2)
-                        except Exception as e:
-                            logging.error(f"Error while waiting for login: {e}")
-                            time.sleep(2)
-                            
-                    # After breaking the loop, we recurse to try sending again
-                    # Be careful with recursion depth, but typically this happens once or twice
-                    # Recurse:
-                    return self.send_message(phone, message)
+                    return self._session_lost(f"chat with {phone} did not open")
                 
                 logging.warning(f"Could not open chat for {phone}. Reason unknown (not invalid, not disconnected). Skipping.")
                 return False
@@ -140,6 +381,8 @@ class WhatsAppBot:
                 logging.warning(f"Could not open chat for {phone}. Error: {e}")
                 return False
 
+            self.stage_timings.append({'open_chat': time.perf_counter() - started})
+
             video_recording_delay = 1
             time.sleep(video_recording_delay)
 
@@ -147,17 +390,160 @@ class WhatsAppBot:
             input_box = self.driver.find_element(By.XPATH, input_box_xpath)
             
             # Random delay before sending
-            time.sleep(random.uniform(3, 6))
+            time.sleep(random.uniform(*self.pre_enter_delay))
             
             # Press Enter to send
             input_box.send_keys(Keys.ENTER)
+            submitted = True
             
             logging.info(f"Message sent to {phone}")
             
             # Wait a bit after sending to ensure it goes through before navigating away
-            time.sleep(random.uniform(5, 8))
+            time.sleep(random.uniform(*self.post_send_delay))
+            return True
+
+        except Exception as e:
+            if submitted:
+                return self._submitted(phone, f"{type(e).__name__} after sending")
+            if self.probe_state() != STATE_CONNECTED:
+                return self._session_lost(f"{type(e).__name__} while sending to {phone}")
+            logging.error(f"Failed to send message to {phone}: {e}")
+            return False
+
+    def _pause(self, seconds):
+        """Deliberate pause; background work (e.g. delivery checks) may use it first."""
+        deadline = time.monotonic() + seconds
+        if self.idle_task and self.state == STATE_CONNECTED:
+            try:
+                self.idle_task(self, deadline)
+            except Exception as e:
+                logging.warning(f"Idle task failed: {e}")
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def read_delivery_status(self, phone, timeout=10):
+        """
+        Opens the chat in-page and reads the ticks of the last message we sent.
+
+        Returns 'pending' (clock), 'sent' (one tick), 'delivered' (two ticks),
+        'read' (blue ticks) or None when the chat or message was not found
+        within `timeout` seconds.
+        """
+        if not self._open_chat_inpage(phone, timeout=timeout):
+            return None
+        tick = self.driver.execute_script(LAST_TICK_JS)
+        if not tick:
+            return None
+        icon, label = tick['icon'], tick['label']
+        if icon == 'msg-time':
+            return 'pending'
+        if icon == 'msg-check':
+            return 'sent'
+        if icon in ('msg-dblcheck', 'msg-dblcheck-ack'):
+            # Read ticks are the same icon in blue; the accessible label tells them apart
+            return 'read' if icon == 'msg-dblcheck-ack' or 'read' in label or 'lida' in label else 'delivered'
+        return None
+
+    def latency_summary(self):
+        """Median latency (seconds) of each send stage."""
+        stages = {}
+        for timing in self.stage_timings:
+            for stage, value in timing.items():
+                stages.setdefault(stage, []).append(value)
+        return {stage: sorted(values)[len(values) // 2] for stage, values in stages.items()}
+
+    def _wait_js(self, script, *args, timeout=15):
+        self.driver.set_script_timeout(timeout + 5)
+        return self.driver.execute_async_script(script, *args, int(timeout * 1000))
+
+    def _open_chat_inpage(self, phone, timeout=10):
+        """
+        Opens the chat by clicking a click-to-chat link inside the app, without reloading it.
+
+        The opened chat is checked against the number; False when it does not
+        open (the caller falls back to URL navigation), so nothing is typed
+        into another chat. A number the app reports as not on WhatsApp sets
+        `last_failure`.
+        """
+        digits = ''.join(c for c in str(phone) if c.isdigit())
+        if self.driver.execute_script(CHAT_IS_PHONE_JS, digits):
+            return True
+        if not self.inpage_links:
+            return False
+        previous_main = next(iter(self.driver.find_elements(By.ID, 'main')), None)
+        self.driver.execute_script(OPEN_CHAT_LINK_JS, CHAT_LINK.format(digits=digits))
+        opened = self._wait_js(WAIT_CHAT_READY_JS, previous_main, timeout=max(timeout, 0.1))
+        if not self.driver.find_elements(By.ID, 'side'):
+            # The link navigated away instead of being routed by the app
+            logging.warning("Click-to-chat links reload this WhatsApp Web; using URL navigation from now on.")
+            self.inpage_links = False
+            return False
+        if not opened:
+            ok = self.driver.find_elements(By.XPATH, '//*[@data-testid="popup-controls-ok"]')
+            if ok:
+                ok[0].click()
+                logging.warning(f"Invalid number detected for {phone}.")
+                self.last_failure = FAILURE_NOT_ON_WHATSAPP
+            return False
+        if not self.driver.execute_script(CHAT_IS_PHONE_JS, digits):
+            logging.warning(f"Link opened a chat that is not {phone}; not using it.")
+            return False
+        return True
+
+    def _compose(self, message):
+        """Types the message into the chat box (Shift+Enter between lines)."""
+        input_box = self.driver.find_element(By.XPATH, '//*[@id="main"]//footer//*[@role="textbox"]')
+        input_box.click()
+        for i, line in enumerate(message.split('\n')):
+            if i:
+                input_box.send_keys(Keys.SHIFT, Keys.ENTER)
+            if line:
+                self.driver.execute_script("document.execCommand('insertText', false, arguments[0]);", line)
+        return input_box
+
+    def _send_inpage(self, phone, message, encoded=None):
+        """Sends with the app kept loaded; falls back to URL navigation when the chat does not open in-page."""
+        submitted = False
+        try:
+            timing = {}
+            started = time.perf_counter()
+            if not self.driver.find_elements(By.ID, 'side'):
+                return self._session_lost("side panel gone")
+            if not self._open_chat_inpage(phone, timeout=INPAGE_OPEN_TIMEOUT):
+                if self.last_failure == FAILURE_NOT_ON_WHATSAPP:
+                    return False
+                if self.inpage_links:
+                    logging.info(f"Chat for {phone} did not open in-page, falling back to URL navigation.")
+                return self._send_via_url(phone, message, encoded)
+            timing['open_chat'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            input_box = self._compose(message)
+            timing['compose'] = time.perf_counter() - started
+
+            time.sleep(random.uniform(*self.pre_enter_delay))
+
+            started = time.perf_counter()
+            outgoing = len(self.driver.find_elements(By.CSS_SELECTOR, '#main .message-out'))
+            input_box.send_keys(Keys.ENTER)
+            submitted = True
+            ticked = self._wait_js(WAIT_SENT_TICK_JS, outgoing, timeout=15)
+            timing['sent_tick'] = time.perf_counter() - started
+            self.stage_timings.append(timing)
+
+            logging.info(f"Message sent to {phone} (open {timing['open_chat']:.2f}s, compose {timing['compose']:.2f}s, "
+                         f"tick {timing['sent_tick']:.2f}s)")
+            if not ticked:
+                logging.warning(f"No sent tick for {phone} yet; the message is still queued in WhatsApp Web.")
+
+            time.sleep(random.uniform(*self.post_send_delay))
             return True
 
         except Exception as e:
+            if submitted:
+                return self._submitted(phone, f"{type(e).__name__} after sending")
+            if self.probe_state() != STATE_CONNECTED:
+                return self._session_lost(f"{type(e).__name__} while sending to {phone}")
             logging.error(f"Failed to send message to {phone}: {e}")
             return False
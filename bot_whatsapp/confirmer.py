@@ -0,0 +1,124 @@
+"""
+Delivery confirmation: reads the message ticks back from WhatsApp Web.
+
+While a campaign runs, every sent message is tracked here. Each account's
+bot checks its own due messages during the deliberate pause before its next
+send (`WhatsAppBot.idle_task`), so confirmation never holds up the send
+loop. The updates are handed back to the main thread, which writes them
+to the ledger.
+
+Messages still unconfirmed at the end can be checked later without
+going through the whole contact list again:
+    python confirmer.py --campaign contatos --account default
+"""
+import time
+import queue
+import logging
+import threading
+from collections import defaultdict, deque
+
+import click
+
+from bot import WhatsAppBot
+from ledger import SendLedger, DEFAULT_DB
+
+CONFIRMED = ('delivered', 'read')
+
+
+class DeliveryConfirmer:
+    def __init__(self, min_age=60, recheck_after=300, max_checks=3, batch_size=5, check_cost=3.0):
+        self.min_age = min_age              # first check this long after sending (seconds)
+        self.recheck_after = recheck_after  # wait before checking an unconfirmed message again
+        self.max_checks = max_checks
+        self.batch_size = batch_size        # checks per idle window, at most
+        self.check_cost = check_cost        # expected seconds per check; skip if less is left
+        self._due = defaultdict(deque)      # account -> deque of (due, phone, checks)
+        self._lock = threading.Lock()
+        self._updates = queue.Queue()
+
+    def track(self, phone, account='default'):
+        """Schedules the first check of a message that was just sent."""
+        with self._lock:
+            self._due[account].append((time.monotonic() + self.min_age, phone, 0))
+
+    @property
+    def pending(self):
+        with self._lock:
+            return sum(len(items) for items in self._due.values())
+
+    def _next_due(self, account):
+        with self._lock:
+            items = self._due.get(account)
+            if items and items[0][0] <= time.monotonic():
+                return items.popleft()
+        return None
+
+    def _reschedule(self, account, phone, checks):
+        with self._lock:
+            self._due[account].append((time.monotonic() + self.recheck_after, phone, checks))
+
+    def idle_task(self, bot, deadline):
+        """Checks due messages of `bot.account` until the batch or the idle window runs out."""
+        for _ in range(self.batch_size):
+            if deadline - time.monotonic() < self.check_cost:
+                return
+            item = self._next_due(bot.account)
+            if item is None:
+                return
+            _, phone, checks = item
+            # The check gets what is left of the pause, so it cannot stretch the pacing
+            status = bot.read_delivery_status(phone, timeout=deadline - time.monotonic())
+            if status:
+                self._updates.put((phone, status))
+            if status not in CONFIRMED and checks + 1 < self.max_checks:
+                self._reschedule(bot.account, phone, checks + 1)
+
+    def drain(self):
+        """(phone, status) pairs read since the last call, for the ledger writer."""
+        updates = []
+        while True:
+            try:
+                updates.append(self._updates.get_nowait())
+            except queue.Empty:
+                return updates
+
+
+def confirm_pending(ledger, campaign=None, account='default', limit=200, max_checks=3, send_mode='inpage'):
+    """Checks the ticks of messages still marked 'sent' in the ledger, one account at a time."""
+    rows = ledger.unconfirmed(campaign=campaign, account=account, max_checks=max_checks, limit=limit)
+    if rows.empty:
+        return {}
+
+    bot = WhatsAppBot(account, send_mode=send_mode)
+    bot.start()
+    counts = defaultdict(int)
+    try:
+        for phone, row_campaign in zip(rows['phone'], rows['campaign']):
+            status = bot.read_delivery_status(phone)
+            if status:
+                ledger.update_delivery(phone, row_campaign, status)
+            counts[status or 'not found'] += 1
+    finally:
+        bot.stop()
+    return dict(counts)
+
+
+@click.command()
+@click.option('--campaign', default=None, help='Only this campaign.')
+@click.option('--account', default='default', help='Account that sent the messages.')
+@click.option('--limit', default=200, help='Max messages to check.')
+@click.option('--ledger', 'ledger_path', default=DEFAULT_DB, help='Path to the send ledger database.')
+def main(campaign, account, limit, ledger_path):
+    """Reads the delivery ticks of unconfirmed messages and updates the ledger."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    ledger = SendLedger(ledger_path)
+    try:
+        counts = confirm_pending(ledger, campaign=campaign, account=account, limit=limit)
+        click.echo(f"Checked: {counts or 'nothing to check'}")
+        click.echo(ledger.delivery_rates(campaign).to_string(index=False))
+    finally:
+        ledger.close()
+
+
+if __name__ == '__main__':
+    main()
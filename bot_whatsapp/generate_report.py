@@ -1,47 +1,33 @@
+import os
+import argparse
 import pandas as pd
-import glob
-import sys
-import re
+from ledger import SendLedger, DEFAULT_DB
+from reports import MESSAGE_TEMPLATE, load_articulators, find_columns, build_report, write_text, enqueue_reports
 
-# Template da mensagem
-# Pode ser ajustado conforme necessário
-MESSAGE_TEMPLATE = """Prezado(a) {nome_articulador},
-
-Informamos o status dos envios de mensagens via WhatsApp para os cursistas de {municipio}.
-
-Quantidade de cursistas que já receberam a mensagem: {qtd_entregue}
-
-Atenciosamente,
-Coordenação"""
-
-def normalize_phone(phone):
-    s = str(phone).strip().replace('.0', '')
-    # Remove chars
-    s = re.sub(r'\D', '', s)
-    # Remove 55 prefix if likely country code
-    if s.startswith('55') and len(s) > 11:
-        s = s[2:]
-    return s
-
-def load_delivered_phones():
-    files = glob.glob("delivered_report_*.csv")
-    print(f"Lendo relatórios de entrega: {files}")
-    
-    all_phones = set()
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-            if 'phone' in df.columns:
-                for p in df['phone'].dropna():
-                    norm = normalize_phone(p)
-                    if norm:
-                        all_phones.add(norm)
-        except Exception as e:
-            print(f"Erro ao ler {f}: {e}")
-    return all_phones
+# Template da mensagem: ver MESSAGE_TEMPLATE em reports.py
+# (campos disponíveis: {nome_articulador}, {municipio}, {qtd_entregue}, {total_cursistas}, {qtd_confirmada})
 
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Relatório de envios por articulador/município")
+    parser.add_argument('cursistas', nargs='?', help="CSV de cursistas (padrão: cursistas.csv)")
+    parser.add_argument('--articuladores', default='articuladores_2026_1.csv')
+    parser.add_argument('--out', default='relatorio_final_coordenacao.csv', help="CSV do relatório")
+    parser.add_argument('--txt', default=None, help="Também grava as mensagens em um arquivo de texto")
+    parser.add_argument('--campaign', default=None, help="Contar só os envios desta campanha")
+    parser.add_argument('--ledger', default=DEFAULT_DB)
+    parser.add_argument('--send', action='store_true', help="Envia cada relatório ao articulador pelo WhatsApp")
+    parser.add_argument('--send-campaign', default=None, help="Campanha no ledger para os envios dos relatórios")
+    parser.add_argument('--accounts', default=None, help="Contas do WhatsApp, separadas por vírgula")
+    # Mesmos limites do main.py; os envios de hoje já no ledger contam para o limite diário
+    parser.add_argument('--rate', type=float, default=4.0, help="Máximo de mensagens por minuto por conta")
+    parser.add_argument('--daily-limit', type=int, default=250, help="Máximo de mensagens por conta por dia")
+    parser.add_argument('--batch-size', type=int, default=50, help="Mensagens antes de cada pausa")
+    parser.add_argument('--batch-pause', type=float, default=60, help="Pausa entre lotes, em segundos")
+    parser.add_argument('--max-failures', type=int, default=5, help="Para a conta após essa quantidade de falhas seguidas")
+    args = parser.parse_args()
+
+    csv_path = args.cursistas
+    if not csv_path:
         print("Uso: python3 generate_report.py <caminho_csv_cursistas>")
         print("Exemplo: python3 generate_report.py cursistas.csv")
         # Fallback check
@@ -50,96 +36,59 @@ def main():
             print("Encontrado 'cursistas.csv', usando-o.")
         else:
             return
-    else:
-        csv_path = sys.argv[1]
 
     # 1. Carregar Articuladores
-    # Assumindo CSV sem cabeçalho: Municipio, UF, Nome, Email, Phone...
     try:
-        art_df = pd.read_csv('articuladores_2026_1.csv', header=None)
-        # Ajuste conforme estrutura real verificada com 'cat'
-        # Col 0: Municipio, Col 2: Nome, Col 3: Email
-        art_df = art_df.rename(columns={0: 'Municipio', 2: 'Nome', 3: 'Email'})
+        art_df = load_articulators(args.articuladores)
         print(f"Carregados {len(art_df)} articuladores.")
     except Exception as e:
-        print(f"Erro ao ler articuladores_2026_1.csv: {e}")
+        print(f"Erro ao ler {args.articuladores}: {e}")
         return
 
-    # 2. Carregar Telefones Entregues
-    sent_phones = load_delivered_phones()
-    print(f"Total de telefones únicos que receberam mensagem: {len(sent_phones)}")
-
-    # 3. Carregar Cursistas
+    # 2. Carregar Cursistas
     try:
-        cursistas_df = pd.read_csv(csv_path)
+        cursistas_df = pd.read_csv(csv_path, dtype=str)
         print(f"Carregados {len(cursistas_df)} registros de cursistas.")
     except Exception as e:
         print(f"Erro ao ler {csv_path}: {e}")
         return
 
     # Identificar colunas chaves
-    cols = cursistas_df.columns
-    secretaria_col = next((c for c in cols if 'secretaria' in c.lower()), None)
-    phone_col = next((c for c in cols if 'tel' in c.lower() or 'cel' in c.lower() or 'phone' in c.lower() or 'whatsapp' in c.lower()), None)
-
+    secretaria_col, phone_col = find_columns(cursistas_df)
     if not secretaria_col or not phone_col:
-        print(f"Colunas não encontradas no CSV de cursistas. Disponíveis: {list(cols)}")
+        print(f"Colunas não encontradas no CSV de cursistas. Disponíveis: {list(cursistas_df.columns)}")
         return
 
     print(f"Usando colunas: Secretaria='{secretaria_col}', Telefone='{phone_col}'")
 
-    # 4. Gerar Relatório
-    report_data = []
-
-    for idx, art in art_df.iterrows():
-        municipio_art = str(art['Municipio']).strip()
-        nome_art = str(art['Nome']).strip()
-        email_art = str(art['Email']).strip()
-        
-        # Filtrar cursistas deste municipio
-        # Normalização simples (strip + ignore case se necessário)
-        # Aqui fazemos match exato (com strip)
-        mask = cursistas_df[secretaria_col].astype(str).str.strip() == municipio_art
-        meus_cursistas = cursistas_df[mask]
-        
-        if meus_cursistas.empty:
-            # Tentar caixa alta
-            mask = cursistas_df[secretaria_col].astype(str).str.strip().str.upper() == municipio_art.upper()
-            meus_cursistas = cursistas_df[mask]
-
-        total_lista = len(meus_cursistas)
-        entregues = 0
-        
-        for _, c_row in meus_cursistas.iterrows():
-            p = normalize_phone(c_row[phone_col])
-            if p in sent_phones:
-                entregues += 1
-        
-        # Montar Mensagem
-        msg = MESSAGE_TEMPLATE.format(
-            nome_articulador=nome_art,
-            municipio=municipio_art,
-            qtd_entregue=entregues
-        )
-        
-        report_data.append({
-            'Municipio': municipio_art,
-            'Articulador_Nome': nome_art,
-            'Articulador_Email': email_art,
-            'Total_Cursistas': total_lista,
-            'Receberam_Mensagem': entregues,
-            'Mensagem_Email': msg
-        })
-
-    # Salvar
-    report_df = pd.DataFrame(report_data)
-    report_df.to_csv('relatorio_final_coordenacao.csv', index=False)
-    print("\nRelatório gerado com sucesso: 'relatorio_final_coordenacao.csv'")
-    
-    # Preview
-    print("\nExemplo das primeiras linhas:")
-    print(report_df[['Municipio', 'Receberam_Mensagem']].head())
+    # 3. Gerar Relatório: join + contagem por município numa única consulta ao ledger
+    ledger = SendLedger(args.ledger)
+    try:
+        report_df = build_report(ledger, art_df, cursistas_df, secretaria_col, phone_col,
+                                 campaign=args.campaign, template=MESSAGE_TEMPLATE)
+
+        # Salvar
+        report_df.to_csv(args.out, index=False)
+        print(f"\nRelatório gerado com sucesso: '{args.out}'")
+        if args.txt:
+            write_text(report_df, args.txt)
+            print(f"Mensagens gravadas em '{args.txt}'")
+
+        # Preview
+        print("\nExemplo das primeiras linhas:")
+        print(report_df[['Municipio', 'Total_Cursistas', 'Receberam_Mensagem']].head())
+
+        if args.send:
+            # Imported here: building the report must not require Selenium
+            from sender import AccountLimits
+            accounts = [a.strip() for a in args.accounts.split(',') if a.strip()] if args.accounts else None
+            limits = AccountLimits(per_minute=args.rate, daily_limit=args.daily_limit, batch_size=args.batch_size,
+                                   batch_pause=args.batch_pause, max_consecutive_failures=args.max_failures)
+            campaign, sent = enqueue_reports(report_df, ledger, campaign=args.send_campaign, accounts=accounts,
+                                             limits=limits)
+            print(f"\nRelatórios enviados pelo WhatsApp: {sent} (campanha '{campaign}')")
+    finally:
+        ledger.close()
 
 if __name__ == "__main__":
-    import os
     main()
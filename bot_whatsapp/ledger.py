@@ -0,0 +1,340 @@
+"""
+Send ledger: one SQLite table with every message attempt.
+
+Replaces the `delivered_report_*.csv` files that main.py, generate_report.py,
+check_delivered.py and the consolidation scripts used to glob and re-read.
+Each send is committed as soon as it happens, so resume, dedupe and
+reporting are indexed queries instead of full CSV scans.
+
+One-off import of the old reports:
+    python ledger.py import delivered_report_*.csv
+    python ledger.py stats
+"""
+import os
+import sys
+import glob
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.utils.phones import phone_key, phone_keys
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'send_ledger.db')
+
+# Statuses that count as "already messaged" for resume/dedupe
+SENT_STATUSES = ('sent', 'delivered', 'read')
+
+# Delivery progress read from the message ticks (a status never moves backwards)
+DELIVERY_RANK = {'sent': 1, 'delivered': 2, 'read': 3}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sends (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phone_key TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    campaign TEXT NOT NULL,
+    name TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    first_attempt_at TEXT NOT NULL,
+    last_attempt_at TEXT NOT NULL,
+    sent_at TEXT,
+    UNIQUE (phone_key, campaign)
+);
+CREATE INDEX IF NOT EXISTS idx_sends_status_key ON sends (status, phone_key);
+CREATE INDEX IF NOT EXISTS idx_sends_campaign_status ON sends (campaign, status);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    imported_at TEXT NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class SendLedger:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Keys from before the E.164 normalizer (DDD + number, no '+55'); a row whose
+            # new key is already taken in its campaign is merged into that row
+            old = pd.read_sql_query("SELECT id, phone, campaign FROM sends WHERE phone_key NOT LIKE '+%'", self.conn)
+            with self.transaction() as conn:
+                merged = 0
+                for row_id, key, campaign in zip(old['id'].astype(int), phone_keys(old['phone']), old['campaign']):
+                    existing = conn.execute("SELECT * FROM sends WHERE phone_key = ? AND campaign = ? AND id != ?",
+                                            (key, campaign, row_id)).fetchone()
+                    if existing is None:
+                        conn.execute("UPDATE sends SET phone_key = ? WHERE id = ?", (key, row_id))
+                    else:
+                        self._merge_rows(conn, existing, conn.execute("SELECT * FROM sends WHERE id = ?", (row_id,)).fetchone())
+                        merged += 1
+                conn.execute("PRAGMA user_version = 1")
+            if merged:
+                logging.warning(f"Ledger migration: merged {merged} row(s) whose phone now has the same key "
+                                f"as another row of the campaign.")
+        if version < 2:
+            # Delivery confirmation (message ticks) and the account that sent
+            with self.transaction() as conn:
+                conn.execute("ALTER TABLE sends ADD COLUMN account TEXT")
+                conn.execute("ALTER TABLE sends ADD COLUMN delivered_at TEXT")
+                conn.execute("ALTER TABLE sends ADD COLUMN read_at TEXT")
+                conn.execute("ALTER TABLE sends ADD COLUMN checked_at TEXT")
+                conn.execute("ALTER TABLE sends ADD COLUMN checks INTEGER NOT NULL DEFAULT 0")
+                conn.execute("PRAGMA user_version = 2")
+
+    @staticmethod
+    def _merge_rows(conn, keep, other):
+        """Folds row `other` into `keep` (same phone and campaign) and deletes it."""
+        latest = max(keep, other, key=lambda row: row['last_attempt_at'])
+        # Sent wins over failed, and the furthest delivery tick wins among sends
+        sent = {keep['status'], other['status']} & set(SENT_STATUSES)
+        status = max(sent, key=DELIVERY_RANK.get) if sent else latest['status']
+        sent_at = min((row['sent_at'] for row in (keep, other) if row['sent_at']), default=None)
+        conn.execute(
+            """
+            UPDATE sends SET name = ?, status = ?, attempts = ?, error = ?,
+                             first_attempt_at = ?, last_attempt_at = ?, sent_at = ?
+            WHERE id = ?
+            """,
+            (keep['name'] or other['name'], status, keep['attempts'] + other['attempts'], latest['error'],
+             min(keep['first_attempt_at'], other['first_attempt_at']), latest['last_attempt_at'], sent_at, keep['id'])
+        )
+        conn.execute("DELETE FROM sends WHERE id = ?", (other['id'],))
+        logging.info(f"Ledger migration: merged {other['phone']} into {keep['phone']} ({keep['campaign']}).")
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.conn:
+            yield self.conn
+
+    def record(self, phone, status, campaign, name=None, error=None, at=None, account=None):
+        """Records one send attempt (committed immediately)."""
+        at = at or _now()
+        sent_at = at if status in SENT_STATUSES else None
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO sends (phone_key, phone, campaign, name, status, attempts, error,
+                                   first_attempt_at, last_attempt_at, sent_at, account)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT (phone_key, campaign) DO UPDATE SET
+                    phone = excluded.phone,
+                    name = COALESCE(excluded.name, sends.name),
+                    account = COALESCE(excluded.account, sends.account),
+                    status = CASE WHEN sends.status IN ('sent', 'delivered', 'read')
+                                       AND excluded.status IN ('failed', 'sent')
+                                  THEN sends.status ELSE excluded.status END,
+                    attempts = sends.attempts + 1,
+                    error = excluded.error,
+                    last_attempt_at = excluded.last_attempt_at,
+                    sent_at = COALESCE(sends.sent_at, excluded.sent_at)
+                """,
+                (phone_key(phone), str(phone), campaign, name, status, error, at, at, sent_at, account)
+            )
+
+    def sent_keys(self, campaign=None):
+        """Phone keys already messaged (in any campaign unless one is given)."""
+        placeholders = ','.join('?' * len(SENT_STATUSES))
+        query = f"SELECT DISTINCT phone_key FROM sends WHERE status IN ({placeholders})"
+        params = list(SENT_STATUSES)
+        if campaign:
+            query += " AND campaign = ?"
+            params.append(campaign)
+        return {row[0] for row in self.conn.execute(query, params)}
+
+    def was_sent(self, phone, campaign=None):
+        placeholders = ','.join('?' * len(SENT_STATUSES))
+        query = f"SELECT 1 FROM sends WHERE phone_key = ? AND status IN ({placeholders})"
+        params = [phone_key(phone), *SENT_STATUSES]
+        if campaign:
+            query += " AND campaign = ?"
+            params.append(campaign)
+        return self.conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def sent_today(self, day=None):
+        """{account: messages sent on `day` (default: today)}, over every campaign."""
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        placeholders = ','.join('?' * len(SENT_STATUSES))
+        rows = self.conn.execute(
+            f"SELECT COALESCE(account, 'default'), COUNT(*) FROM sends "
+            f"WHERE status IN ({placeholders}) AND sent_at >= ? AND sent_at < date(?, '+1 day') "
+            f"GROUP BY COALESCE(account, 'default')",
+            [*SENT_STATUSES, day, day]
+        )
+        return {account: count for account, count in rows}
+
+    def update_delivery(self, phone, campaign, status, at=None):
+        """
+        Stores the tick status read from WhatsApp Web ('pending', 'sent', 'delivered', 'read').
+
+        The send status only moves forward (sent -> delivered -> read).
+        """
+        at = at or _now()
+        rank = DELIVERY_RANK.get(status, 0)
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                UPDATE sends SET
+                    status = CASE WHEN ? > (CASE status WHEN 'sent' THEN 1 WHEN 'delivered' THEN 2
+                                                        WHEN 'read' THEN 3 ELSE 0 END)
+                                  THEN ? ELSE status END,
+                    delivered_at = CASE WHEN ? >= 2 THEN COALESCE(delivered_at, ?) ELSE delivered_at END,
+                    read_at = CASE WHEN ? >= 3 THEN COALESCE(read_at, ?) ELSE read_at END,
+                    checked_at = ?,
+                    checks = checks + 1
+                WHERE phone_key = ? AND campaign = ? AND status IN ('sent', 'delivered', 'read')
+                """,
+                (rank, status, rank, at, rank, at, at, phone_key(phone), campaign)
+            )
+
+    def unconfirmed(self, campaign=None, account=None, max_checks=3, limit=None):
+        """Sent messages not yet seen as delivered/read (checked fewer than `max_checks` times)."""
+        query = "SELECT phone, campaign, account, sent_at, checks FROM sends WHERE status = 'sent' AND checks < ?"
+        params = [max_checks]
+        if campaign:
+            query += " AND campaign = ?"
+            params.append(campaign)
+        if account:
+            query += " AND COALESCE(account, 'default') = ?"
+            params.append(account)
+        query += " ORDER BY sent_at"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def delivery_rates(self, campaign=None):
+        """Sent / delivered / read counts and rates per campaign."""
+        query = """
+            SELECT campaign,
+                   COUNT(*) AS sent,
+                   SUM(status IN ('delivered', 'read')) AS delivered,
+                   SUM(status = 'read') AS read
+            FROM sends WHERE status IN ('sent', 'delivered', 'read')
+        """
+        params = []
+        if campaign:
+            query += " AND campaign = ?"
+            params.append(campaign)
+        df = pd.read_sql_query(query + " GROUP BY campaign ORDER BY campaign", self.conn, params=params)
+        df['delivered_rate'] = (df['delivered'] / df['sent']).round(3)
+        df['read_rate'] = (df['read'] / df['sent']).round(3)
+        return df
+
+    def stats(self):
+        """Counts per campaign and status."""
+        return pd.read_sql_query(
+            "SELECT campaign, status, COUNT(*) AS contacts, SUM(attempts) AS attempts "
+            "FROM sends GROUP BY campaign, status ORDER BY campaign, status",
+            self.conn
+        )
+
+    def to_dataframe(self, campaign=None):
+        query = "SELECT * FROM sends"
+        params = []
+        if campaign:
+            query += " WHERE campaign = ?"
+            params.append(campaign)
+        return pd.read_sql_query(query + " ORDER BY id", self.conn, params=params)
+
+    def import_reports(self, paths):
+        """
+        One-off import of legacy `delivered_report_*.csv` files (name, phone, date, time).
+
+        Files already imported are skipped, so this is cheap to call at start-up.
+        Returns the number of rows imported.
+        """
+        imported = {row[0] for row in self.conn.execute("SELECT path FROM imports")}
+        total = 0
+        for path in paths:
+            path = os.path.abspath(path)
+            if path in imported or os.path.getsize(path) == 0:
+                continue
+            df = pd.read_csv(path, dtype=str)
+            if 'phone' not in df.columns:
+                continue
+            df = df.dropna(subset=['phone'])
+            campaign = f"legacy:{os.path.splitext(os.path.basename(path))[0]}"
+            stamps = (df.get('date', pd.Series('', index=df.index)).fillna('') + ' ' +
+                      df.get('time', pd.Series('', index=df.index)).fillna('')).str.strip()
+            stamps = stamps.where(stamps != '', _now())
+            names = df['name'] if 'name' in df.columns else pd.Series(None, index=df.index)
+            rows = [
+                (key, str(phone), campaign, name if isinstance(name, str) else None,
+                 'sent', 1, None, at, at, at)
+                for key, phone, name, at in zip(phone_keys(df['phone']), df['phone'], names, stamps)
+            ]
+            with self.transaction() as conn:
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO sends (phone_key, phone, campaign, name, status, attempts, error,
+                                                 first_attempt_at, last_attempt_at, sent_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows
+                )
+                conn.execute("INSERT INTO imports (path, rows, imported_at) VALUES (?, ?, ?)",
+                             (path, len(rows), _now()))
+            total += len(rows)
+        return total
+
+
+@click.group()
+@click.option('--db', default=DEFAULT_DB, show_default=True, help='Path to the ledger database.')
+@click.pass_context
+def cli(ctx, db):
+    """Send ledger maintenance."""
+    ctx.obj = SendLedger(db)
+
+
+@cli.command('import')
+@click.argument('paths', nargs=-1)
+@click.pass_obj
+def import_command(ledger, paths):
+    """Import legacy delivered_report_*.csv files."""
+    paths = paths or glob.glob('delivered_report_*.csv')
+    count = ledger.import_reports(paths)
+    click.echo(f"Imported {count} rows from {len(paths)} file(s).")
+
+
+@cli.command()
+@click.pass_obj
+def stats(ledger):
+    """Show contacts per campaign and status."""
+    click.echo(ledger.stats().to_string(index=False))
+
+
+@cli.command()
+@click.option('--campaign', default=None, help='Only this campaign.')
+@click.option('--out', required=True, type=click.Path(), help='CSV file to write.')
+@click.pass_obj
+def export(ledger, campaign, out):
+    """Export the ledger (or one campaign) to CSV."""
+    df = ledger.to_dataframe(campaign)
+    df.to_csv(out, index=False)
+    click.echo(f"Exported {len(df)} rows to {out}")
+
+
+if __name__ == '__main__':
+    cli()
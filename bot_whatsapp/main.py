@@ -6,24 +6,44 @@ import sys
 import os
 from datetime import datetime
 from datetime import datetime
-from bot import WhatsAppBot
-import json
-import random
-import re
+from bot import WhatsAppBot, SEND_MODES, FAILURE_NOT_ON_WHATSAPP
+from ledger import SendLedger, DEFAULT_DB
+from src.utils.phones import normalize_phones, phone_keys, STATUS_INVALID, STATUS_AMBIGUOUS, STATUS_FIXED
+from progress import ProgressJournal, write_csv_atomic
+from sender import ParallelSender, AccountLimits, SendJob
+from confirmer import DeliveryConfirmer
+from templates import Campaign, TemplateError, load_templates
+import glob
+import shutil
+from collections import Counter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
 @click.command()
 @click.option('--csv', required=True, type=click.Path(exists=True), help='Path to the CSV file containing contacts.')
-@click.option('--message', required=False, help='Message to send. Use {name} for personalization if the CSV has a "name" column.')
+@click.option('--message', required=False, help='Message to send. Use {name} or any other {column} of the CSV for personalization.')
 @click.option('--message-file', required=False, type=click.Path(exists=True), help='Path to a text file containing the message.')
 @click.option('--messages-json', required=False, type=click.Path(exists=True), help='Path to a JSON file containing a list of messages.')
 @click.option('--batch-size', default=50, help='Number of messages to send before pausing (to avoid bans).')
 @click.option('--batch-pause', default=60, help='Pause time in seconds between batches.')
 @click.option('--phone-col', default='phone', help='Column name for phone numbers in the CSV.')
 @click.option('--name-col', default='name', help='Column name for names (optional) for personalization.')
-def main(csv, message, message_file, messages_json, batch_size, batch_pause, phone_col, name_col):
+@click.option('--campaign', default=None, help='Campaign name recorded in the send ledger (default: CSV file name).')
+@click.option('--ledger', 'ledger_path', default=DEFAULT_DB, help='Path to the send ledger database.')
+@click.option('--accounts', default=None, help='Comma-separated WhatsApp accounts to send from in parallel (one browser profile each).')
+@click.option('--rate', default=4.0, help='Max messages per minute per account.')
+@click.option('--daily-limit', default=250, help='Max messages per account per day (sends already in the ledger today count).')
+@click.option('--max-failures', default=5, help='Stop an account after this many failures in a row.')
+@click.option('--send-mode', type=click.Choice(SEND_MODES), default='navigate',
+              help="'inpage' keeps WhatsApp Web loaded and opens chats through click-to-chat links instead of reloading per message.")
+@click.option('--confirm-delivery', is_flag=True,
+              help='Read the delivery ticks of sent messages during the pauses between sends and store them in the ledger.')
+@click.option('--simulate', is_flag=True,
+              help='Dry run against the WhatsApp Web simulator (simulator.py): nobody is messaged, and the CSV and ledger are copies.')
+@click.option('--sim-url', default=None, help='URL of a running simulator (default: start one in-process).')
+def main(csv, message, message_file, messages_json, batch_size, batch_pause, phone_col, name_col, campaign, ledger_path,
+         accounts, rate, daily_limit, max_failures, send_mode, confirm_delivery, simulate, sim_url):
     """
     WhatsApp Mass Messenger Bot.
     
@@ -36,19 +56,6 @@ def main(csv, message, message_file, messages_json, batch_size, batch_pause, pho
         click.echo(f"Error: CSV file '{csv}' not found.")
         sys.exit(1)
 
-    if messages_json:
-        try:
-            with open(messages_json, 'r', encoding='utf-8') as f:
-                messages_list = json.load(f)
-                if not isinstance(messages_list, list) or len(messages_list) == 0:
-                     click.echo(f"Error: JSON file must contain a non-empty list of strings.")
-                     sys.exit(1)
-        except Exception as e:
-            click.echo(f"Error reading messages JSON: {e}")
-            sys.exit(1)
-    else:
-        messages_list = None 
-
     if message_file:
         try:
             with open(message_file, 'r', encoding='utf-8') as f:
@@ -58,10 +65,49 @@ def main(csv, message, message_file, messages_json, batch_size, batch_pause, pho
             sys.exit(1)
 
     # Validate message source
-    if not message and not message_file and not messages_list:
+    if not message and not messages_json:
         click.echo("Error: You must provide --message, --message-file, or --messages-json.")
         sys.exit(1)
 
+    # Templates are compiled once; {name} maps to --name-col
+    try:
+        templates = load_templates(message=message, messages_json=messages_json)
+    except (TemplateError, OSError, ValueError) as e:
+        click.echo(f"Error reading messages: {e}")
+        sys.exit(1)
+    message_campaign = Campaign(templates, aliases={'name': name_col})
+
+    # Wall time of each pipeline stage, printed at the end (and returned, for scripts/bench_whatsapp_pipeline.py)
+    stages = {}
+    stage_started = time.perf_counter()
+
+    sim_server = None
+    if simulate:
+        # Same pipeline on copies: <csv>.sim.csv (kept between simulated runs, so
+        # resume works) and send_ledger.sim.db; no pacing unless asked for.
+        from simulator import FakeWhatsAppServer, SimulatedBot
+        sim_csv = f"{os.path.splitext(csv)[0]}.sim.csv"
+        if not os.path.exists(sim_csv):
+            shutil.copyfile(csv, sim_csv)
+        csv = sim_csv
+        if ledger_path == DEFAULT_DB:
+            ledger_path = DEFAULT_DB.replace('.db', '.sim.db')
+        ctx = click.get_current_context()
+        is_default = lambda name: ctx.get_parameter_source(name) == click.core.ParameterSource.DEFAULT
+        rate = 1e6 if is_default('rate') else rate
+        batch_pause = 0 if is_default('batch_pause') else batch_pause
+        daily_limit = 10 ** 9 if is_default('daily_limit') else daily_limit
+        if not sim_url:
+            sim_server = FakeWhatsAppServer(invalid_rate=0.02).start()
+            sim_url = sim_server.url
+        click.echo(f"SIMULATION: sending to {sim_url}, contacts {csv}, ledger {ledger_path}")
+
+    # A previous run killed before its final step leaves a progress journal behind
+    progress = ProgressJournal(csv)
+    recovered = progress.compact(phone_col)
+    if recovered:
+        click.echo(f"Recovered progress from an interrupted run: removed {recovered} sent contacts from {csv}.")
+
     try:
         df = pd.read_csv(csv)
     except Exception as e:
@@ -72,26 +118,23 @@ def main(csv, message, message_file, messages_json, batch_size, batch_pause, pho
     if phone_col not in df.columns:
         click.echo(f"Error: Column '{phone_col}' not found in CSV. Available columns: {list(df.columns)}")
         sys.exit(1)
+    try:
+        message_campaign.validate(df.columns)
+    except TemplateError as e:
+        click.echo(f"Error: {e}")
+        sys.exit(1)
 
-    bot = WhatsAppBot()
+    campaign = campaign or os.path.splitext(os.path.basename(csv))[0]
     
     # --- RESUME LOGIC ---
-    # Find all delivered_report_*.csv files
-    sent_phones = set()
-    import glob
-    report_files = glob.glob("delivered_report_*.csv")
-    if report_files:
-        click.echo(f"Found {len(report_files)} previous report(s). Checking for already sent messages...")
-        for rf in report_files:
-            try:
-                # Read only the phone column to save memory if files are huge
-                # Assuming 'phone' column exists as per line 99/114 logic
-                sent_df = pd.read_csv(rf, dtype=str) 
-                if 'phone' in sent_df.columns:
-                    sent_phones.update(sent_df['phone'].tolist())
-            except Exception as e:
-                click.echo(f"Warning: Could not read report {rf}: {e}")
-        
+    # Every send is recorded in the SQLite ledger; old delivered_report_*.csv
+    # files are imported once (already imported files are skipped).
+    ledger = SendLedger(ledger_path)
+    imported = 0 if simulate else ledger.import_reports(glob.glob("delivered_report_*.csv"))
+    if imported:
+        click.echo(f"Imported {imported} rows from legacy delivery reports into {ledger_path}.")
+    sent_phones = ledger.sent_keys()
+    if sent_phones:
         click.echo(f"Total unique contacts previously messaged: {len(sent_phones)}")
     
     # Filter the main dataframe
@@ -103,26 +146,17 @@ def main(csv, message, message_file, messages_json, batch_size, batch_pause, pho
         
         # Filter
         initial_count = len(df)
-        
-        # Helper to clean phone for comparison
-        def clean_phone(p):
-            return re.sub(r'\D', '', str(p))
-            
-        df['clean_phone'] = df[phone_col].apply(clean_phone)
-        
-        df_to_process = df[~df['clean_phone'].isin(sent_phones)]
-        # cleanup temp column
-        df.drop(columns=['clean_phone'], inplace=True)
+        df_to_process = df[~phone_keys(df[phone_col]).isin(sent_phones)]
         
         skipped_count = initial_count - len(df_to_process)
         
         if skipped_count > 0:
-            click.echo(f"Skipping {skipped_count} contacts that were already found in previous reports.")
+            click.echo(f"Skipping {skipped_count} contacts that were already messaged (send ledger).")
             # Permanently remove them from the source file as requested
-            df_to_process.to_csv(csv, index=False)
+            write_csv_atomic(df_to_process, csv)
             click.echo(f"Updated {csv} to remove these contacts permanently.")
         else:
-            click.echo("No contacts skipped (none matched previous reports).")
+            click.echo("No contacts skipped (none found in the send ledger).")
             
     if len(df_to_process) == 0:
         click.echo("All contacts in the CSV have already been messaged. Exiting.")
@@ -130,136 +164,153 @@ def main(csv, message, message_file, messages_json, batch_size, batch_pause, pho
         
     df = df_to_process # Work with the filtered list
     # --- END RESUME LOGIC ---
+    stages['resume'] = time.perf_counter() - stage_started
 
-    try:
-        bot.start()
-        
-        click.echo(f"Starting to process {len(df)} contacts...")
-        
-        delivered_contacts = []
-        indices_to_drop = []
-        
-        count_processed = 0
+    stage_started = time.perf_counter()
+    normalized = normalize_phones(df[phone_col])
+    stages['normalize'] = time.perf_counter() - stage_started
+    flagged = normalized['status'].value_counts()
+    if flagged.get(STATUS_INVALID) or flagged.get(STATUS_AMBIGUOUS):
+        click.echo(f"Phone check: {flagged.get(STATUS_INVALID, 0)} invalid (will be skipped), "
+                   f"{flagged.get(STATUS_AMBIGUOUS, 0)} ambiguous.")
 
-        for index, row in df.iterrows():
-            # Batch Pause Logic
-            if count_processed > 0 and count_processed % batch_size == 0:
-                click.echo(f"Batch limit of {batch_size} reached. Pausing for {batch_pause} seconds...")
-                time.sleep(batch_pause)
-                click.echo("Resuming...")
+    # Build the jobs up front: invalid numbers are skipped, messages are rendered
+    # (and URL-encoded) for the whole list at once, so the workers only send
+    stage_started = time.perf_counter()
+    rendered = message_campaign.render(df)
+    names = ([str(v) if pd.notna(v) else None for v in df[name_col]] if name_col in df.columns
+             else [None] * len(df))
+    jobs = []
+    for index, raw_phone, contact_name, phone_info, msg_to_send, encoded in zip(
+            df.index, df[phone_col], names, normalized.itertuples(index=False),
+            rendered['message'], rendered['encoded']):
+        # Numbers were normalized up front for the whole list (src/utils/phones.py)
+        if phone_info.status == STATUS_INVALID:
+            logging.warning(f"Skipping invalid phone {raw_phone!r} ({phone_info.reason}).")
+            ledger.record(raw_phone, 'invalid', campaign, error=phone_info.reason)
+            continue
+        if phone_info.status == STATUS_AMBIGUOUS:
+            logging.warning(f"Ambiguous phone {raw_phone!r} ({phone_info.reason}), using {phone_info.e164}.")
+        elif phone_info.status == STATUS_FIXED:
+            logging.info(f"Auto-corrected phone ({phone_info.reason}): {phone_info.e164}")
 
-            count_processed += 1
+        jobs.append(SendJob(key=phone_info.key, phone=phone_info.e164.lstrip('+'), message=msg_to_send,
+                            name=contact_name, row_id=index, encoded=encoded))
+    if len(templates) > 1:
+        click.echo("Message variants: " + ', '.join(
+            f"#{variant + 1}: {count}" for variant, count in sorted(rendered['variant'].value_counts().items())))
+    stages['prepare'] = time.perf_counter() - stage_started
+    logging.info(f"Prepared {len(jobs)} messages in {stages['prepare']:.2f}s.")
 
-            phone = str(row[phone_col])
-            
-            # Robust phone cleaning and formatting
-            # 1. Remove everything that is not a digit
-            phone = re.sub(r'\D', '', phone)
-            
-            # 2. Brasil Phone Number Correction Logic
-            # Case A: 8 digits (No DDD, no country code) -> Too risky to guess DDD, assume invalid or log warning.
-            # Case B: 10 digits (DDD + 8 digits) -> Add country code + Add 9
-            # Case C: 11 digits (DDD + 9 digits) -> Add country code
-            # Case D: 12 digits (55 + DDD + 8 digits) -> Add 9
-            # Case E: 13 digits (55 + DDD + 9 digits) -> OK
-            
-            # Logic implementation:
-            if len(phone) == 10:
-                # Assuming DDD + 8 digits. Add '55' and the '9' after DDD.
-                # Format: PP NNNN NNNN -> 55 PP 9 NNNN NNNN
-                ddd = phone[:2]
-                number = phone[2:]
-                phone = f"55{ddd}9{number}"
-                logging.info(f"Auto-corrected phone (added 55 and 9): {phone}")
-                
-            elif len(phone) == 11:
-                # Assuming DDD + 9 digits OR 55 + DDD + 8 digits? 
-                # Usually if it starts with 55 and has 11 digits, it is 55 + DDD + 8 digits (old format without 9)
-                # But it could be just DDD + 9 digits (new format without country code)
-                
-                # Check if starts with 55 (Brazil DDI)
-                if phone.startswith('55'):
-                     # Likely 55 + DDD + 8 digits (e.g. 55 11 9999 8888 -> 11 digits)
-                     # We need to add the 9.
-                     # Format: 55 PP NNNN NNNN -> 55 PP 9 NNNN NNNN
-                     ddd = phone[2:4]
-                     number = phone[4:]
-                     phone = f"55{ddd}9{number}"
-                     logging.info(f"Auto-corrected phone (added 9 to 55 number): {phone}")
-                else:
-                    # Likely DDD + 9 digits (e.g. 11 99999 8888). Add 55.
-                     phone = f"55{phone}"
-                     logging.info(f"Auto-corrected phone (added 55): {phone}")
+    account_list = [a.strip() for a in accounts.split(',') if a.strip()] if accounts else ['default']
+    limits = AccountLimits(per_minute=rate, daily_limit=daily_limit, batch_size=batch_size,
+                           batch_pause=batch_pause, max_consecutive_failures=max_failures)
+    confirmer = DeliveryConfirmer() if confirm_delivery else None
+    # Session transitions per account (e.g. 'coord2: connected -> logged_out'), for the summary
+    session_events = Counter()
 
-            elif len(phone) == 12:
-                # Likely 55 + DDD + 9 digits is 13 digits.
-                # 55 + DDD + 8 digits is 12 digits? No, 2+2+8=12. 
-                # If 12 digits, it is likely 55 + DDD + 8 digits. (e.g. 55 11 8888 7777)
-                if phone.startswith('55'):
-                    # Insert 9 after DDD
-                    ddd = phone[2:4]
-                    number = phone[4:]
-                    phone = f"55{ddd}9{number}"
-                    logging.info(f"Auto-corrected phone (added 9 to 12-digit number): {phone}")
-            
-            elif len(phone) == 8 or len(phone) == 9:
-                 logging.warning(f"Phone number {phone} is too short. Skipping auto-correction, might fail.")
-            
-            # Case where it is already 13 digits (55 + DDD + 9 + 8 digits) -> Do nothing
+    def on_state_change(bot, old, new, reason):
+        if old is not None:
+            session_events[f"{bot.account}: {old} -> {new}"] += 1
 
-            
-            # Choose message
-            if messages_list:
-                msg_to_send = random.choice(messages_list)
-            else:
-                msg_to_send = message
-            
-            # Personalization
-            if name_col in df.columns and pd.notna(row[name_col]):
-                msg_to_send = msg_to_send.format(name=row[name_col])
-            
-            logging.info(f"[{index+1}/{len(df)}] Sending to {phone}...")
-            
-            success = bot.send_message(phone, msg_to_send)
-            
-            if success:
-                logging.info("Status: Sent")
-                delivered_contacts.append({
-                    'name': row[name_col] if name_col in df.columns and pd.notna(row[name_col]) else 'N/A',
-                    'phone': phone,
-                    'date': datetime.now().strftime("%Y-%m-%d"),
-                    'time': datetime.now().strftime("%H:%M:%S")
-                })
-                indices_to_drop.append(index)
+    if simulate:
+        bot_factory = lambda account: SimulatedBot(account, base_url=sim_url)
+    else:
+        bot_factory = lambda account: WhatsAppBot(account, send_mode=send_mode)
+    # Earlier runs today count towards each account's daily limit
+    sent_today = ledger.sent_today()
+    for account in account_list:
+        if sent_today.get(account):
+            click.echo(f"[{account}] {sent_today[account]} messages already sent today (daily limit {daily_limit}).")
+    sender = ParallelSender(account_list, limits, bot_factory=bot_factory,
+                            confirmer=confirmer, on_state_change=on_state_change, sent_today=sent_today)
+
+    def apply_delivery_updates():
+        # Tick statuses read by the workers; the ledger is only written from this thread
+        if confirmer is not None:
+            for phone, status in confirmer.drain():
+                ledger.update_delivery(phone, campaign, status)
+
+    def record_result(result, label):
+        """Writes one send result to the ledger (and the journal); True if it was sent."""
+        job = result.job
+        if result.success:
+            logging.info(f"[{label}] [{result.account}] Sent to {job.phone}"
+                         f"{' (unconfirmed)' if result.error else ''}")
+            ledger.record(job.phone, 'sent', campaign, name=job.name, error=result.error, account=result.account)
+            progress.append(job.phone)
+            if confirmer is not None:
+                confirmer.track(job.phone, result.account)
+            return True
+        logging.error(f"[{label}] [{result.account}] Failed: {job.phone}")
+        status = 'invalid' if result.error == FAILURE_NOT_ON_WHATSAPP else 'failed'
+        ledger.record(job.phone, status, campaign, name=job.name, error=result.error, account=result.account)
+        return False
+
+    results = sender.run(jobs)
+
+    try:
+        click.echo(f"Starting to process {len(jobs)} contacts with {len(account_list)} account(s): {', '.join(account_list)}...")
+        
+        sent_count = 0
+        failed_count = 0
+        stage_started = time.perf_counter()
+
+        for count_processed, result in enumerate(results, 1):
+            if record_result(result, f"{count_processed}/{len(jobs)}"):
+                sent_count += 1
             else:
-                logging.error("Status: Failed")
+                failed_count += 1
+            apply_delivery_updates()
             
             # The bot class already handles delays between actions
-            
-        click.echo("All messages processed.")
 
-        if not delivered_contacts:
+        stages['send'] = time.perf_counter() - stage_started
+        if session_events:
+            click.echo("Session changes: " + ', '.join(f"{event} (x{n})" for event, n in session_events.items()))
+        if sender.pending:
+            click.echo(f"{len(sender.pending)} contacts left unsent (all accounts stopped); run again to continue.")
+        else:
+            click.echo("All messages processed.")
+
+        if not sent_count:
             click.echo("No messages were sent in this session.")
+
+        throughput = sent_count / stages['send'] if stages['send'] else 0.0
+        click.echo("Stage timings: " + ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in stages.items())
+                   + f" ({throughput:.1f} messages/s)")
+        return {'stages': stages, 'sent': sent_count, 'failed': failed_count,
+                'pending': len(sender.pending), 'session_events': dict(session_events)}
         
     except KeyboardInterrupt:
+        sender.stop()
         click.echo("\nInterrupted by user.")
     except Exception as e:
         click.echo(f"An error occurred: {e}")
     finally:
-        # Save progress if there are delivered contacts
-        if 'delivered_contacts' in locals() and delivered_contacts:
-            click.echo("Saving delivery report and updating contacts file...")
-            report_filename = f"delivered_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            report_df = pd.DataFrame(delivered_contacts)
-            report_df.to_csv(report_filename, index=False)
-            click.echo(f"Report generated: {report_filename}")
+        # Stops the workers; what they finished after we stopped reading still
+        # has to reach the ledger and the journal, or the next run resends it
+        results.close()
+        for result in sender.unrecorded:
+            record_result(result, "after stop")
+        apply_delivery_updates()
+        if confirmer is not None:
+            rates = ledger.delivery_rates(campaign)
+            if not rates.empty:
+                click.echo(f"Delivery so far: {rates.to_string(index=False)}")
+            click.echo(f"Unconfirmed messages can be checked later with: python confirmer.py --campaign {campaign}")
 
-            # Update contacts CSV
-            df_remaining = df.drop(indices_to_drop)
-            df_remaining.to_csv(csv, index=False)
-            click.echo(f"Updated contacts file: {csv} (Removed {len(indices_to_drop)} sent contacts)")
+        # Sends are already in the ledger and the progress journal; fold the
+        # journal into the contacts CSV once, instead of on every message
+        removed = progress.compact(phone_col)
+        if removed:
+            click.echo(f"Sends recorded in {ledger_path} (campaign '{campaign}').")
+            click.echo(f"Updated contacts file: {csv} (Removed {removed} sent contacts)")
         
-        bot.stop()
+        ledger.close()
+        if sim_server is not None:
+            click.echo(f"Simulator: {sim_server.stats()}")
+            sim_server.stop()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,86 @@
+"""
+Crash-safe progress for a contacts CSV.
+
+Every successful send is appended (and fsync'd) to `<csv>.progress.jsonl`,
+so the per-message cost is one small write no matter how long the list
+is. The contacts file itself is only rewritten by `compact()`, at the end
+of the run, or at the start of the next one if the previous run was
+killed before it could compact.
+"""
+import os
+import json
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+from ledger import phone_key, phone_keys
+
+
+def write_csv_atomic(df, path):
+    """Writes `df` to a temp file and swaps it in, so a crash never leaves a half-written CSV."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ProgressJournal:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.path = f"{csv_path}.progress.jsonl"
+        self._file = None
+
+    def append(self, phone, status='sent'):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        entry = {'phone_key': phone_key(phone), 'phone': str(phone), 'status': status,
+                 'at': datetime.now().isoformat(timespec='seconds')}
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def sent_keys(self):
+        keys = set()
+        if not os.path.exists(self.path):
+            return keys
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # half-written last line from a crash
+                if entry.get('status') == 'sent':
+                    keys.add(entry['phone_key'])
+        return keys
+
+    def compact(self, phone_col):
+        """
+        Folds the journal into the contacts CSV (sent contacts are removed) and deletes it.
+
+        Returns the number of contacts removed.
+        """
+        self.close()
+        sent = self.sent_keys()
+        if not os.path.exists(self.path):
+            return 0
+
+        removed = 0
+        if sent:
+            df = pd.read_csv(self.csv_path, dtype=str)
+            if phone_col not in df.columns:
+                logging.warning(f"Column '{phone_col}' not in {self.csv_path}; keeping {self.path} for later.")
+                return 0
+            keep = ~phone_keys(df[phone_col]).isin(sent)
+            removed = int((~keep).sum())
+            if removed:
+                write_csv_atomic(df[keep], self.csv_path)
+        os.remove(self.path)
+        return removed
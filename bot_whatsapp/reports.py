@@ -0,0 +1,197 @@
+"""
+Articulator status reports over the send ledger.
+
+The cursistas list and the articulators are loaded into temporary tables
+of the ledger connection, so the join with the sends and the counts per
+municipality are one grouped query on the indexed phone keys. The messages
+of all articulators are then rendered in one pass (templates.py), and can be
+written to CSV/text or sent as a WhatsApp campaign.
+"""
+import logging
+from datetime import date
+
+import pandas as pd
+
+from ledger import SendLedger, SENT_STATUSES, phone_keys
+from templates import Campaign, Template
+
+# Template da mensagem (campos: colunas do relatório)
+MESSAGE_TEMPLATE = """Prezado(a) {nome_articulador},
+
+Informamos o status dos envios de mensagens via WhatsApp para os cursistas de {municipio}.
+
+Quantidade de cursistas que já receberam a mensagem: {qtd_entregue}
+
+Atenciosamente,
+Coordenação"""
+
+# Between the reports of an articulator covering several municipalities
+MESSAGE_SEPARATOR = "\n\n----------\n\n"
+
+REPORT_QUERY = f"""
+WITH sent AS (
+    SELECT phone_key, MAX(status IN ('delivered', 'read')) AS delivered
+    FROM sends WHERE status IN ({','.join('?' * len(SENT_STATUSES))}) {{campaign_filter}}
+    GROUP BY phone_key
+)
+SELECT a.municipio, a.nome, a.email, a.phone,
+       COUNT(c.phone_key) AS total,
+       COUNT(s.phone_key) AS entregues,
+       COALESCE(SUM(s.delivered), 0) AS confirmados
+FROM temp.report_articuladores a
+LEFT JOIN temp.report_cursistas c ON c.municipio_key = a.municipio_key
+LEFT JOIN sent s ON s.phone_key = c.phone_key
+GROUP BY a.id
+ORDER BY a.id
+"""
+
+
+def municipality_key(series):
+    return series.astype('string').fillna('').str.strip().str.upper()
+
+
+def load_articulators(path='articuladores_2026_1.csv'):
+    """CSV sem cabeçalho: Municipio, UF, Nome, Email, Telefone (opcional)."""
+    df = pd.read_csv(path, header=None, dtype=str)
+    df = df.rename(columns={0: 'Municipio', 2: 'Nome', 3: 'Email', 4: 'Telefone'})
+    if 'Telefone' not in df.columns:
+        df['Telefone'] = None
+    return df
+
+
+def find_columns(cursistas_df):
+    """(secretaria, telefone) columns of a cursistas CSV, by name."""
+    cols = cursistas_df.columns
+    secretaria_col = next((c for c in cols if 'secretaria' in c.lower()), None)
+    phone_col = next((c for c in cols if any(k in c.lower() for k in ('tel', 'cel', 'phone', 'whatsapp'))), None)
+    return secretaria_col, phone_col
+
+
+def build_report(ledger: SendLedger, art_df, cursistas_df, secretaria_col, phone_col,
+                 campaign=None, template=MESSAGE_TEMPLATE):
+    """One row per articulator: cursistas in the municipality, how many got the message, and the report text."""
+    conn = ledger.conn
+    conn.execute("DROP TABLE IF EXISTS temp.report_cursistas")
+    conn.execute("DROP TABLE IF EXISTS temp.report_articuladores")
+    conn.execute("CREATE TEMP TABLE report_cursistas (municipio_key TEXT, phone_key TEXT)")
+    conn.execute("CREATE TEMP TABLE report_articuladores (id INTEGER PRIMARY KEY, municipio_key TEXT, "
+                 "municipio TEXT, nome TEXT, email TEXT, phone TEXT)")
+    conn.executemany("INSERT INTO temp.report_cursistas VALUES (?, ?)",
+                     zip(municipality_key(cursistas_df[secretaria_col]), phone_keys(cursistas_df[phone_col])))
+    conn.execute("CREATE INDEX temp.idx_report_cursistas ON report_cursistas (municipio_key, phone_key)")
+
+    strip = lambda col: art_df[col].astype('string').fillna('').str.strip()
+    conn.executemany("INSERT INTO temp.report_articuladores VALUES (?, ?, ?, ?, ?, ?)",
+                     zip(range(len(art_df)), municipality_key(art_df['Municipio']), strip('Municipio'),
+                         strip('Nome'), strip('Email'), strip('Telefone')))
+
+    params = list(SENT_STATUSES)
+    campaign_filter = ''
+    if campaign:
+        campaign_filter = 'AND campaign = ?'
+        params.append(campaign)
+    counts = pd.read_sql_query(REPORT_QUERY.format(campaign_filter=campaign_filter), conn, params=params)
+    conn.execute("DROP TABLE temp.report_cursistas")
+    conn.execute("DROP TABLE temp.report_articuladores")
+
+    report_df = pd.DataFrame({
+        'Municipio': counts['municipio'],
+        'Articulador_Nome': counts['nome'],
+        'Articulador_Email': counts['email'],
+        'Articulador_Telefone': counts['phone'],
+        'Total_Cursistas': counts['total'],
+        'Receberam_Mensagem': counts['entregues'],
+        'Entrega_Confirmada': counts['confirmados'],
+    })
+    fields = pd.DataFrame({
+        'nome_articulador': report_df['Articulador_Nome'],
+        'municipio': report_df['Municipio'],
+        'qtd_entregue': report_df['Receberam_Mensagem'].astype(str),
+        'total_cursistas': report_df['Total_Cursistas'].astype(str),
+        'qtd_confirmada': report_df['Entrega_Confirmada'].astype(str),
+    })
+    report_df['Mensagem_Email'] = Campaign([Template(template)]).render(fields, encode=False)['message']
+    return report_df
+
+
+def write_text(report_df, path):
+    """All report messages in one text file, one block per articulator."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for municipio, message in zip(report_df['Municipio'], report_df['Mensagem_Email']):
+            f.write(f"===== {municipio} =====\n{message}\n\n")
+
+
+def enqueue_reports(report_df, ledger: SendLedger, campaign=None, accounts=None, send_mode='navigate', limits=None):
+    """
+    Sends each articulator their report through the WhatsApp sender (one
+    message per articulator, with the reports of all their municipalities).
+
+    Articulators already messaged in this campaign (default: one per day) are
+    skipped, so the command can be re-run after an interruption. `limits`
+    (sender.AccountLimits, main.py's defaults if None) apply as in a
+    campaign, and the day's earlier sends count towards each account's daily
+    limit.
+    """
+    # Imported here: building the report must not require Selenium
+    from bot import WhatsAppBot
+    from sender import ParallelSender, SendJob, AccountLimits
+    from src.utils.phones import normalize_phones, STATUS_INVALID
+
+    campaign = campaign or f"relatorio-articuladores-{date.today().isoformat()}"
+    normalized = normalize_phones(report_df['Articulador_Telefone'])
+    valid = (normalized['status'] != STATUS_INVALID).to_numpy()
+    skipped = int((~valid).sum())
+    if skipped:
+        logging.warning(f"{skipped} articulator(s) without a valid phone; their reports were not queued.")
+
+    # One message per articulator: jobs and ledger rows are keyed by phone, so an
+    # articulator covering several municipalities gets all their reports together
+    reports = pd.DataFrame({
+        'key': normalized['key'].to_numpy()[valid],
+        'phone': normalized['e164'].to_numpy()[valid],
+        'name': report_df['Articulador_Nome'].to_numpy()[valid],
+        'message': report_df['Mensagem_Email'].to_numpy()[valid],
+    })
+    merged = reports.groupby('key', sort=False).agg(
+        phone=('phone', 'first'), name=('name', 'first'), message=('message', MESSAGE_SEPARATOR.join),
+        municipios=('message', 'size'))
+    several = int((merged['municipios'] > 1).sum())
+    if several:
+        logging.info(f"{several} articulator(s) cover several municipalities; their reports go in one message.")
+
+    already = ledger.sent_keys(campaign)
+    jobs = [
+        SendJob(key=key, phone=phone.lstrip('+'), message=message, name=name, row_id=key)
+        for key, phone, name, message in zip(merged.index, merged['phone'], merged['name'], merged['message'])
+        if key not in already
+    ]
+    if not jobs:
+        return campaign, 0
+
+    limits = limits or AccountLimits()
+    sent_today = ledger.sent_today()
+    for account in accounts or ['default']:
+        if sent_today.get(account):
+            logging.info(f"[{account}] {sent_today[account]} messages already sent today (daily limit {limits.daily_limit}).")
+    sender = ParallelSender(accounts or ['default'], limits,
+                            bot_factory=lambda account: WhatsAppBot(account, send_mode=send_mode),
+                            sent_today=sent_today)
+
+    def record(result):
+        status = 'sent' if result.success else 'failed'
+        ledger.record(result.job.phone, status, campaign, name=result.job.name, account=result.account)
+        return result.success
+
+    sent = 0
+    results = sender.run(jobs)
+    try:
+        for result in results:
+            sent += record(result)
+    finally:
+        # Reports the workers sent after we stopped reading (Ctrl-C, an error)
+        results.close()
+        for result in sender.unrecorded:
+            sent += record(result)
+    if sender.pending:
+        logging.warning(f"{len(sender.pending)} report(s) left unsent (daily limit or accounts stopped); run again to continue.")
+    return campaign, sent
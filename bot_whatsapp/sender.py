@@ -0,0 +1,281 @@
+"""
+Parallel sender: several WhatsApp accounts working through one queue.
+
+Each account runs its own WhatsApp Web session (its own Chrome profile, see
+`profile_for_account`) in a worker thread, paced by its own token bucket
+and ban-safety limits. Contacts are put on a shared queue once (deduped by
+phone key), so every contact is taken by exactly one account and the
+campaign throughput grows with the number of accounts.
+
+Results come back to the caller's thread, which stays the only writer of
+the ledger and the progress journal. An optional `DeliveryConfirmer`
+(confirmer.py) gets each bot's deliberate pauses to read back the ticks
+of earlier messages.
+"""
+import time
+import queue
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from bot import WhatsAppBot, SessionUnavailable, SENT_UNCONFIRMED
+
+
+@dataclass
+class AccountLimits:
+    """Rate budget and ban-safety limits of one account."""
+    per_minute: float = 4.0           # token bucket refill rate
+    burst: int = 1                    # bucket size
+    daily_limit: int = 250            # stop the account after this many sends in a day (all runs)
+    batch_size: int = 50              # long pause after this many sends...
+    batch_pause: float = 60.0         # ...of this many seconds
+    max_consecutive_failures: int = 5  # likely blocked/banned: stop using the account
+
+
+@dataclass
+class SendJob:
+    key: str                # dedupe key (E.164)
+    phone: str              # number as sent to WhatsApp (digits)
+    message: str
+    name: Optional[str] = None
+    row_id: object = None   # caller's reference (e.g. DataFrame index)
+    encoded: Optional[str] = None  # message already URL-encoded (templates.Campaign.render)
+
+
+@dataclass
+class SendResult:
+    job: SendJob
+    account: str
+    success: bool
+    at: float
+    error: Optional[str] = None  # e.g. bot.FAILURE_NOT_ON_WHATSAPP, or bot.SENT_UNCONFIRMED on success
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `capacity` stored."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self, stop_event=None):
+        """Blocks until a token is available (or `stop_event` is set). Returns False if stopped."""
+        while True:
+            wait = self.wait_time()
+            if wait <= 0:
+                self.tokens -= 1
+                return True
+            if stop_event is not None and stop_event.is_set():
+                return False
+            self.sleep(min(wait, 1.0))
+
+
+class AccountWorker(threading.Thread):
+    def __init__(self, account, limits: AccountLimits, jobs: queue.Queue, results: queue.Queue,
+                 stop_event: threading.Event, bot_factory: Callable[[str], object], confirmer=None,
+                 on_state_change=None, sent_before=0):
+        super().__init__(name=f"whatsapp-{account}", daemon=True)
+        self.account = account
+        self.limits = limits
+        self.jobs = jobs
+        self.results = results
+        self.stop_event = stop_event
+        self.bot_factory = bot_factory
+        self.confirmer = confirmer
+        self.on_state_change = on_state_change
+        self.bucket = TokenBucket(limits.per_minute / 60.0, limits.burst)
+        self.sent = 0
+        self.sent_before = sent_before  # sent today by earlier runs (counts towards daily_limit)
+        self.paused_at = 0
+        self.consecutive_failures = 0
+        self.stopped_reason = None
+        self.unrecorded: List[SendResult] = []  # results the caller stopped reading (see _put_result)
+
+    def run(self):
+        try:
+            bot = self.bot_factory(self.account)
+            if self.confirmer is not None:
+                bot.idle_task = self.confirmer.idle_task
+            bot.on_state_change = self.on_state_change
+            bot.start()
+        except Exception as e:
+            self.stopped_reason = f"could not start: {e}"
+            logging.error(f"[{self.account}] {self.stopped_reason}")
+            return
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    job = self.jobs.get(timeout=0.5)
+                except queue.Empty:
+                    if self.jobs.unfinished_tasks == 0:
+                        break
+                    continue
+
+                if self.sent_before + self.sent >= self.limits.daily_limit:
+                    self.stopped_reason = f"daily limit of {self.limits.daily_limit} reached"
+                    self._hand_back(job)
+                    break
+                if self.sent - self.paused_at >= self.limits.batch_size:
+                    self.paused_at = self.sent
+                    logging.info(f"[{self.account}] Batch of {self.limits.batch_size} sent, pausing {self.limits.batch_pause:.0f}s...")
+                    if self.stop_event.wait(self.limits.batch_pause):
+                        self._hand_back(job)
+                        break
+                if not self.bucket.acquire(self.stop_event):
+                    self._hand_back(job)
+                    break
+
+                try:
+                    success = bot.send_message(job.phone, job.message, encoded=job.encoded)
+                except SessionUnavailable as e:
+                    # Banned or not reconnected in time: the contact goes back to the
+                    # queue for the other accounts (or the next run)
+                    self._hand_back(job)
+                    self.stopped_reason = f"session {e.state}: {e}"
+                    break
+                if success:
+                    error = SENT_UNCONFIRMED if getattr(bot, 'last_unconfirmed', False) else None
+                else:
+                    error = getattr(bot, 'last_failure', None)
+                self._put_result(SendResult(job, self.account, success, time.time(), error))
+                self.jobs.task_done()
+
+                if success:
+                    self.sent += 1
+                    self.consecutive_failures = 0
+                elif error is not None:
+                    pass  # the contact's problem (e.g. not on WhatsApp), not a sign of a blocked account
+                else:
+                    self.consecutive_failures += 1
+                    if self.consecutive_failures >= self.limits.max_consecutive_failures:
+                        self.stopped_reason = f"{self.consecutive_failures} failures in a row (blocked?)"
+                        break
+        finally:
+            if self.stopped_reason:
+                logging.warning(f"[{self.account}] Stopped: {self.stopped_reason}")
+            bot.stop()
+
+    def _put_result(self, result):
+        # The results queue is bounded: wait until the caller has recorded the
+        # previous results, so a crash loses at most the messages in flight.
+        # Once stopped nobody may read the queue again: the result is kept for
+        # ParallelSender.unrecorded instead of being dropped
+        while True:
+            try:
+                self.results.put(result, timeout=0.5)
+                return
+            except queue.Full:
+                if self.stop_event.is_set():
+                    self.unrecorded.append(result)
+                    return
+
+    def _hand_back(self, job):
+        """Returns an unsent job to the queue for the other accounts."""
+        self.jobs.put(job)
+        self.jobs.task_done()
+
+
+class ParallelSender:
+    """
+    Sends jobs through several accounts at once.
+
+    Usage:
+        sender = ParallelSender(['default', 'coord2'], AccountLimits(per_minute=3))
+        for result in sender.run(jobs):
+            ...
+        sender.pending     # jobs left unsent (all accounts stopped)
+        sender.unrecorded  # results not handed out because the caller stopped reading
+
+    When the caller stops iterating (Ctrl-C, an exception, closing the
+    generator), the messages the workers finished afterwards end up in
+    `unrecorded`; the caller records them like the results it read, or the
+    next run would send them again.
+
+    `sent_today` ({account: count}, e.g. SendLedger.sent_today()) is what each
+    account already sent today, so several runs in a day share the daily limit.
+    """
+
+    def __init__(self, accounts: List[str], limits: AccountLimits = None,
+                 bot_factory: Callable[[str], object] = None, confirmer=None, on_state_change=None,
+                 sent_today: Optional[Dict[str, int]] = None):
+        self.accounts = list(dict.fromkeys(accounts)) or ['default']
+        self.limits = limits or AccountLimits()
+        self.bot_factory = bot_factory or (lambda account: WhatsAppBot(account))
+        self.confirmer = confirmer
+        self.on_state_change = on_state_change  # metrics hook, see WhatsAppBot.on_state_change
+        self.sent_today = dict(sent_today or {})
+        self.stop_event = threading.Event()
+        self.pending: List[SendJob] = []
+        self.unrecorded: List[SendResult] = []
+        self.workers: List[AccountWorker] = []
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self, jobs: Iterable[SendJob]) -> Iterator[SendResult]:
+        work = queue.Queue()
+        results = queue.Queue(maxsize=len(self.accounts))
+        seen = set()
+        for job in jobs:
+            if job.key in seen:
+                continue  # same contact twice in the list
+            seen.add(job.key)
+            work.put(job)
+
+        self.workers = [
+            AccountWorker(account, self.limits, work, results, self.stop_event, self.bot_factory,
+                          self.confirmer, self.on_state_change, self.sent_today.get(account, 0))
+            for account in self.accounts
+        ]
+        # Stagger start-up so the QR prompts / first sends don't all happen at once;
+        # results of the accounts already running are handed out meanwhile, so
+        # nothing sits unrecorded in the queue while the others start
+        to_start = list(self.workers)
+        next_start = time.monotonic()
+
+        try:
+            while to_start or any(w.is_alive() for w in self.workers) or not results.empty():
+                now = time.monotonic()
+                if to_start and now >= next_start:
+                    to_start.pop(0).start()
+                    next_start = now + random.uniform(0.5, 1.5)
+                    continue
+                timeout = min(0.5, next_start - now) if to_start else 0.5
+                try:
+                    yield results.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+        finally:
+            self.stop_event.set()
+            for worker in self.workers:
+                if worker.ident is not None:  # stopped before its turn to start
+                    worker.join(timeout=30)
+                self.unrecorded.extend(worker.unrecorded)
+            while True:
+                try:
+                    self.unrecorded.append(results.get_nowait())
+                except queue.Empty:
+                    break
+            if self.unrecorded:
+                logging.info(f"{len(self.unrecorded)} result(s) arrived after the caller stopped reading.")
+            while True:
+                try:
+                    self.pending.append(work.get_nowait())
+                except queue.Empty:
+                    break
@@ -0,0 +1,394 @@
+"""
+WhatsApp Web simulator, for dry runs and load tests without messaging anyone.
+
+`FakeWhatsAppServer` is a local HTTP server with two faces:
+  * a stand-in page with the DOM the real bot drives (#side search box,
+    click-to-chat links routed in-page, #main chat with footer textbox,
+    sent ticks, the invalid-number popup and the QR code page when logged
+    out), so `WhatsAppBot(base_url=..., site='whatsapp-sim')` can be
+    exercised with a real browser;
+  * a small JSON API used by `SimulatedBot`, a browserless bot that goes
+    through the same retry/reconnect logic as WhatsAppBot, so the whole
+    campaign pipeline can run at thousands of messages per second.
+
+The server decides which numbers are "not on WhatsApp" (`invalid_rate`),
+can log accounts out every N messages (`logout_every`, back after
+`logout_for` seconds, as if the QR code was scanned again) and counts every
+message it receives, so duplicates after a resume or a crash are visible.
+
+    python simulator.py --port 8765 --invalid-rate 0.02
+    python main.py --csv contatos.csv --message-file mensagem.txt --simulate --sim-url http://127.0.0.1:8765
+"""
+import json
+import time
+import zlib
+import logging
+import threading
+import urllib.parse
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+from bot import (WhatsAppBot, STATE_CONNECTED, STATE_DEGRADED, STATE_LOGGED_OUT, STATE_BANNED,
+                 FAILURE_NOT_ON_WHATSAPP)
+from src.core.browser import SITES, SiteProfile
+
+# Reconnect backoff for simulated sessions (seconds): same state machine, shorter waits
+SIM_BACKOFF = (0.05, 1.0)
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>WhatsApp (simulator)</title></head>
+<body>
+<div id="app"></div>
+<script>
+const CONFIG = __CONFIG__;
+const app = document.getElementById('app');
+
+function el(tag, attrs, children) {
+    const node = document.createElement(tag);
+    Object.entries(attrs || {}).forEach(([k, v]) => node.setAttribute(k, v));
+    (children || []).forEach(c => node.append(c));
+    return node;
+}
+
+function tick(icon) {
+    return el('span', {'data-icon': icon, 'aria-label': icon === 'msg-time' ? ' Pending ' : icon === 'msg-check' ? ' Sent ' : ' Delivered '});
+}
+
+function openChat(phone, text) {
+    const old = document.getElementById('main');
+    if (old) old.remove();
+    const box = el('div', {contenteditable: 'true', role: 'textbox', 'data-tab': '10'});
+    box.textContent = text || '';
+    const main = el('div', {id: 'main'}, [el('header', {}, [phone]), el('div', {class: 'messages'}), el('footer', {}, [box])]);
+    box.addEventListener('keydown', async (event) => {
+        if (event.key !== 'Enter' || event.shiftKey) return;
+        event.preventDefault();
+        const body = box.innerText;
+        box.textContent = '';
+        const icon = tick('msg-time');
+        main.querySelector('.messages').append(el('div', {class: 'message-out'}, [body, icon]));
+        const response = await fetch('/api/send', {method: 'POST', body: JSON.stringify({phone: phone, text: body, account: 'browser'})});
+        const result = await response.json();
+        if (result.status === 'sent') icon.setAttribute('data-icon', 'msg-check');
+    });
+    app.append(main);
+}
+
+function invalidPopup() {
+    const ok = el('div', {'data-testid': 'popup-controls-ok', role: 'button'}, ['OK']);
+    ok.addEventListener('click', () => ok.parentNode.remove());
+    app.append(el('div', {role: 'dialog'}, ['Phone number shared via url is invalid.', ok]));
+}
+
+function render() {
+    if (CONFIG.state !== 'connected') {
+        if (CONFIG.state === 'banned') { app.append('This account is not allowed to use WhatsApp.'); return; }
+        app.append(el('div', {'data-ref': 'simulated'}, [el('canvas', {'aria-label': 'Scan me!'})]));
+        return;
+    }
+    const search = el('div', {contenteditable: 'true', role: 'textbox'});
+    const list = el('div', {id: 'pane-side'});
+    app.append(el('div', {id: 'side'}, [search, list]));
+    search.addEventListener('input', () => {
+        const query = search.innerText.replace(/\\D/g, '');
+        list.innerHTML = '';
+        CONFIG.chats.filter(p => query && p.includes(query)).forEach(p => {
+            const item = el('div', {role: 'listitem'}, [p]);
+            item.addEventListener('click', () => openChat(p, ''));
+            list.append(item);
+        });
+    });
+    search.addEventListener('keydown', (event) => {
+        if (event.key !== 'Enter') return;
+        event.preventDefault();
+        const first = list.querySelector('[role="listitem"]');
+        if (first) openChat(first.textContent, '');
+    });
+    // Click-to-chat links are routed in-page, as WhatsApp Web does for the links in messages
+    document.addEventListener('click', async (event) => {
+        const link = event.target.closest && event.target.closest('a[href]');
+        const match = link && link.href.match(/^(?:https:\/\/wa\.me\/|whatsapp:\/\/send\?phone=)(\d+)/);
+        if (!match) return;
+        event.preventDefault();
+        const response = await fetch('/api/chat', {method: 'POST', body: JSON.stringify({phone: match[1]})});
+        if ((await response.json()).valid) openChat(match[1], ''); else invalidPopup();
+    });
+    if (CONFIG.popup) {
+        invalidPopup();
+    } else if (CONFIG.phone) {
+        openChat(CONFIG.phone, CONFIG.text);
+    }
+}
+render();
+</script>
+</body></html>
+"""
+
+
+class FakeWhatsAppServer:
+    def __init__(self, host='127.0.0.1', port=0, invalid_rate=0.0, latency=0.0,
+                 logout_every=None, logout_for=1.0, deliver_after=0.5, read_after=2.0):
+        self.invalid_rate = invalid_rate      # share of numbers "not on WhatsApp"
+        self.latency = latency                # server-side time per send (chat open + typing)
+        self.logout_every = logout_every      # log an account out after this many messages...
+        self.logout_for = logout_for          # ...for this many seconds
+        self.deliver_after = deliver_after    # ticks: sent -> delivered -> read
+        self.read_after = read_after
+        self.messages = []                    # (account, phone, text, at)
+        self.received = Counter()             # phone -> messages received
+        self.sent_at = {}                     # phone -> time of the last message
+        self.invalid_hits = 0
+        self.forced_state = {}                # account -> state set through /admin/state
+        self.down_until = {}                  # account -> logged out until (monotonic)
+        self.per_account = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='whatsapp-sim', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def is_invalid(self, phone):
+        # Deterministic per number, so reruns see the same invalid contacts
+        return (zlib.crc32(phone.encode()) % 10000) < self.invalid_rate * 10000
+
+    def state(self, account):
+        with self._lock:
+            if account in self.forced_state:
+                return self.forced_state[account]
+            if time.monotonic() < self.down_until.get(account, 0):
+                return STATE_LOGGED_OUT
+        return STATE_CONNECTED
+
+    def set_state(self, account, state):
+        with self._lock:
+            if state in (None, STATE_CONNECTED):
+                self.forced_state.pop(account, None)
+                self.down_until.pop(account, None)
+            else:
+                self.forced_state[account] = state
+
+    def send(self, account, phone, text):
+        state = self.state(account)
+        if state != STATE_CONNECTED:
+            return state
+        if self.latency:
+            time.sleep(self.latency)
+        if self.is_invalid(phone):
+            with self._lock:
+                self.invalid_hits += 1
+            return 'invalid'
+        with self._lock:
+            self.messages.append((account, phone, text, time.time()))
+            self.received[phone] += 1
+            self.sent_at[phone] = time.monotonic()
+            self.per_account[account] += 1
+            if self.logout_every and self.per_account[account] % self.logout_every == 0:
+                self.down_until[account] = time.monotonic() + self.logout_for
+        return 'sent'
+
+    def tick(self, phone):
+        with self._lock:
+            at = self.sent_at.get(phone)
+        if at is None:
+            return None
+        age = time.monotonic() - at
+        return 'read' if age >= self.read_after else 'delivered' if age >= self.deliver_after else 'sent'
+
+    def stats(self):
+        with self._lock:
+            return {
+                'received': len(self.messages),
+                'unique': len(self.received),
+                'duplicates': sum(n - 1 for n in self.received.values() if n > 1),
+                'invalid': self.invalid_hits,
+                'per_account': dict(self.per_account),
+            }
+
+    def page(self, query):
+        phone = query.get('phone', [''])[0]
+        config = {
+            'state': self.state('browser'),
+            'chats': sorted(self.received),
+            'phone': phone,
+            'text': query.get('text', [''])[0],
+            'popup': bool(phone) and self.is_invalid(phone),
+        }
+        return PAGE.replace('__CONFIG__', json.dumps(config))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, body, content_type='application/json', status=200):
+                data = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client killed mid-request (crash tests)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                query = urllib.parse.parse_qs(parsed.query)
+                if parsed.path in ('/', '/send'):
+                    self._reply(server.page(query), 'text/html')
+                elif parsed.path == '/api/state':
+                    self._reply({'state': server.state(query.get('account', ['default'])[0])})
+                elif parsed.path == '/admin/stats':
+                    self._reply(server.stats())
+                else:
+                    self._reply({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                body = self._body()
+                if self.path == '/api/send':
+                    self._reply({'status': server.send(body.get('account', 'default'), str(body['phone']), body['text'])})
+                elif self.path == '/api/chat':
+                    self._reply({'valid': not server.is_invalid(str(body['phone']))})
+                elif self.path == '/api/status':
+                    self._reply({'status': server.tick(str(body['phone']))})
+                elif self.path == '/admin/state':
+                    server.set_state(body.get('account', 'default'), body.get('state'))
+                    self._reply({'ok': True})
+                else:
+                    self._reply({'error': 'not found'}, status=404)
+
+        return Handler
+
+
+def register_site(base_url, name='whatsapp-sim'):
+    """Site profile pointing the browser pool at a simulator (for WhatsAppBot(site=...))."""
+    SITES[name] = SiteProfile(name=name, home_url=f"{base_url}/", check_url=f"{base_url}/",
+                              ready_xpath='//*[@id="side"]', scraping=False)
+    return name
+
+
+class _SimClient:
+    """What `WhatsAppBot.driver` is for the real bot: the thing that talks to the page."""
+
+    def __init__(self, base_url, account, timeout=10):
+        self.base_url = base_url
+        self.account = account
+        self.timeout = timeout
+
+    def call(self, path, payload=None):
+        url = f"{self.base_url}{path}"
+        if payload is None:
+            request = urllib.request.Request(f"{url}?{urllib.parse.urlencode({'account': self.account})}")
+        else:
+            data = json.dumps({'account': self.account, **payload}).encode('utf-8')
+            request = urllib.request.Request(url, data=data, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def get(self, url):
+        # WhatsAppBot.ensure_connected reloads the page of a degraded session
+        self.call('/api/state')
+
+
+class SimulatedBot(WhatsAppBot):
+    """
+    WhatsAppBot without a browser: sends go to a FakeWhatsAppServer.
+
+    Session states, retries and reconnects come from WhatsAppBot, so the
+    simulator exercises the same code paths as a real campaign.
+    """
+
+    def __init__(self, account=None, base_url=None, pre_send_delay=(0, 0), pre_enter_delay=(0, 0),
+                 post_send_delay=(0, 0), reconnect_timeout=30, **kwargs):
+        super().__init__(account, pre_send_delay=pre_send_delay, pre_enter_delay=pre_enter_delay,
+                         post_send_delay=post_send_delay, reconnect_timeout=reconnect_timeout,
+                         base_url=base_url, site='whatsapp-sim', **kwargs)
+        self.reconnect_backoff = SIM_BACKOFF
+
+    def start(self):
+        logging.info(f"Starting simulated WhatsApp Bot (account: {self.account}, server: {self.base_url})...")
+        self.driver = _SimClient(self.base_url, self.account)
+        self.ensure_connected()
+
+    def stop(self):
+        if self.driver:
+            if self.stage_timings:
+                summary = ', '.join(f"{stage} {value * 1000:.1f} ms" for stage, value in self.latency_summary().items())
+                logging.info(f"[{self.account}] Median send latency over {len(self.stage_timings)} messages: {summary}")
+            self.driver = None
+
+    def probe_state(self):
+        try:
+            return self.driver.call('/api/state')['state']
+        except Exception as e:
+            logging.debug(f"Simulator probe failed: {e}")
+            return STATE_DEGRADED
+
+    def _send_simulated(self, phone, message, encoded=None):
+        started = time.perf_counter()
+        try:
+            status = self.driver.call('/api/send', {'phone': phone, 'text': message})['status']
+        except Exception as e:
+            return self._session_lost(f"{type(e).__name__} while sending to {phone}")
+        if status in (STATE_LOGGED_OUT, STATE_BANNED, STATE_DEGRADED):
+            return self._session_lost(f"chat with {phone} did not open")
+        self.stage_timings.append({'send': time.perf_counter() - started})
+        if status == 'invalid':
+            logging.warning(f"Invalid number detected for {phone}.")
+            self.last_failure = FAILURE_NOT_ON_WHATSAPP
+            return False
+        return True
+
+    _send_via_url = _send_simulated
+    _send_inpage = _send_simulated
+
+    def read_delivery_status(self, phone, timeout=10):
+        return self.driver.call('/api/status', {'phone': phone})['status']
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', default=8765)
+@click.option('--invalid-rate', default=0.02, help='Share of numbers treated as not on WhatsApp.')
+@click.option('--latency', default=0.0, help='Seconds the server takes per message.')
+@click.option('--logout-every', default=None, type=int, help='Log an account out after this many messages.')
+@click.option('--logout-for', default=2.0, help='Seconds an account stays logged out.')
+def main(host, port, invalid_rate, latency, logout_every, logout_for):
+    """Runs the WhatsApp Web simulator until Ctrl+C."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    server = FakeWhatsAppServer(host, port, invalid_rate=invalid_rate, latency=latency,
+                                logout_every=logout_every, logout_for=logout_for).start()
+    click.echo(f"WhatsApp simulator on {server.url} (stats: {server.url}/admin/stats)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo(f"\n{server.stats()}")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Campaign message templates.
+
+Templates are parsed once, their placeholders are checked against the CSV
+columns before anything is sent, and the messages of the whole contact list
+are rendered column-wise instead of with one `str.format` per row.
+
+Placeholder syntax:
+    {name}              value of the `name` column ('' when empty)
+    {name|cursista}     with a fallback for empty values
+    {{ and }}           literal braces
+Any other brace (e.g. a stray "{" in a pasted text) is kept as is.
+
+Variants come from messages.json, either plain strings or
+{"text": "...", "weight": 2} objects; each contact gets one variant, drawn
+in proportion to the weights.
+"""
+import re
+import json
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+PLACEHOLDER = re.compile(r'\{\{|\}\}|\{([A-Za-z_][\w .-]*?)(?:\|([^{}]*))?\}')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass
+class Template:
+    text: str
+    weight: float = 1.0
+    # Compiled form: literal chunks and (field, fallback) pairs, alternating
+    parts: List[object] = field(default_factory=list, repr=False)
+    # Same with the literal chunks and fallbacks already URL-encoded
+    encoded_parts: List[object] = field(default_factory=list, repr=False)
+
+    def __post_init__(self):
+        if self.weight < 0:
+            raise TemplateError(f"Negative weight in template: {self.text[:40]!r}")
+        self.parts = compile_template(self.text)
+        # Percent-encoding works character by character, so encoding the pieces
+        # and concatenating gives the same result as encoding the whole message
+        self.encoded_parts = [
+            (part[0], urllib.parse.quote(part[1])) if isinstance(part, tuple) else urllib.parse.quote(part)
+            for part in self.parts
+        ]
+
+    @property
+    def fields(self):
+        return [part[0] for part in self.parts if isinstance(part, tuple)]
+
+
+def compile_template(text) -> List[object]:
+    parts, literal, pos = [], [], 0
+    for match in PLACEHOLDER.finditer(text):
+        literal.append(text[pos:match.start()])
+        pos = match.end()
+        token = match.group(0)
+        if token in ('{{', '}}'):
+            literal.append(token[0])
+            continue
+        parts.append(''.join(literal))
+        literal = []
+        parts.append((match.group(1).strip(), match.group(2) or ''))
+    literal.append(text[pos:])
+    parts.append(''.join(literal))
+    return parts
+
+
+def load_templates(message=None, messages_json=None) -> List[Template]:
+    """Templates from a single message or from a messages.json list (strings or {text, weight})."""
+    if messages_json:
+        with open(messages_json, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        if not isinstance(items, list) or not items:
+            raise TemplateError("JSON file must contain a non-empty list of messages.")
+        templates = []
+        for item in items:
+            if isinstance(item, str):
+                templates.append(Template(item))
+            elif isinstance(item, dict) and isinstance(item.get('text'), str):
+                templates.append(Template(item['text'], float(item.get('weight', 1))))
+            else:
+                raise TemplateError(f"Invalid message entry: {item!r}")
+    elif message:
+        templates = [Template(message)]
+    else:
+        raise TemplateError("No message given.")
+    if not sum(t.weight for t in templates):
+        raise TemplateError("All message weights are zero.")
+    return templates
+
+
+class Campaign:
+    """
+    A set of message variants bound to the columns of a contact list.
+
+    Usage:
+        campaign = Campaign(load_templates(messages_json='messages.json'), aliases={'name': 'Nome'})
+        campaign.validate(df.columns)
+        rendered = campaign.render(df)   # DataFrame: variant, message, encoded
+    """
+
+    def __init__(self, templates: List[Template], aliases=None, seed=None):
+        self.templates = list(templates)
+        self.aliases = dict(aliases or {})
+        self.seed = seed
+
+    @property
+    def fields(self):
+        return sorted({f for t in self.templates for f in t.fields})
+
+    def resolve(self, columns) -> Tuple[dict, List[str]]:
+        """Maps each placeholder to a column: alias, exact name, then case-insensitive."""
+        columns = [str(c) for c in columns]
+        by_lower = {c.strip().lower(): c for c in columns}
+        mapping, missing = {}, []
+        for name in self.fields:
+            target = self.aliases.get(name, name)
+            if target in columns:
+                mapping[name] = target
+            elif target.strip().lower() in by_lower:
+                mapping[name] = by_lower[target.strip().lower()]
+            else:
+                missing.append(name)
+        return mapping, missing
+
+    def validate(self, columns):
+        """Raises TemplateError naming every placeholder with no matching column."""
+        mapping, missing = self.resolve(columns)
+        if missing:
+            raise TemplateError(
+                f"Placeholders without a column in the CSV: {', '.join('{' + m + '}' for m in missing)}. "
+                f"Available columns: {', '.join(map(str, columns))}"
+            )
+        return mapping
+
+    def assign_variants(self, n):
+        """Variant index per contact, drawn in proportion to the template weights."""
+        weights = np.array([t.weight for t in self.templates], dtype=float)
+        if len(weights) == 1:
+            return np.zeros(n, dtype=int)
+        rng = np.random.default_rng(self.seed)
+        return rng.choice(len(weights), size=n, p=weights / weights.sum())
+
+    def render(self, df: pd.DataFrame, encode=True) -> pd.DataFrame:
+        """Renders the message of every contact (and its URL-encoded form) in one pass per variant."""
+        mapping = self.validate(df.columns)
+        values, encoded_values = {}, {}
+        for name, column in mapping.items():
+            values[name] = df[column].astype('string').fillna('').str.strip().to_numpy(dtype=object)
+            if encode:
+                # Column values repeat a lot (municipality, group): quote each distinct value once
+                codes, uniques = pd.factorize(values[name])
+                quoted = np.array([urllib.parse.quote(value) for value in uniques], dtype=object)
+                encoded_values[name] = quoted[codes] if len(codes) else values[name]
+
+        variants = self.assign_variants(len(df))
+        messages = np.empty(len(df), dtype=object)
+        encoded = np.empty(len(df), dtype=object)
+        for index, template in enumerate(self.templates):
+            rows = np.flatnonzero(variants == index)
+            if not len(rows):
+                continue
+            messages[rows] = _concat(template.parts, values, rows)
+            if encode:
+                encoded[rows] = _concat(template.encoded_parts, encoded_values, rows)
+
+        result = pd.DataFrame({'variant': variants, 'message': messages}, index=df.index)
+        if encode:
+            result['encoded'] = encoded
+        return result
+
+
+def _concat(parts, values, rows):
+    """Joins literal chunks and column values for the given rows (object arrays, no per-row Python)."""
+    rendered = np.full(len(rows), '', dtype=object)
+    for part in parts:
+        if isinstance(part, tuple):
+            name, fallback = part
+            column = values[name][rows]
+            if fallback:
+                column = np.where(column == '', fallback, column)
+            rendered = rendered + column
+        elif part:
+            rendered = rendered + part
+    return rendered
@@ -0,0 +1,27 @@
+"""
+Configurações dos navegadores usados pelos scrapers (AVAMEC, Google Docs).
+"""
+import os
+
+# Bloqueio de recursos via CDP (Network.setBlockedURLs) nos perfis de raspagem.
+# Desative com BLOCK_RESOURCES=0 para depurar visualmente uma página.
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', '1') != '0'
+
+# Padrões no formato do CDP ('*' é curinga). Nenhum desses recursos é lido pelos scrapers.
+BLOCKED_URL_PATTERNS = [
+    # Imagens
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    # Fontes
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    # Vídeo e áudio
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg',
+    '*youtube.com/embed*', '*ytimg.com*',
+    # Analytics e rastreamento
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*clarity.ms*', '*hotjar.com*', '*facebook.net*', '*vlibras.gov.br*',
+    '*play.google.com/log*', '*csi.gstatic.com*',
+]
+
+# Padrões extras separados por vírgula (ex: BLOCKED_URLS_EXTRA="*.css,*banner*")
+BLOCKED_URLS_EXTRA = [p.strip() for p in os.getenv('BLOCKED_URLS_EXTRA', '').split(',') if p.strip()]
@@ -1,42 +1,27 @@
-import pandas as pd
 import glob
-import re
+import sys
 import os
 
-def normalize_phone(phone):
-    s = str(phone).strip()
-    # Remove non-digits
-    s = re.sub(r'\D', '', s)
-    # If starts with 55 (Brazil) and length > 11, strip it
-    if s.startswith('55') and len(s) > 11:
-        s = s[2:]
-    return s
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot_whatsapp'))
 
-# Define patterns
+from ledger import SendLedger
+
+# Define patterns (legacy reports not yet in the send ledger)
 files_patterns = [
     'bot_whatsapp/delivered_report_20251212_*.csv',
     'bot_whatsapp/delivered_report_20251214_*.csv',
     'bot_whatsapp/relatorio_hoje_2025-12-12.csv'
 ]
 
-sent_phones = set()
-processed_files = 0
+ledger = SendLedger()
 
-print("Reading log files...")
-for pattern in files_patterns:
-    for f in glob.glob(pattern):
-        try:
-            if os.path.getsize(f) == 0:
-                continue
-            df = pd.read_csv(f)
-            if 'phone' in df.columns:
-                phones = df['phone'].apply(normalize_phone).tolist()
-                sent_phones.update(phones)
-                processed_files += 1
-                print(f"Propcessed {f}, found {len(phones)} records.")
-        except Exception as e:
-            print(f"Error reading {f}: {e}")
+print("Importing log files into the send ledger...")
+files = [f for pattern in files_patterns for f in glob.glob(pattern)]
+imported = ledger.import_reports(files)
+print(f"Imported {imported} records from {len(files)} file(s).")
 
+sent_phones = ledger.sent_keys()
+ledger.close()
 print(f"\nTotal unique sent phones: {len(sent_phones)}")
 
 # Save to file
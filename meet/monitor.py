@@ -1,6 +1,8 @@
 """
 Módulo de monitoramento de participantes nas salas temáticas.
 """
+import os
+import sys
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -8,6 +10,11 @@ from datetime import datetime
 
 from config import NUM_GRUPOS, TURMAS
 
+# Raiz do projeto no path para reaproveitar src/utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.emails import normalize_emails
+
 
 @dataclass
 class ParticipanteStatus:
@@ -20,6 +27,7 @@ class ParticipanteStatus:
     presente: bool = False
     em_sala_errada: bool = False
     telefone: Optional[str] = None
+    chave: str = ''  # E-mail canônico (src/utils/emails.py), usado nas comparações
 
 
 @dataclass
@@ -47,7 +55,7 @@ class MonitorSalas:
         """
         self.dados_planilha = dados_planilha
         self.participantes_esperados = self._processar_dados_planilha()
-        self.participantes_reais: Dict[str, Dict] = {}  # {email: {grupo, turma, ...}}
+        self.participantes_reais: Dict[str, Dict] = {}  # {chave do email: {grupo, turma, ...}}
         self.status_salas: Dict[Tuple[str, int], StatusSala] = {}
     
     def _processar_dados_planilha(self) -> Dict[str, ParticipanteStatus]:
@@ -55,7 +63,7 @@ class MonitorSalas:
         Processa dados da planilha e cria dicionário de participantes esperados.
         
         Returns:
-            Dicionário {email: ParticipanteStatus}
+            Dicionário {chave do email: ParticipanteStatus}
         """
         participantes = {}
         
@@ -134,12 +142,14 @@ class MonitorSalas:
                 "Procure por colunas contendo: 'grupo'"
             )
         
+        # Normaliza todos os emails de uma vez (aliases do Gmail caem na mesma chave)
+        emails = normalize_emails(self.dados_planilha[email_col])
+        
         # Processa cada linha
-        for idx, row in self.dados_planilha.iterrows():
+        for (idx, row), email, chave in zip(self.dados_planilha.iterrows(), emails['email'], emails['key']):
             try:
-                # Extrai email
-                email = str(row[email_col]).strip().lower()
-                if '@' not in email or email == 'nan' or email == '':
+                # Ignora linhas sem email válido
+                if not chave:
                     continue
                 
                 # Extrai nome
@@ -191,12 +201,13 @@ class MonitorSalas:
                         telefone = None
                 
                 # Cria participante
-                participantes[email] = ParticipanteStatus(
+                participantes[chave] = ParticipanteStatus(
                     email=email,
                     nome=nome,
                     turma=turma,
                     grupo_esperado=grupo,
-                    telefone=telefone
+                    telefone=telefone,
+                    chave=chave
                 )
                 
             except Exception as e:
@@ -220,38 +231,27 @@ class MonitorSalas:
         
         # Se fornecido participantes por (turma, grupo), usa esse método
         if participantes_por_turma_grupo:
-            for (turma, grupo), participantes in participantes_por_turma_grupo.items():
-                for participante in participantes:
-                    email = participante.get('email', '').strip().lower()
-                    if '@' not in email:
-                        continue
-                    
-                    self.participantes_reais[email] = {
-                        'grupo': grupo,
-                        'turma': turma,
-                        'nome': participante.get('nome', email),
-                        'email': email
-                    }
+            entradas = [(turma, grupo, p) for (turma, grupo), participantes in participantes_por_turma_grupo.items()
+                        for p in participantes]
         else:
-            # Método legado - apenas grupo (sem turma)
-            # Tenta inferir turma dos participantes esperados se disponível
-            for grupo, participantes in participantes_por_grupo.items():
-                for participante in participantes:
-                    email = participante.get('email', '').strip().lower()
-                    if '@' not in email:
-                        continue
-                    
-                    # Tenta encontrar a turma do participante esperado
-                    turma = None
-                    if email in self.participantes_esperados:
-                        turma = self.participantes_esperados[email].turma
-                    
-                    self.participantes_reais[email] = {
-                        'grupo': grupo,
-                        'turma': turma,
-                        'nome': participante.get('nome', email),
-                        'email': email
-                    }
+            # Método legado - apenas grupo (sem turma); a turma vem dos participantes esperados
+            entradas = [(None, grupo, p) for grupo, participantes in participantes_por_grupo.items()
+                        for p in participantes]
+        
+        emails = normalize_emails([p.get('email', '') for _, _, p in entradas])
+        for (turma, grupo, participante), email, chave in zip(entradas, emails['email'], emails['key']):
+            if not chave:
+                continue
+            
+            if not participantes_por_turma_grupo and chave in self.participantes_esperados:
+                turma = self.participantes_esperados[chave].turma
+            
+            self.participantes_reais[chave] = {
+                'grupo': grupo,
+                'turma': turma,
+                'nome': participante.get('nome', email),
+                'email': email
+            }
     
     def calcular_status(self, turma: Optional[str] = None) -> Dict[Tuple[str, int], StatusSala]:
         """
@@ -267,7 +267,7 @@ class MonitorSalas:
         
         # Filtra participantes por turma se especificado
         participantes_filtrados = {
-            email: p for email, p in self.participantes_esperados.items()
+            chave: p for chave, p in self.participantes_esperados.items()
             if turma is None or p.turma == turma
         }
         
@@ -287,8 +287,8 @@ class MonitorSalas:
             
             # Verifica quais participantes esperados estão presentes
             for participante in participantes_esperados_sala:
-                if participante.email in self.participantes_reais:
-                    participante_real = self.participantes_reais[participante.email]
+                if participante.chave in self.participantes_reais:
+                    participante_real = self.participantes_reais[participante.chave]
                     grupo_real = participante_real['grupo']
                     turma_real = participante_real.get('turma')
                     
@@ -309,14 +309,15 @@ class MonitorSalas:
             
             # Verifica participantes que estão na sala mas não deveriam estar
             # (participantes não esperados ou de outra turma)
-            for email, participante_real in self.participantes_reais.items():
+            for chave, participante_real in self.participantes_reais.items():
                 grupo_real = participante_real['grupo']
                 turma_real = participante_real.get('turma')
+                email = participante_real['email']
                 
                 # Verifica se está no grupo E turma corretos
                 if grupo_real == grupo:
                     # Verifica se este participante deveria estar aqui
-                    if email not in participantes_filtrados:
+                    if chave not in participantes_filtrados:
                         # Participante não esperado nesta sala
                         participante_errado = ParticipanteStatus(
                             email=email,
@@ -325,12 +326,13 @@ class MonitorSalas:
                             grupo_esperado=-1,  # Não esperado
                             grupo_atual=grupo_real,
                             presente=True,
-                            em_sala_errada=True
+                            em_sala_errada=True,
+                            chave=chave
                         )
                         errados.append(participante_errado)
                     else:
                         # Verifica se está na turma correta
-                        participante_esperado = participantes_filtrados[email]
+                        participante_esperado = participantes_filtrados[chave]
                         if participante_esperado.turma != turma_sala:
                             # Participante está na sala correta do grupo, mas da turma errada
                             # Marca como erro - cada turma tem seus próprios grupos
@@ -0,0 +1,77 @@
+"""
+Benchmark da preparação de mensagens de uma campanha do bot_whatsapp: a
+personalização linha a linha usada antes (random.choice + str.format +
+urllib.parse.quote a cada envio) contra bot_whatsapp/templates.py, que
+compila os modelos uma vez e renderiza/codifica a lista inteira por coluna.
+
+Uso:
+    python scripts/bench_campaign_templates.py
+    python scripts/bench_campaign_templates.py --contacts 50000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import urllib.parse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot_whatsapp'))
+
+from templates import Campaign, load_templates
+
+MESSAGES_JSON = os.path.join(os.path.dirname(__file__), '..', 'bot_whatsapp', 'messages.json')
+MUNICIPIOS = ['Fortaleza', 'Sobral', 'Juazeiro do Norte', 'Crato', 'Iguatu', 'Quixadá']
+
+
+def make_contacts(n, seed=42):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'phone': [f"55859{rng.randint(10000000, 99999999)}" for _ in range(n)],
+        'name': [f"Cursista {i}" if rng.random() > 0.05 else None for i in range(n)],
+        'municipio': [rng.choice(MUNICIPIOS) for _ in range(n)],
+    })
+
+
+def legacy_prepare(df, messages):
+    """Lógica antiga do main.py: uma escolha, um format e um quote por contato."""
+    prepared = []
+    for _, row in df.iterrows():
+        text = random.choice(messages)
+        if pd.notna(row['name']):
+            text = text.format(name=row['name'])
+        prepared.append(urllib.parse.quote(text))
+    return prepared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da preparação de mensagens")
+    parser.add_argument('--contacts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_contacts(args.contacts)
+    templates = load_templates(messages_json=MESSAGES_JSON)
+    messages = [t.text for t in templates]
+
+    started = time.perf_counter()
+    legacy_prepare(df, messages)
+    legacy_time = time.perf_counter() - started
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        campaign = Campaign(load_templates(messages_json=MESSAGES_JSON), seed=1)
+        rendered = campaign.render(df)
+        best = min(best, time.perf_counter() - started)
+
+    print(f"Contatos: {len(df)}, variantes: {len(templates)}")
+    print(f"Linha a linha (antigo):  {legacy_time * 1000:8.1f} ms")
+    print(f"templates.Campaign:      {best * 1000:8.1f} ms  ({legacy_time / best:.0f}x)")
+    print("\nVariantes sorteadas:")
+    print(rendered['variant'].value_counts().sort_index().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark do cruzamento de nomes planilha x AVAMEC: o laço antigo do
+check_names_discrepancy.py (SequenceMatcher de cada nome sem par contra todos
+os do outro lado, e o laço inteiro repetido para listar os órfãos) contra
+src/utils/names.match_names (índice de trigramas + atribuição um para um).
+
+Os nomes são sintéticos: a lista do AVAMEC é a da planilha com acentos
+trocados, erros de digitação, sobrenomes omitidos, alguns alunos a menos e
+outros a mais.
+
+Uso:
+    python scripts/bench_name_matching.py
+    python scripts/bench_name_matching.py --names 5000 --skip-legacy
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.names import normalize_name, match_names, DEFAULT_THRESHOLD
+
+FIRST = ['Maria', 'José', 'Ana', 'Francisco', 'Antônia', 'João', 'Francisca', 'Raimundo', 'Luciana',
+         'Paulo', 'Andressa', 'Ilma', 'Cícero', 'Débora', 'Marcos', 'Luzia', 'Fábio', 'Sônia', 'Érica', 'Tiago']
+MIDDLE = ['Aparecida', 'Célia', 'Núbia', 'Mariele', 'Helena', 'Augusto', 'Luiz', 'Vitória', 'Conceição', 'Lúcia']
+LAST = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Pereira', 'Lima', 'Carvalho', 'Ribeiro', 'Nonato', 'Evangelista',
+        'Guedes', 'Rodrigues', 'Almeida', 'Nascimento', 'Araújo', 'Bezerra', 'Cavalcante', 'Holanda', 'Gomes', 'Sampaio']
+
+
+def make_names(n, seed=42):
+    rng = random.Random(seed)
+    sheet = set()
+    while len(sheet) < n:
+        parts = [rng.choice(FIRST)] + rng.sample(MIDDLE, rng.randint(0, 2)) + rng.sample(LAST, rng.randint(1, 3))
+        if len(parts) > 2 and rng.random() < 0.3:
+            parts.insert(-1, rng.choice(['de', 'da', 'dos']))
+        sheet.add(' '.join(parts))
+    sheet = sorted(sheet)
+    rng.shuffle(sheet)
+
+    avamec, truth = [], {}
+    for original in sheet:
+        name = original
+        roll = rng.random()
+        if roll < 0.05:
+            continue  # só na planilha
+        if roll < 0.15:
+            chars = list(name)
+            i = rng.randrange(len(chars))
+            chars[i] = rng.choice('aeiournst')  # erro de digitação
+            name = ''.join(chars)
+        elif roll < 0.20:
+            words = name.split()
+            if len(words) > 2:
+                words.pop(rng.randrange(1, len(words) - 1))  # sobrenome omitido
+            name = ' '.join(words)
+        elif roll < 0.35:
+            name = normalize_name(name).title()  # sem acentos
+        avamec.append(name)
+        truth[normalize_name(original)] = normalize_name(name)
+    avamec += [f"{rng.choice(FIRST)} {rng.choice(LAST)} Extra{i}" for i in range(n // 50)]  # só no AVAMEC
+    rng.shuffle(avamec)
+    return sheet, avamec, truth
+
+
+def accuracy(pairs, truth):
+    """(corretos, errados) entre os pares aproximados {planilha: avamec}."""
+    right = sum(truth.get(s) == a for s, a in pairs.items())
+    return right, len(pairs) - right
+
+
+def legacy_match(sheet, avamec):
+    """Lógica antiga: exatos por conjunto, depois dois laços n x m com SequenceMatcher."""
+    sheet_norms = {normalize_name(n) for n in sheet}
+    avamec_norms = {normalize_name(n) for n in avamec}
+    exact = sheet_norms & avamec_norms
+    missing_in_avamec = sorted(sheet_norms - exact)
+    missing_in_sheet = avamec_norms - exact
+    matches = {}
+    for sheet_n in missing_in_avamec:
+        best, best_score = None, 0
+        for avamec_n in missing_in_sheet:
+            score = SequenceMatcher(None, sheet_n, avamec_n).ratio()
+            if score > best_score:
+                best, best_score = avamec_n, score
+        if best_score > DEFAULT_THRESHOLD:
+            matches[sheet_n] = best
+    orphans = 0
+    for sheet_n in missing_in_avamec:
+        best_score = max((SequenceMatcher(None, sheet_n, a).ratio() for a in missing_in_sheet), default=0)
+        orphans += best_score <= DEFAULT_THRESHOLD
+    return matches, orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cruzamento de nomes")
+    parser.add_argument('--names', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true', help="Não roda o laço antigo (lento para listas grandes)")
+    args = parser.parse_args()
+
+    sheet, avamec, truth = make_names(args.names)
+    print(f"Planilha: {len(sheet)} nomes, AVAMEC: {len(avamec)} nomes")
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = match_names(sheet, avamec)
+        best = min(best, time.perf_counter() - started)
+    fuzzy = result.pairs[result.pairs['score'] < 1.0]
+    found = {normalize_name(sheet[l]): normalize_name(avamec[r]) for l, r in zip(fuzzy['left'], fuzzy['right'])}
+    expected = sum(s != a for s, a in truth.items())
+    print(f"Pares com grafia diferente: {expected}")
+    print(f"names.match_names:   {best * 1000:9.1f} ms  (pares corretos/errados: %d/%d)" % accuracy(found, truth))
+
+    if args.skip_legacy:
+        return
+    started = time.perf_counter()
+    legacy, _ = legacy_match(sheet, avamec)
+    legacy_time = time.perf_counter() - started
+    print(f"Laço antigo:         {legacy_time * 1000:9.1f} ms  (pares corretos/errados: %d/%d)  "
+          % accuracy(legacy, truth) + f"{legacy_time / best:.0f}x mais lento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark da normalização de telefones: a correção linha a linha que rodava
+dentro do loop de envio (bot_whatsapp/main.py, via iterrows) contra a versão
+vetorizada de src/utils/phones.py, que também valida e gera a chave E.164.
+
+O Series.apply da lógica antiga entra como referência do custo puro em Python.
+
+Gera uma lista sintética de contatos com formatos variados
+("(85) 9999-8888", "+55 85 99999-8888", "8599998888.0", números inválidos...).
+
+Uso:
+    python scripts/bench_phone_normalization.py
+    python scripts/bench_phone_normalization.py --contacts 200000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.phones import normalize_phones, VALID_DDDS
+
+FORMATS = [
+    '({ddd}) 9{a}-{b}',
+    '{ddd} 9{a} {b}',
+    '+55 ({ddd}) 9{a}-{b}',
+    '55{ddd}9{a}{b}',
+    '{ddd}{a}{b}',          # celular sem o 9
+    '55{ddd}{a}{b}',        # celular sem o 9, com DDI
+    '{ddd}9{a}{b}.0',       # lido como float
+    '({ddd}) 3{c}-{b}',     # fixo
+    '9{a}-{b}',             # sem DDD (inválido)
+    '',
+]
+
+
+def legacy_fix_phone(phone):
+    """Lógica por linha usada antes no loop de envio (sem validação)."""
+    phone = re.sub(r'\D', '', str(phone))
+    if len(phone) == 10:
+        phone = f"55{phone[:2]}9{phone[2:]}"
+    elif len(phone) == 11:
+        phone = f"55{phone[2:4]}9{phone[4:]}" if phone.startswith('55') else f"55{phone}"
+    elif len(phone) == 12 and phone.startswith('55'):
+        phone = f"55{phone[2:4]}9{phone[4:]}"
+    return phone
+
+
+def make_contacts(n, seed=42):
+    rng = random.Random(seed)
+    ddds = sorted(VALID_DDDS)
+    phones = []
+    for _ in range(n):
+        fmt = rng.choice(FORMATS)
+        phones.append(fmt.format(
+            ddd=rng.choice(ddds),
+            a=f"{rng.randint(6000, 9999)}",
+            b=f"{rng.randint(0, 9999):04d}",
+            c=f"{rng.randint(100, 999)}",
+        ))
+    return pd.DataFrame({'phone': phones, 'name': [f"Cursista {i}" for i in range(n)]})
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da normalização de telefones")
+    parser.add_argument('--contacts', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_contacts(args.contacts)
+    loop_time, _ = timed(lambda: [legacy_fix_phone(row['phone']) for _, row in df.iterrows()], 1)
+    apply_time, _ = timed(lambda: df['phone'].apply(legacy_fix_phone), args.repeat)
+    vector_time, result = timed(lambda: normalize_phones(df['phone']), args.repeat)
+
+    print(f"Contatos: {len(df)}")
+    print(f"iterrows (loop de envio antigo): {loop_time * 1000:8.1f} ms")
+    print(f"Series.apply (lógica antiga):    {apply_time * 1000:8.1f} ms")
+    print(f"Vetorizado (phones.py):          {vector_time * 1000:8.1f} ms  "
+          f"({loop_time / vector_time:.0f}x mais rápido que o loop)")
+    print("\nStatus:")
+    print(result['status'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
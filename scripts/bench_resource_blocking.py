@@ -0,0 +1,107 @@
+"""
+Compara o tempo de carregamento das páginas raspadas com e sem o bloqueio
+de recursos (imagens, fontes, mídia e analytics) do perfil de raspagem.
+
+"sem bloqueio" usa um Chrome comum (scraping=False: sem as flags, a
+preferência de imagens nem a lista do CDP) e "com bloqueio" o perfil de
+raspagem completo. Cada página é aberta N vezes em cada modo, com o cache do
+navegador desativado, e o script mede o tempo até o DOMContentLoaded / load
+(Navigation Timing), o número de requisições e os bytes transferidos.
+
+Uso:
+    python scripts/bench_resource_blocking.py
+    python scripts/bench_resource_blocking.py --runs 5 --url https://avamecinterativo.mec.gov.br/
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.browser import new_chrome_driver, get_site
+
+NAVIGATION_TIMING_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    dom_ready: nav ? nav.domContentLoadedEventEnd : null,
+    load: nav ? nav.loadEventEnd : null,
+    requests: resources.length + 1,
+    bytes: resources.reduce((total, r) => total + (r.transferSize || 0), nav ? nav.transferSize : 0)
+};
+"""
+
+
+def default_urls():
+    urls = [get_site('avamec').home_url]
+    links_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'links_notas.txt')
+    if os.path.exists(links_file):
+        with open(links_file, 'r') as f:
+            first_link = next((line.strip() for line in f if line.strip()), None)
+        if first_link:
+            urls.append(first_link)
+    return urls
+
+
+def measure(driver, url, timeout=60):
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': True})
+    started = time.perf_counter()
+    driver.get(url)
+    wall = time.perf_counter() - started
+
+    # Com page_load_strategy 'eager' o get() volta no DOMContentLoaded; espera o load
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if driver.execute_script("return document.readyState") == 'complete':
+            break
+        time.sleep(0.1)
+    timing = driver.execute_script(NAVIGATION_TIMING_JS)
+    timing['wall'] = wall * 1000
+    return timing
+
+
+def run_mode(urls, runs, scraping, headless):
+    driver = new_chrome_driver(headless=headless, scraping=scraping, blocked_urls=None if scraping else [])
+    results = {url: [] for url in urls}
+    try:
+        for _ in range(runs):
+            for url in urls:
+                results[url].append(measure(driver, url))
+    finally:
+        driver.quit()
+    return results
+
+
+def summarize(samples, key):
+    values = [s[key] for s in samples if s.get(key) is not None]
+    return statistics.median(values) if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do bloqueio de recursos via CDP")
+    parser.add_argument('--runs', type=int, default=3, help='Carregamentos por página em cada modo')
+    parser.add_argument('--url', action='append', help='Página a medir (pode repetir)')
+    parser.add_argument('--show', action='store_true', help='Abre o navegador visível')
+    args = parser.parse_args()
+
+    urls = args.url or default_urls()
+    modes = {
+        'sem bloqueio': run_mode(urls, args.runs, False, not args.show),
+        'com bloqueio': run_mode(urls, args.runs, True, not args.show),
+    }
+
+    print(f"\nMediana de {args.runs} carregamento(s), cache desativado\n")
+    print(f"{'Página':<50} {'Modo':<14} {'DOM (ms)':>9} {'Load (ms)':>10} {'Reqs':>6} {'KB':>8}")
+    for url in urls:
+        for mode, results in modes.items():
+            samples = results[url]
+            print(f"{url[:50]:<50} {mode:<14} "
+                  f"{summarize(samples, 'dom_ready'):>9.0f} {summarize(samples, 'load'):>10.0f} "
+                  f"{summarize(samples, 'requests'):>6.0f} {summarize(samples, 'bytes') / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark / teste de regressão do pipeline de envio do bot_whatsapp, sem
+enviar mensagem a ninguém: roda bot_whatsapp/main.py com --simulate contra o
+simulador do WhatsApp Web (bot_whatsapp/simulator.py).
+
+Cenários:
+  1. campanha completa (normalização, dedupe, templates, envio com várias
+     contas, ledger): tempo de cada etapa e mensagens/s;
+  2. retomada: a mesma campanha de novo não pode reenviar nada;
+  3. queda: o main.py roda em outro processo, é morto com SIGKILL no meio
+     da campanha e executado de novo; conta quantos contatos receberam a
+     mensagem duas vezes (no máximo as mensagens em voo no momento da queda:
+     por conta, uma sendo enviada, uma esperando vaga na fila de resultados e
+     uma na fila; mais a que o processo principal estava gravando).
+
+Uso:
+    python scripts/bench_whatsapp_pipeline.py
+    python scripts/bench_whatsapp_pipeline.py --contacts 20000 --accounts 4 --min-rate 500
+"""
+import os
+import sys
+import time
+import json
+import random
+import signal
+import logging
+import argparse
+import tempfile
+import subprocess
+
+import pandas as pd
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot_whatsapp')
+sys.path.insert(0, BOT_DIR)
+
+import main as bot_main
+from simulator import FakeWhatsAppServer
+
+MESSAGES_JSON = os.path.join(BOT_DIR, 'messages.json')
+
+
+def make_contacts(path, n, seed=42):
+    rng = random.Random(seed)
+    phones = [f"({rng.choice([85, 88, 11, 21])}) 9{rng.randint(6000, 9999)}-{rng.randint(0, 9999):04d}" for _ in range(n)]
+    # Repetidos e lixo, como nas planilhas reais
+    for i in rng.sample(range(n), n // 20):
+        phones[i] = phones[rng.randrange(n)]
+    for i in rng.sample(range(n), n // 100):
+        phones[i] = '123'
+    pd.DataFrame({
+        'phone': phones,
+        'name': [f"Cursista {i}" for i in range(n)],
+        'municipio': [rng.choice(['Fortaleza', 'Sobral', 'Crato']) for _ in range(n)],
+    }).to_csv(path, index=False)
+
+
+def run_main(args, standalone=False):
+    return bot_main.main.main(args, standalone_mode=standalone)
+
+
+def campaign_args(csv, ledger, server, accounts):
+    return ['--csv', csv, '--messages-json', MESSAGES_JSON, '--ledger', ledger, '--campaign', 'bench',
+            '--accounts', ','.join(f"sim{i}" for i in range(accounts)), '--simulate', '--sim-url', server.url]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de envio (simulado)")
+    parser.add_argument('--contacts', type=int, default=5000)
+    parser.add_argument('--accounts', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help="Tempo do simulador por mensagem (s)")
+    parser.add_argument('--logout-every', type=int, default=None, help="Desloga cada conta a cada N mensagens")
+    parser.add_argument('--min-rate', type=float, default=0.0, help="Falha se o envio ficar abaixo de N mensagens/s")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Campanha completa
+        server = FakeWhatsAppServer(invalid_rate=0.02, latency=args.latency, logout_every=args.logout_every,
+                                    logout_for=0.2).start()
+        csv, ledger = os.path.join(tmp, 'contatos.csv'), os.path.join(tmp, 'ledger.db')
+        make_contacts(csv, args.contacts)
+        started = time.perf_counter()
+        stats = run_main(campaign_args(csv, ledger, server, args.accounts))
+        total = time.perf_counter() - started
+        sim = server.stats()
+        rate = stats['sent'] / stats['stages']['send'] if stats['stages']['send'] else 0.0
+
+        print(f"\n== Campanha: {args.contacts} contatos, {args.accounts} conta(s) ==")
+        for stage, seconds in stats['stages'].items():
+            print(f"  {stage:<10} {seconds * 1000:9.1f} ms")
+        print(f"  total      {total * 1000:9.1f} ms")
+        print(f"  enviadas {stats['sent']}, falhas {stats['failed']}, pendentes {stats['pending']}: {rate:.0f} mensagens/s")
+        print(f"  simulador: {json.dumps(sim)}")
+        if stats['session_events']:
+            print(f"  sessões: {stats['session_events']}")
+        if sim['duplicates']:
+            failures.append(f"{sim['duplicates']} mensagens duplicadas na campanha")
+        if args.min_rate and rate < args.min_rate:
+            failures.append(f"taxa de envio {rate:.0f}/s abaixo de {args.min_rate:.0f}/s")
+
+        # 2. Retomada: nada a reenviar
+        before = server.stats()['received']
+        run_main(campaign_args(csv, ledger, server, args.accounts))
+        resent = server.stats()['received'] - before
+        print(f"\n== Retomada: {resent} mensagens reenviadas ==")
+        if resent:
+            failures.append(f"{resent} mensagens reenviadas na retomada")
+        server.stop()
+
+        # 3. Queda no meio da campanha (SIGKILL) e nova execução
+        server = FakeWhatsAppServer(invalid_rate=0.02, latency=max(args.latency, 0.002)).start()
+        csv, ledger = os.path.join(tmp, 'queda.csv'), os.path.join(tmp, 'queda.db')
+        make_contacts(csv, args.contacts, seed=7)
+        process = subprocess.Popen([sys.executable, os.path.join(BOT_DIR, 'main.py'),
+                                    *campaign_args(csv, ledger, server, args.accounts)],
+                                   cwd=BOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        target = args.contacts // 3
+        deadline = time.monotonic() + 120
+        while server.stats()['received'] < target and process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        killed_at = server.stats()['received']
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+        run_main(campaign_args(csv, ledger, server, args.accounts))
+        sim = server.stats()
+        print(f"\n== Queda: processo morto após {killed_at} mensagens ==")
+        print(f"  depois da nova execução: {sim['unique']} contatos, {sim['duplicates']} receberam duas vezes")
+        in_flight = 3 * args.accounts + 1
+        if sim['duplicates'] > in_flight:
+            failures.append(f"{sim['duplicates']} duplicadas após a queda (mais que as {in_flight} em voo)")
+        server.stop()
+
+    if failures:
+        print("\nFALHOU: " + '; '.join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,12 @@ import pandas as pd
 import json
 import os
 import re
-import unicodedata
-from difflib import SequenceMatcher
+import sys
 
-def normalize_name(name):
-    if not isinstance(name, str):
-        return ""
-    # Normalize unicode characters to ascii (remove accents)
-    nfkd_form = unicodedata.normalize('NFKD', name)
-    name = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-    # Remove extra spaces and uppercasing
-    return re.sub(r'\s+', ' ', name.strip().upper())
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-def is_ignored(name):
-    """Check if name indicates cancellation or transfer."""
-    ignored_keywords = ['CANCELADA', 'CANCELADO', 'TRANSFERIDO', 'TRANSFERIDA', 'DESISTENTE', 'DESISTIU']
-    name_upper = name.upper()
-    for keyword in ignored_keywords:
-        if keyword in name_upper:
-            return True
-    return False
+from src.utils.names import normalize_name, is_ignored, match_names, DEFAULT_THRESHOLD
 
-def get_similarity(a, b):
-    return SequenceMatcher(None, a, b).ratio()
 
 def main():
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -79,25 +62,14 @@ def main():
             norm = normalize_name(raw_name)
             avamec_data[norm] = {'name': raw_name, 'group': group_name, 'source': 'Avamec'}
 
-    # 2. Compare
-    sheet_norms = set(sheet_data.keys())
-    avamec_norms = set(avamec_data.keys())
-    
-    exact_matches = sheet_norms.intersection(avamec_norms)
-    
-    missing_in_avamec = sheet_norms - exact_matches
-    missing_in_sheet = avamec_norms - exact_matches
-    
-    # 3. Fuzzy Matching Analysis to find "Orthographic Differences"
-    # We look for pairs between (missing_in_avamec) and (missing_in_sheet) that are similar
-    
-    matches = []
-    
-    # Threshold for "probable typo"
-    THRESHOLD = 0.68
-    
-    processed_avamec = set()
-    
+    # 2. Compare: exact matches, then an indexed fuzzy pass over the rest,
+    # one-to-one. "Orthographic differences" are the fuzzy pairs; whatever is
+    # left unpaired on either side is an orphan.
+    sheet_norms = sorted(sheet_data)
+    avamec_norms = sorted(avamec_data)
+    result = match_names(sheet_norms, avamec_norms, threshold=DEFAULT_THRESHOLD)
+    fuzzy = result.pairs[result.pairs['score'] < 1.0].sort_values('left')
+
     with open(output_path, 'w', encoding='utf-8') as Report:
         Report.write("--- Relatório de Divergências Ortográficas (Turma B) ---\n")
         Report.write("Foco: Erros de digitação e diferenças de escrita.\n")
@@ -107,38 +79,17 @@ def main():
         Report.write("PROVÁVEIS ERROS DE DIGITAÇÃO (Alta Similaridade)\n")
         Report.write("================================================================================\n")
         
-        found_matches = False
-        
-        # Sort for consistent output
-        sorted_sheet_missing = sorted(list(missing_in_avamec))
-        
-        for sheet_n in sorted_sheet_missing:
-            best_match = None
-            best_score = 0
-            
-            for avamec_n in missing_in_sheet:
-                score = get_similarity(sheet_n, avamec_n)
-                if score > best_score:
-                    best_score = score
-                    best_match = avamec_n
-            
-            if best_score > THRESHOLD:
-                found_matches = True
-                s_info = sheet_data[sheet_n]
-                a_info = avamec_data[best_match]
-                
-                Report.write(f"PLANILHA: {s_info['name']:<40} | Grupo: {s_info['group']}\n")
-                Report.write(f"AVAMEC:   {a_info['name']:<40} | Grupo: {a_info['group']}\n")
-                Report.write(f"Diferença: {100*(1-best_score):.1f}% | (Similaridade: {best_score:.3f})\n")
-                Report.write("-" * 80 + "\n")
-                
-                processed_avamec.add(best_match)
-            else:
-                # No good match found
-                pass
+        for sheet_pos, avamec_pos, score in fuzzy.itertuples(index=False):
+            s_info = sheet_data[sheet_norms[sheet_pos]]
+            a_info = avamec_data[avamec_norms[avamec_pos]]
+
+            Report.write(f"PLANILHA: {s_info['name']:<40} | Grupo: {s_info['group']}\n")
+            Report.write(f"AVAMEC:   {a_info['name']:<40} | Grupo: {a_info['group']}\n")
+            Report.write(f"Diferença: {100*(1-score):.1f}% | (Similaridade: {score:.3f})\n")
+            Report.write("-" * 80 + "\n")
 
-        if not found_matches:
-            Report.write("Nenhuma correspondência ortográfica óbvia encontrada acima de 60% de similaridade.\n")
+        if fuzzy.empty:
+            Report.write(f"Nenhuma correspondência ortográfica óbvia encontrada acima de {DEFAULT_THRESHOLD:.0%} de similaridade.\n")
 
         Report.write("\n\n")
         Report.write("================================================================================\n")
@@ -146,32 +97,16 @@ def main():
         Report.write("================================================================================\n")
         
         Report.write("\n>>> Na Planilha (Ativos) sem par no Avamec:\n")
-        cnt = 0
-        for sheet_n in sorted_sheet_missing:
-            # Check if we already printed this as a fuzzy match? 
-            # Ideally we only print orphans here. 
-            # Re-running the best match check is inefficient but safe for this scale.
-            
-            best_score = 0
-            for avamec_n in missing_in_sheet:
-                score = get_similarity(sheet_n, avamec_n)
-                if score > best_score:
-                    best_score = score
-            
-            if best_score <= THRESHOLD:
-                s_info = sheet_data[sheet_n]
-                Report.write(f" - {s_info['name']} ({s_info['group']})\n")
-                cnt += 1
-        if cnt == 0: Report.write(" (Nenhum)\n")
+        for sheet_pos in result.left_orphans:
+            s_info = sheet_data[sheet_norms[sheet_pos]]
+            Report.write(f" - {s_info['name']} ({s_info['group']})\n")
+        if not result.left_orphans: Report.write(" (Nenhum)\n")
 
         Report.write("\n>>> No Avamec sem par na Planilha:\n")
-        cnt = 0
-        for avamec_n in sorted(list(missing_in_sheet)):
-            if avamec_n not in processed_avamec:
-                a_info = avamec_data[avamec_n]
-                Report.write(f" - {a_info['name']} ({a_info['group']})\n")
-                cnt += 1
-        if cnt == 0: Report.write(" (Nenhum)\n")
+        for avamec_pos in result.right_orphans:
+            a_info = avamec_data[avamec_norms[avamec_pos]]
+            Report.write(f" - {a_info['name']} ({a_info['group']})\n")
+        if not result.right_orphans: Report.write(" (Nenhum)\n")
         
     print(f"Relatório gerado em: {output_path}")
 
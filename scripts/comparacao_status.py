@@ -4,11 +4,18 @@ Cria tabela comparativa:
 - Nome do Cursista
 - Status Final (Planilhas Google Sheets)
 - Situação Parcial (Avamec)
+
+A comparação em si fica em src/core/comparison.py (a mesma do dashboard).
 """
 
-import pandas as pd
-import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from src.core.comparison import compare, load_avamec, avamec_file, summary, divergences, report_table
 
 def create_comparison_table():
     base_dir = os.getcwd()
@@ -17,9 +24,7 @@ def create_comparison_table():
     grades_file = os.path.join(base_dir, 'data/grades_consolidados.csv')
     
     # Tentar arquivo completo primeiro, depois o parcial
-    avamec_file = os.path.join(base_dir, 'data/avamec_completo.json')
-    if not os.path.exists(avamec_file):
-        avamec_file = os.path.join(base_dir, 'data/avamec_status_situacao.json')
+    avamec_path = avamec_file(os.path.join(base_dir, 'data'))
     
     
     print("=" * 100)
@@ -37,78 +42,21 @@ def create_comparison_table():
     # Dados já vêm filtrados (sem cancelados/desistentes) da consolidação
     
     # Carregar dados do Avamec
-    avamec_data = {}
-    if os.path.exists(avamec_file):
-        with open(avamec_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            for aluno in data.get('alunos', []):
-                nome_key = aluno['nome'].strip().upper()
-                avamec_data[nome_key] = aluno['situacao_parcial']
-    else:
-        print(f"⚠️ Dados do Avamec não encontrados: {avamec_file}")
+    if not avamec_path:
+        print(f"⚠️ Dados do Avamec não encontrados: {os.path.join(base_dir, 'data/avamec_status_situacao.json')}")
         print("Execute: python3 scripts/scrape_avamec_status.py")
         print()
     
-    # Colunas
-    name_col = df_grades.columns[1]  # Segunda coluna = nome
-    status_col = 'Extra_Col_61'  # Coluna BJ = Status Final
-    
-    # Encontrar coluna de grupo
-    group_col = None
-    for col in df_grades.columns:
-        if df_grades[col].astype(str).str.contains('Turma [AB]', regex=True, na=False).any():
-            group_col = col
-            break
-    
-    # Criar tabela comparativa
-    comparacao = []
-    
-    for _, row in df_grades.iterrows():
-        nome = str(row[name_col]).strip()
-        nome_upper = nome.upper()
-        status_final = str(row[status_col]).strip() if status_col in df_grades.columns else 'N/A'
-        grupo = str(row[group_col]) if group_col else 'N/A'
-        
-        # Buscar no Avamec
-        situacao_avamec = avamec_data.get(nome_upper, '—')
-        
-        # Determinar status da nota
-        if situacao_avamec == '—':
-            status_nota = '⏳ Aguardando lançamento'
-        else:
-            try:
-                nota = float(situacao_avamec)
-                if nota == 0:
-                    status_nota = '⚠️ Zero lançado'
-                else:
-                    status_nota = '✅ Lançada'
-            except (ValueError, TypeError):
-                status_nota = '❓ Verificar'
-        
-        comparacao.append({
-            'Nome': nome,
-            'Grupo': grupo,
-            'Status Final (Planilhas)': status_final,
-            'Situação Parcial (Avamec)': situacao_avamec,
-            'Status da Nota': status_nota
-        })
-    
-    # Criar DataFrame
-    df_comp = pd.DataFrame(comparacao)
-    
-    # Ordenar
-    df_comp = df_comp.sort_values(['Grupo', 'Nome'])
-    
+    # Cruzamento pelo índice de identidade, com os status calculados por coluna
+    result = compare(df_grades, load_avamec(avamec_path))
+    df_comp = report_table(result).sort_values(['Grupo', 'Nome'])
+    stats = summary(result)
     
     # Estatísticas
-    total = len(df_comp)
-    com_avamec = len([x for x in df_comp['Situação Parcial (Avamec)'] if x != '—'])
-    aguardando = len([x for x in df_comp['Status da Nota'] if 'Aguardando' in x])
-    
-    print(f"📊 Total de cursistas: {total}")
-    print(f"📊 Com dados do Avamec: {com_avamec}")
-    print(f"📊 Sem dados do Avamec: {total - com_avamec}")
-    print(f"⏳ Aguardando lançamento: {aguardando}")
+    print(f"📊 Total de cursistas: {stats['total']}")
+    print(f"📊 Com dados do Avamec: {stats['com_avamec']}")
+    print(f"📊 Sem dados do Avamec: {stats['sem_avamec']}")
+    print(f"⏳ Aguardando lançamento: {stats['aguardando']}")
     print()
     
     # Mostrar tabela
@@ -116,14 +64,8 @@ def create_comparison_table():
     print(f"{'Nome':<40} {'Grupo':<22} {'Status Final':<15} {'Situação':<10} {'Status da Nota':<25}")
     print("=" * 115)
     
-    for _, row in df_comp.iterrows():
-        nome = row['Nome'][:38]
-        grupo = str(row['Grupo'])[:20]
-        status = row['Status Final (Planilhas)'][:13]
-        avamec = str(row['Situação Parcial (Avamec)'])[:8]
-        status_nota = row['Status da Nota'][:23]
-        
-        print(f"{nome:<40} {grupo:<22} {status:<15} {avamec:<10} {status_nota:<25}")
+    for nome, grupo, status, avamec, status_nota in df_comp.itertuples(index=False):
+        print(f"{nome[:38]:<40} {str(grupo)[:20]:<22} {status[:13]:<15} {str(avamec)[:8]:<10} {status_nota[:23]:<25}")
     
     print("=" * 115)
     print()
@@ -135,38 +77,20 @@ def create_comparison_table():
     print()
     
     # Análise de divergências (se houver dados Avamec)
-    if com_avamec > 0:
+    if stats['com_avamec'] > 0:
         print("=" * 100)
         print("ANÁLISE DE DIVERGÊNCIAS")
         print("=" * 100)
         
-        divergencias = []
-        for _, row in df_comp.iterrows():
-            status_planilha = row['Status Final (Planilhas)'].upper()
-            situacao_avamec = str(row['Situação Parcial (Avamec)'])
-            
-            if situacao_avamec != '—':
-                try:
-                    nota_avamec = float(situacao_avamec)
-                    status_avamec = 'APROVADO' if nota_avamec >= 7 else 'REPROVADO'
-                    
-                    if status_planilha != status_avamec:
-                        divergencias.append({
-                            'nome': row['Nome'],
-                            'grupo': row['Grupo'],
-                            'planilha': status_planilha,
-                            'avamec': f"{situacao_avamec} ({status_avamec})"
-                        })
-                except (ValueError, TypeError):
-                    pass
+        divergencias = divergences(result.sort_values(['Turma_Grupo', 'Nome']))
         
-        if divergencias:
+        if not divergencias.empty:
             print(f"\n⚠️ {len(divergencias)} divergência(s) encontrada(s):\n")
-            for i, d in enumerate(divergencias, 1):
-                print(f"{i}. {d['nome']}")
-                print(f"   Grupo: {d['grupo']}")
-                print(f"   Planilha: {d['planilha']}")
-                print(f"   Avamec: {d['avamec']}")
+            for i, d in enumerate(divergencias.itertuples(index=False), 1):
+                print(f"{i}. {d.Nome}")
+                print(f"   Grupo: {d.Grupo}")
+                print(f"   Planilha: {d.Planilhas.upper()}")
+                print(f"   Avamec: {d.Avamec.upper()}")
                 print()
         else:
             print("\n✅ Nenhuma divergência encontrada!")
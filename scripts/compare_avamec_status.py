@@ -2,13 +2,19 @@
 """
 Compara status do Avamec entre duas datas
 Identifica alunos que mudaram de Reprovado para Aprovado
+
+As mudanças vêm do histórico de snapshots (src/core/snapshots.py).
 """
 
-import json
 import os
-from datetime import datetime
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-def compare_avamec_status():
+from src.core.snapshots import SnapshotStore, KIND_AVAMEC
+
+def compare_avamec_status(since=None, until=None):
     base_dir = os.getcwd()
     current_file = os.path.join(base_dir, 'data/avamec_status_situacao.json')
     backup_dir = os.path.join(base_dir, 'data/backups')
@@ -18,150 +24,89 @@ def compare_avamec_status():
         print("Execute: python3 scripts/scrape_avamec_status.py")
         return
     
-    # Procurar backup mais recente
-    if not os.path.exists(backup_dir):
-        print("⚠️ Diretório de backups não existe.")
-        print("📝 Crie um backup primeiro:")
-        print(f"   mkdir -p {backup_dir}")
-        print(f"   cp {current_file} {backup_dir}/avamec_status_$(date +%Y%m%d).json")
-        return
-    
-    backups = sorted([f for f in os.listdir(backup_dir) if f.startswith('avamec_status_') and f.endswith('.json')])
-    
-    if len(backups) == 0:
-        print("⚠️ Nenhum backup encontrado.")
-        print("📝 Crie um backup antes de executar novamente:")
-        print(f"   cp {current_file} {backup_dir}/avamec_status_$(date +%Y%m%d).json")
-        return
-    
-    previous_file = os.path.join(backup_dir, backups[-1])
-    
-    print("=" * 80)
-    print("COMPARAÇÃO DE STATUS DO AVAMEC")
-    print("=" * 80)
-    print(f"📅 Arquivo anterior: {backups[-1]}")
-    print(f"📅 Arquivo atual: avamec_status_situacao.json")
-    print()
-    
     try:
-        # Carregar dados
-        with open(previous_file, 'r', encoding='utf-8') as f:
-            data_prev = json.load(f)
-        
-        with open(current_file, 'r', encoding='utf-8') as f:
-            data_curr = json.load(f)
-        
-        alunos_prev = {}
-        alunos_curr = {}
+        store = SnapshotStore()
+        try:
+            store.import_backups(backup_dir)
+            store.take(KIND_AVAMEC, current_file)
+            previous_at, current_at = store.period(KIND_AVAMEC, since, until)
+            changes = store.diff(KIND_AVAMEC, since, until)
+            totals = store.snapshots(KIND_AVAMEC).set_index('taken_at')['students']
+        finally:
+            store.close()
         
-        for a in data_prev.get('alunos', []):
-            nome = a['nome'].strip().upper()
-            try:
-                nota = float(a['situacao_parcial'])
-                status = "APROVADO" if nota >= 7 else "REPROVADO"
-                alunos_prev[nome] = {'nota': nota, 'status': status}
-            except (ValueError, TypeError):
-                alunos_prev[nome] = {'nota': 0, 'status': 'INDEFINIDO'}
+        if previous_at is None:
+            print("⚠️ Ainda não há snapshot anterior do Avamec para comparar.")
+            print("📝 O snapshot atual foi guardado; execute novamente após a próxima coleta.")
+            return
         
-        for a in data_curr.get('alunos', []):
-            nome = a['nome'].strip().upper()
-            try:
-                nota = float(a['situacao_parcial'])
-                status = "APROVADO" if nota >= 7 else "REPROVADO"
-                alunos_curr[nome] = {'nota': nota, 'status': status}
-            except (ValueError, TypeError):
-                alunos_curr[nome] = {'nota': 0, 'status': 'INDEFINIDO'}
-        
-        # Encontrar mudanças
-        mudancas_aprovado = []
-        mudancas_reprovado = []
-        melhoria_nota = []
-        novos_alunos = []
+        print("=" * 80)
+        print("COMPARAÇÃO DE STATUS DO AVAMEC")
+        print("=" * 80)
+        print(f"📅 Snapshot anterior: {previous_at}")
+        print(f"📅 Snapshot atual: {current_at}")
+        print()
         
-        for nome, dados_atual in alunos_curr.items():
-            if nome in alunos_prev:
-                dados_anterior = alunos_prev[nome]
-                
-                # Reprovado → Aprovado
-                if dados_anterior['status'] == 'REPROVADO' and dados_atual['status'] == 'APROVADO':
-                    mudancas_aprovado.append({
-                        'nome': nome,
-                        'nota_anterior': dados_anterior['nota'],
-                        'nota_atual': dados_atual['nota'],
-                        'diferenca': dados_atual['nota'] - dados_anterior['nota']
-                    })
-                # Aprovado → Reprovado
-                elif dados_anterior['status'] == 'APROVADO' and dados_atual['status'] == 'REPROVADO':
-                    mudancas_reprovado.append({
-                        'nome': nome,
-                        'nota_anterior': dados_anterior['nota'],
-                        'nota_atual': dados_atual['nota'],
-                        'diferenca': dados_atual['nota'] - dados_anterior['nota']
-                    })
-                # Melhoria de nota (ainda reprovado ou já aprovado)
-                elif dados_atual['nota'] > dados_anterior['nota'] + 0.5:
-                    melhoria_nota.append({
-                        'nome': nome,
-                        'nota_anterior': dados_anterior['nota'],
-                        'nota_atual': dados_atual['nota'],
-                        'diferenca': dados_atual['nota'] - dados_anterior['nota'],
-                        'status': dados_atual['status']
-                    })
-            else:
-                novos_alunos.append({
-                    'nome': nome, 
-                    'nota': dados_atual['nota'],
-                    'status': dados_atual['status']
-                })
+        # Notas ausentes contam como zero, como antes
+        changes = changes.assign(old_nota=changes['old_nota'].astype(float).fillna(0),
+                                 new_nota=changes['new_nota'].astype(float).fillna(0))
+        changes['diferenca'] = changes['new_nota'] - changes['old_nota']
         
+        # Reprovado → Aprovado / Aprovado → Reprovado
+        mudancas_aprovado = changes[changes['mudanca'] == 'aprovado']
+        mudancas_reprovado = changes[changes['mudanca'] == 'reprovado']
+        # Melhoria de nota (ainda reprovado ou já aprovado)
+        melhoria_nota = changes[changes['mudanca'].isin(['nota', 'status'])
+                                & (changes['new_nota'] > changes['old_nota'] + 0.5)]
+        novos_alunos = changes[changes['mudanca'] == 'novo']
         
         # Relatório
-        print(f"📊 Total de alunos anteriormente: {len(alunos_prev)}")
-        print(f"📊 Total de alunos atualmente: {len(alunos_curr)}")
+        print(f"📊 Total de alunos anteriormente: {totals.get(previous_at, 0)}")
+        print(f"📊 Total de alunos atualmente: {totals.get(current_at, 0)}")
         print()
         
-        if mudancas_aprovado:
+        if len(mudancas_aprovado):
             print("=" * 80)
             print(f"✅ APROVAÇÕES - REPROVADO → APROVADO ({len(mudancas_aprovado)} aluno(s))")
             print("=" * 80)
-            for i, m in enumerate(mudancas_aprovado, 1):
-                print(f"\n{i}. {m['nome'].title()}")
-                print(f"   Nota anterior: {m['nota_anterior']:.1f} (Reprovado)")
-                print(f"   Nota atual: {m['nota_atual']:.1f} (Aprovado)")
-                print(f"   Melhoria: +{m['diferenca']:.1f} pontos")
+            for i, m in enumerate(mudancas_aprovado.itertuples(index=False), 1):
+                print(f"\n{i}. {m.nome.title()}")
+                print(f"   Nota anterior: {m.old_nota:.1f} (Reprovado)")
+                print(f"   Nota atual: {m.new_nota:.1f} (Aprovado)")
+                print(f"   Melhoria: +{m.diferenca:.1f} pontos")
         else:
-            print("ℹ️  Nenhuma aprovação nova (nota < 7 → nota >= 7) desde o último backup.")
+            print("ℹ️  Nenhuma aprovação nova (nota < 7 → nota >= 7) desde o último snapshot.")
         
         print()
         
-        if mudancas_reprovado:
+        if len(mudancas_reprovado):
             print("=" * 80)
             print(f"⚠️ REPROVAÇÕES - APROVADO → REPROVADO ({len(mudancas_reprovado)} aluno(s))")
             print("=" * 80)
-            for i, m in enumerate(mudancas_reprovado, 1):
-                print(f"\n{i}. {m['nome'].title()}")
-                print(f"   Nota anterior: {m['nota_anterior']:.1f} (Aprovado)")
-                print(f"   Nota atual: {m['nota_atual']:.1f} (Reprovado)")
-                print(f"   Queda: {m['diferenca']:.1f} pontos")
+            for i, m in enumerate(mudancas_reprovado.itertuples(index=False), 1):
+                print(f"\n{i}. {m.nome.title()}")
+                print(f"   Nota anterior: {m.old_nota:.1f} (Aprovado)")
+                print(f"   Nota atual: {m.new_nota:.1f} (Reprovado)")
+                print(f"   Queda: {m.diferenca:.1f} pontos")
             print()
         
-        if melhoria_nota:
+        if len(melhoria_nota):
             print("=" * 80)
             print(f"📈 MELHORIA DE NOTAS ({len(melhoria_nota)} aluno(s))")
             print("=" * 80)
-            for i, m in enumerate(melhoria_nota, 1):
-                print(f"\n{i}. {m['nome'].title()}")
-                print(f"   Nota anterior: {m['nota_anterior']:.1f}")
-                print(f"   Nota atual: {m['nota_atual']:.1f}")
-                print(f"   Melhoria: +{m['diferenca']:.1f} pontos ({m['status']})")
+            for i, m in enumerate(melhoria_nota.itertuples(index=False), 1):
+                print(f"\n{i}. {m.nome.title()}")
+                print(f"   Nota anterior: {m.old_nota:.1f}")
+                print(f"   Nota atual: {m.new_nota:.1f}")
+                print(f"   Melhoria: +{m.diferenca:.1f} pontos ({m.new_status})")
             print()
         
-        if novos_alunos:
+        if len(novos_alunos):
             print("=" * 80)
             print(f"🆕 NOVOS ALUNOS ({len(novos_alunos)})")
             print("=" * 80)
-            for i, a in enumerate(novos_alunos, 1):
-                print(f"{i}. {a['nome'].title()} - Nota: {a['nota']:.1f} ({a['status']})")
+            for i, a in enumerate(novos_alunos.itertuples(index=False), 1):
+                print(f"{i}. {a.nome.title()} - Nota: {a.new_nota:.1f} ({a.new_status})")
             print()
         
         print("=" * 80)
@@ -172,4 +117,8 @@ def compare_avamec_status():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    compare_avamec_status()
+    parser = argparse.ArgumentParser(description="Comparação de status do Avamec entre snapshots")
+    parser.add_argument('--since', default=None, help="Data inicial (AAAA-MM-DD); padrão: snapshot anterior")
+    parser.add_argument('--until', default=None, help="Data final (AAAA-MM-DD); padrão: agora")
+    args = parser.parse_args()
+    compare_avamec_status(args.since, args.until)
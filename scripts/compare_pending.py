@@ -1,13 +1,12 @@
+import os
 import pandas as pd
-import re
 import sys
 
-def normalize_phone(phone):
-    s = str(phone).strip()
-    s = re.sub(r'\D', '', s)
-    if s.startswith('55') and len(s) > 11:
-        s = s[2:]
-    return s
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot_whatsapp'))
+
+from ledger import SendLedger
+from src.utils.phones import normalize_phones
 
 def main():
     if len(sys.argv) < 2:
@@ -16,12 +15,12 @@ def main():
 
     csv_path = sys.argv[1]
     
-    # Load sent phones
-    try:
-        with open('sent_phones_list.txt', 'r') as f:
-            sent_phones = set(line.strip() for line in f)
-    except FileNotFoundError:
-        print("sent_phones_list.txt not found. Run consolidate_logs.py first.")
+    # Load sent phones from the bot's send ledger
+    ledger = SendLedger()
+    sent_phones = ledger.sent_keys()
+    ledger.close()
+    if not sent_phones:
+        print("Send ledger is empty. Import old reports with: python bot_whatsapp/ledger.py import bot_whatsapp/delivered_report_*.csv")
         return
 
     print(f"Loaded {len(sent_phones)} sent phones.")
@@ -53,25 +52,15 @@ def main():
 
     print(f"Using columns: Secretaria='{secretaria_col}', Phone='{phone_col}', Name='{name_col}'")
 
-    # Filter
-    pending_list = []
-    
-    for idx, row in df.iterrows():
-        phone_raw = row[phone_col]
-        norm_phone = normalize_phone(phone_raw)
-        
-        if not norm_phone: # skip empty
-            continue
-            
-        if norm_phone not in sent_phones:
-            pending_list.append({
-                'Secretaria': row[secretaria_col],
-                'Nome': row[name_col] if name_col else 'N/A',
-                'Telefone': norm_phone
-            })
-
-    # Group by Secretaria
-    df_pending = pd.DataFrame(pending_list)
+    # Filter (whole column at once; empty phones are skipped)
+    phones = normalize_phones(df[phone_col])
+    pending = (phones['digits'] != '') & ~phones['key'].isin(sent_phones)
+    df_pending = pd.DataFrame({
+        'Secretaria': df.loc[pending, secretaria_col],
+        'Nome': df.loc[pending, name_col] if name_col else 'N/A',
+        'Telefone': phones.loc[pending, 'key'],
+        'Status_Telefone': phones.loc[pending, 'status'],
+    })
     
     if df_pending.empty:
         print("All contacts in the sheet have already received messages!")
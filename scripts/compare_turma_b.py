@@ -2,14 +2,20 @@
 """
 Compara alterações de status entre ontem e hoje
 Filtra por Turma B
+
+As mudanças vêm do histórico de snapshots (src/core/snapshots.py).
 """
 
-import pandas as pd
+import os
 import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-def compare_turma_b_changes():
+from src.core.snapshots import SnapshotStore, KIND_GRADES
+
+def compare_turma_b_changes(since=None, until=None):
     # Arquivos
-    previous_file = 'data/backups/grades_yesterday_from_git.csv'
     current_file = 'data/grades_consolidados.csv'
     
     try:
@@ -18,108 +24,57 @@ def compare_turma_b_changes():
         print("=" * 80)
         print()
         
-        # Carregar dados
-        df_prev = pd.read_csv(previous_file, header=0)
-        df_curr = pd.read_csv(current_file, header=0)
-        
-        # Encontrar coluna de grupo
-        group_col = None
-        for col in df_curr.columns:
-            if df_curr[col].astype(str).str.contains('Turma [AB]', regex=True, na=False).any():
-                group_col = col
-                break
-        
-        if not group_col:
-            print("❌ Coluna de grupo não encontrada")
+        store = SnapshotStore()
+        try:
+            store.import_backups('data/backups')
+            store.take(KIND_GRADES, current_file)
+            previous_at, current_at = store.period(KIND_GRADES, since, until)
+            changes = store.diff(KIND_GRADES, since, until)
+        finally:
+            store.close()
+        
+        if previous_at is None:
+            print("ℹ️  Ainda não há snapshot anterior para comparar")
             return
         
-        # Filtrar apenas Turma B
-        df_prev_b = df_prev[df_prev[group_col].astype(str).str.contains('Turma B', na=False)].copy()
-        df_curr_b = df_curr[df_curr[group_col].astype(str).str.contains('Turma B', na=False)].copy()
-        
-        # Coluna de status (Extra_Col_61)
-        status_col = 'Extra_Col_61'
-        name_col = df_curr.columns[1]  # Segunda coluna = nome
-        
-        if status_col not in df_curr.columns:
-            print(f"❌ Coluna de status '{status_col}' não encontrada")
-            return
-        
-        print(f"📊 Turma B - Ontem: {len(df_prev_b)} alunos")
-        print(f"📊 Turma B - Hoje: {len(df_curr_b)} alunos")
+        print(f"📅 Anterior: {previous_at}")
+        print(f"📅 Atual: {current_at}")
         print()
         
-        # Criar dicionários para comparação
-        prev_status = {}
-        curr_status = {}
-        
-        for _, row in df_prev_b.iterrows():
-            nome = str(row[name_col]).strip().upper()
-            grupo = str(row[group_col])
-            status = str(row[status_col]).strip().upper()
-            prev_status[nome] = {'grupo': grupo, 'status': status}
-        
-        for _, row in df_curr_b.iterrows():
-            nome = str(row[name_col]).strip().upper()
-            grupo = str(row[group_col])
-            status = str(row[status_col]).strip().upper()
-            curr_status[nome] = {'grupo': grupo, 'status': status}
-        
-        # Encontrar mudanças
-        aprovacoes = []
-        reprovacoes = []
-        novos = []
-        
-        for nome, dados_atual in curr_status.items():
-            if nome in prev_status:
-                status_ant = prev_status[nome]['status']
-                status_now = dados_atual['status']
-                
-                if status_ant == 'REPROVADO' and status_now == 'APROVADO':
-                    aprovacoes.append({
-                        'nome': nome,
-                        'grupo': dados_atual['grupo']
-                    })
-                elif status_ant == 'APROVADO' and status_now == 'REPROVADO':
-                    reprovacoes.append({
-                        'nome': nome,
-                        'grupo': dados_atual['grupo']
-                    })
-            else:
-                novos.append({
-                    'nome': nome,
-                    'grupo': dados_atual['grupo'],
-                    'status': dados_atual['status']
-                })
+        # Filtrar apenas Turma B
+        changes = changes[changes['grupo'].fillna('').str.contains('Turma B')]
+        aprovacoes = changes[changes['mudanca'] == 'aprovado']
+        reprovacoes = changes[changes['mudanca'] == 'reprovado']
+        novos = changes[changes['mudanca'] == 'novo']
         
         # Resultados
-        if aprovacoes:
+        if len(aprovacoes):
             print("=" * 80)
             print(f"✅ APROVAÇÕES ({len(aprovacoes)} aluno(s))")
             print("=" * 80)
-            for i, a in enumerate(aprovacoes, 1):
-                print(f"{i}. {a['nome'].title()}")
-                print(f"   Grupo: {a['grupo']}")
+            for i, a in enumerate(aprovacoes.itertuples(index=False), 1):
+                print(f"{i}. {a.nome.title()}")
+                print(f"   Grupo: {a.grupo}")
                 print()
         else:
             print("ℹ️  Nenhuma nova aprovação na Turma B")
             print()
         
-        if reprovacoes:
+        if len(reprovacoes):
             print("=" * 80)
             print(f"⚠️ REPROVAÇÕES ({len(reprovacoes)} aluno(s))")
             print("=" * 80)
-            for i, r in enumerate(reprovacoes, 1):
-                print(f"{i}. {r['nome'].title()}")
-                print(f"   Grupo: {r['grupo']}")
+            for i, r in enumerate(reprovacoes.itertuples(index=False), 1):
+                print(f"{i}. {r.nome.title()}")
+                print(f"   Grupo: {r.grupo}")
                 print()
         
-        if novos:
+        if len(novos):
             print("=" * 80)
             print(f"🆕 NOVOS ALUNOS ({len(novos)})")
             print("=" * 80)
-            for i, n in enumerate(novos, 1):
-                print(f"{i}. {n['nome'].title()} - {n['grupo']} - {n['status']}")
+            for i, n in enumerate(novos.itertuples(index=False), 1):
+                print(f"{i}. {n.nome.title()} - {n.grupo} - {n.new_status}")
             print()
         
         print("=" * 80)
@@ -130,4 +85,8 @@ def compare_turma_b_changes():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    compare_turma_b_changes()
+    parser = argparse.ArgumentParser(description="Alterações de status da Turma B")
+    parser.add_argument('--since', default=None, help="Data inicial (AAAA-MM-DD); padrão: snapshot anterior")
+    parser.add_argument('--until', default=None, help="Data final (AAAA-MM-DD); padrão: agora")
+    args = parser.parse_args()
+    compare_turma_b_changes(args.since, args.until)
@@ -1,10 +1,12 @@
 import os
+import sys
 import time
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.browser import pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,42 +18,13 @@ def download_sheets_selenium():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    
-    # Set download directory
-    prefs = {
-        "download.default_directory": output_dir,
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True
-    }
-    options.add_experimental_option("prefs", prefs)
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    
-    # Load Cookies
-    try:
-        driver.get("https://docs.google.com")
-        with open('data/google_cookies.txt', 'r') as f:
-            cookie_str = f.read().strip()
-            
-        for item in cookie_str.split(';'):
-            if '=' in item:
-                name, value = item.strip().split('=', 1)
-                try:
-                    driver.add_cookie({'name': name, 'value': value, 'domain': '.google.com'})
-                except:
-                    # Try logging domain
-                    pass
-        logger.info("Cookies loaded.")
-        driver.refresh()
-    except Exception as e:
-        logger.error(f"Error loading cookies: {e}")
+    # Shared session: warm profile + canonical cookies (data/cookies/google.json)
+    session = pool.acquire('google', headless=True, download_dir=output_dir, ensure_login=False)
+    driver = session.driver
+    if session.ensure_logged_in():
+        logger.info("Google session ready.")
+    else:
+        logger.error("Google session expired. Refresh data/cookies/google.json.")
 
     with open(links_file, 'r') as f:
         links = [l.strip() for l in f.readlines() if l.strip()]
@@ -97,7 +70,7 @@ def download_sheets_selenium():
         except Exception as e:
             logger.error(f"Error downloading {link}: {e}")
 
-    driver.quit()
+    pool.release(session)
 
 if __name__ == "__main__":
     download_sheets_selenium()
@@ -1,15 +1,18 @@
 import logging
 import os
 import os.path
-import pickle
+import sys
 import time
 from dotenv import load_dotenv
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.browser import pool
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,41 +31,12 @@ PASSWORD = os.getenv('AVAMEC_PASSWORD')
 if not USERNAME or not PASSWORD:
     raise ValueError("Missing credentials. Please set AVAMEC_USERNAME and AVAMEC_PASSWORD in .env file")
 
-def setup_driver():
-    """Configure and return Firefox WebDriver"""
-    options = webdriver.FirefoxOptions()
-    # options.add_argument('--headless')  # Uncomment to run in headless mode
-    options.profile = '/home/emanoel/.mozilla/firefox/xfddl5q0.avamec'  # Update with your profile path
-    return webdriver.Firefox(options=options)
-
 def wait_for_element(driver, by, value, timeout=10):
     """Wait for element to be present and return it"""
     return WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((by, value))
     )
 
-def save_cookies(driver, path):
-    """Save browser cookies to file"""
-    if not os.path.exists('cookies'):
-        os.makedirs('cookies')
-    with open(path, 'wb') as file:
-        pickle.dump(driver.get_cookies(), file)
-    logging.info("Cookies saved successfully")
-
-def load_cookies(driver, path):
-    """Load cookies into browser session"""
-    if os.path.exists(path):
-        with open(path, 'rb') as file:
-            cookies = pickle.load(file)
-            for cookie in cookies:
-                # Skip cookies with SameSite=None and missing 'secure'
-                if cookie.get('sameSite') == 'None' and not cookie.get('secure', False):
-                    continue
-                driver.add_cookie(cookie)
-        logging.info("Cookies loaded successfully")
-        return True
-    return False
-
 def perform_login(driver):
     """Handle login process including CAPTCHA"""
     login_field = wait_for_element(driver, By.CSS_SELECTOR, "input[type='text']")
@@ -89,35 +63,14 @@ def perform_login(driver):
 
 def automate_web_task():
     """Main automation function"""
-    driver = None
-    cookies_path = 'cookies/avamec_session.pkl'
+    session = None
     
     try:
-        driver = setup_driver()
-        logging.info("Browser started successfully")
-
-        # Navigate to website
-        base_url = "https://avamecinterativo.mec.gov.br"
-        driver.get(base_url)
-        
-        # Try to load existing session
-        if load_cookies(driver, cookies_path):
-            logging.info("Attempting to use saved session")
-            driver.refresh()  # Refresh page with loaded cookies
-            
-            # Check if still logged in by looking for a logged-in-only element
-            try:
-                wait_for_element(driver, By.CSS_SELECTOR, ".user-profile", timeout=5)
-                logging.info("Successfully restored previous session")
-            except TimeoutException:
-                logging.info("Session expired, logging in again")
-                perform_login(driver)
-        else:
-            logging.info("No saved session found, performing fresh login")
-            perform_login(driver)
-        
-        # Save cookies after successful login
-        save_cookies(driver, cookies_path)
+        # Sessão compartilhada: perfil aquecido + cookies em data/cookies/avamec.json.
+        # O login (com CAPTCHA) só é pedido quando a sessão expirou.
+        session = pool.acquire('avamec', login=perform_login)
+        driver = session.driver
+        logging.info("Browser session ready")
         
         # Navigate to dashboard
         dashboard_url = "https://avamecinterativo.mec.gov.br/dashboard/environments"
@@ -151,9 +104,9 @@ def automate_web_task():
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
     finally:
-        if driver:
-            driver.quit()
-            logging.info("Browser closed")
+        if session:
+            pool.release(session)
+            logging.info("Browser returned to pool")
 
 if __name__ == "__main__":
     automate_web_task()
\ No newline at end of file
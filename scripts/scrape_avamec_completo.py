@@ -2,27 +2,33 @@
 """
 Scraper AUTOMÁTICO - Extrai situação parcial de TODAS as turmas e grupos
 Navega automaticamente pelos grupos usando Selenium
+
+Cada grupo é salvo em data/avamec_completo.journal.jsonl assim que termina.
+Se a execução cair no meio, rode com --resume para pular os grupos já salvos:
+    python3 scripts/scrape_avamec_completo.py --resume
 """
 
 import sys
 import os
-import json
+import argparse
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
 import time
 
-def scrape_all_avamec():
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.browser import pool, manual_login
+from src.core.checkpoint import ScrapeJournal
+
+def scrape_all_avamec(resume=False):
     """Extrai situação parcial de todos os grupos (Turma A e B)"""
     
     base_dir = os.getcwd()
-    cookie_file = os.path.join(base_dir, 'data/avamec_cookies.json')
     output_file = os.path.join(base_dir, 'data/avamec_completo.json')
+    journal = ScrapeJournal(os.path.join(base_dir, 'data/avamec_completo.journal.jsonl'), resume=resume)
     
     # Configurações das turmas
     turmas_config = [
@@ -38,15 +44,8 @@ def scrape_all_avamec():
         }
     ]
     
-    # Configurar Chrome
-    chrome_options = Options()
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--window-size=1920,1080')
-    # chrome_options.add_argument('--headless')  # Descomente para modo headless
-    
+    session = None
     driver = None
-    all_students = []
     
     try:
         print("=" * 80)
@@ -54,36 +53,13 @@ def scrape_all_avamec():
         print("=" * 80)
         print()
         
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
-        )
+        # Sessão compartilhada: perfil aquecido + cookies em data/cookies/avamec.json
+        print("🔐 Verificando sessão...")
+        session = pool.acquire('avamec', login=manual_login)
+        driver = session.driver
         
         wait = WebDriverWait(driver, 20)
         
-        # Login inicial com Turma A
-        print("🔐 Fazendo login...")
-        driver.get(turmas_config[0]['url'])
-        
-        if os.path.exists(cookie_file):
-            print("📂 Carregando cookies salvos...")
-            with open(cookie_file, 'r') as f:
-                cookies = json.load(f)
-                for cookie in cookies:
-                    try:
-                        driver.add_cookie(cookie)
-                    except:
-                        pass
-            driver.refresh()
-            time.sleep(3)
-        else:
-            print("⚠️ Faça login manualmente...")
-            input("Pressione ENTER após fazer login...")
-            cookies = driver.get_cookies()
-            with open(cookie_file, 'w') as f:
-                json.dump(cookies, f)
-            print("✅ Cookies salvos!")
-        
         # Processar cada turma
         for turma_config in turmas_config:
             turma_nome = turma_config['nome']
@@ -104,6 +80,10 @@ def scrape_all_avamec():
                 
                 print(f"📋 Grupo {grupo_num}/{total_grupos}: {grupo_nome}")
                 
+                if journal.is_done(grupo_nome):
+                    print(f"   ⏭️ Já salvo nesta execução ({journal.completed[grupo_nome]} alunos)\n")
+                    continue
+                
                 try:
                     # Recarregar página base se necessário
                     if grupo_num > 1:
@@ -195,7 +175,7 @@ def scrape_all_avamec():
                         except Exception as e:
                             continue
                     
-                    all_students.extend(grupo_students)
+                    journal.commit(grupo_nome, grupo_students)
                     print(f"   ✅ {len(grupo_students)} alunos extraídos\n")
                     
                 except Exception as e:
@@ -205,28 +185,26 @@ def scrape_all_avamec():
                     time.sleep(1)
                     print("sim (continuando...)")
         
-        # Salvar dados
-        if all_students:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'data_extracao': datetime.now().isoformat(),
-                    'total_turmas': len(turmas_config),
-                    'total_grupos': sum(t['grupos'] for t in turmas_config),
-                    'total_alunos': len(all_students),
-                    'alunos': all_students
-                }, f, indent=2, ensure_ascii=False)
+        # Salvar dados (montados a partir do journal, sem carregar tudo em memória)
+        if journal.total_records:
+            journal.write_json(output_file, records_key='alunos', meta={
+                'data_extracao': datetime.now().isoformat(),
+                'total_turmas': len(turmas_config),
+                'total_grupos': sum(t['grupos'] for t in turmas_config),
+                'total_alunos': journal.total_records,
+            })
             
             print("\n" + "=" * 80)
             print("✅ EXTRAÇÃO COMPLETA!")
             print("=" * 80)
             print(f"📁 Dados salvos em: {output_file}")
-            print(f"📊 Total de alunos: {len(all_students)}")
+            print(f"📊 Total de alunos: {journal.total_records}")
             print()
             
             # Estatísticas por turma
             turmas_count = {}
             grupos_count = {}
-            for aluno in all_students:
+            for aluno in journal.iter_records():
                 turma = aluno['turma']
                 grupo = aluno['grupo']
                 turmas_count[turma] = turmas_count.get(turma, 0) + 1
@@ -246,14 +224,17 @@ def scrape_all_avamec():
         
     except Exception as e:
         print(f"❌ Erro: {e}")
+        print(f"   {len(journal.completed)} grupo(s) salvos no journal. Continue com --resume.")
         import traceback
         traceback.print_exc()
     
     finally:
-        if driver:
-            print("\n🔄 Fechando navegador em 5 segundos...")
-            time.sleep(5)
-            driver.quit()
+        if session:
+            # Devolve o navegador ao pool (fechado ao final do processo)
+            pool.release(session)
 
 if __name__ == "__main__":
-    scrape_all_avamec()
+    parser = argparse.ArgumentParser(description="Extrai a situação parcial de todas as turmas do AVAMEC")
+    parser.add_argument('--resume', action='store_true', help='Pula os grupos já salvos na última execução')
+    args = parser.parse_args()
+    scrape_all_avamec(resume=args.resume)
@@ -8,31 +8,23 @@ import sys
 import os
 import json
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
 import time
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from src.core.browser import pool, manual_login
+
 def scrape_avamec_status():
     """Extrai situação parcial de todos os alunos do Avamec"""
     
     base_dir = os.getcwd()
-    cookie_file = os.path.join(base_dir, 'data/avamec_cookies.json')
     output_file = os.path.join(base_dir, 'data/avamec_status_situacao.json')
     
-    # Configurar Chrome
-    chrome_options = Options()
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    # chrome_options.add_argument('--headless')  # Descomente para modo headless
-    
+    session = None
     driver = None
     
     try:
@@ -41,33 +33,12 @@ def scrape_avamec_status():
         print("=" * 80)
         print()
         
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
-        )
+        # Sessão compartilhada: perfil aquecido + cookies em data/cookies/avamec.json
+        session = pool.acquire('avamec', login=manual_login)
+        driver = session.driver
         
         driver.get("https://avamecinterativo.mec.gov.br/app/dashboard/environments/180/courses/7145/gradebook")
         
-        # Tentar carregar cookies se existirem
-        if os.path.exists(cookie_file):
-            print("📂 Carregando cookies salvos...")
-            with open(cookie_file, 'r') as f:
-                cookies = json.load(f)
-                for cookie in cookies:
-                    driver.add_cookie(cookie)
-            driver.refresh()
-            time.sleep(3)
-        else:
-            print("⚠️ Arquivo de cookies não encontrado.")
-            print("ℹ️  Faça login manualmente e o script salvará os cookies.")
-            input("Pressione ENTER após fazer login...")
-            
-            # Salvar cookies
-            cookies = driver.get_cookies()
-            with open(cookie_file, 'w') as f:
-                json.dump(cookies, f)
-            print("✅ Cookies salvos!")
-        
         # Aguardar página carregar
         print("\n⏳ Aguardando página carregar...")
         time.sleep(5)
@@ -154,10 +125,9 @@ def scrape_avamec_status():
         traceback.print_exc()
     
     finally:
-        if driver:
-            print("\n🔄 Fechando navegador em 5 segundos...")
-            time.sleep(5)
-            driver.quit()
+        if session:
+            # Devolve o navegador ao pool (fechado ao final do processo)
+            pool.release(session)
 
 if __name__ == "__main__":
     scrape_avamec_status()
@@ -1,17 +1,20 @@
 import logging
 import os
 import os.path
+import sys
 import pandas as pd
 import shutil
-import pickle
 import time
 from dotenv import load_dotenv
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.browser import pool
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,37 +33,12 @@ PASSWORD = os.getenv('AVAMEC_PASSWORD')
 if not USERNAME or not PASSWORD:
     raise ValueError("Missing credentials. Please set AVAMEC_USERNAME and AVAMEC_PASSWORD in .env file")
 
-def setup_driver():
-    """Configure and return Firefox WebDriver"""
-    options = webdriver.FirefoxOptions()
-    # options.add_argument('--headless')  # Uncomment to run in headless mode
-    return webdriver.Firefox(options=options)
-
 def wait_for_element(driver, by, value, timeout=10):
     """Wait for element to be present and return it"""
     return WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((by, value))
     )
 
-def save_cookies(driver, path):
-    """Save browser cookies to file"""
-    if not os.path.exists('cookies'):
-        os.makedirs('cookies')
-    with open(path, 'wb') as file:
-        pickle.dump(driver.get_cookies(), file)
-    logging.info("Cookies saved successfully")
-
-def load_cookies(driver, path):
-    """Load cookies into browser session"""
-    if os.path.exists(path):
-        with open(path, 'rb') as file:
-            cookies = pickle.load(file)
-            for cookie in cookies:
-                driver.add_cookie(cookie)
-        logging.info("Cookies loaded successfully")
-        return True
-    return False
-
 def perform_login(driver):
     """Handle login process including CAPTCHA"""
     login_field = wait_for_element(driver, By.CSS_SELECTOR, "input[type='text']")
@@ -148,10 +126,11 @@ def baixar_relatorios_cursistas(driver, xlsx_path, pasta_destino="relatorios_tur
 # baixar_relatorios_cursistas(driver, "cursistas_turma_a.xlsx")
 
 if __name__ == "__main__":
-    driver = setup_driver()
+    # Sessão compartilhada: só faz login (com CAPTCHA) se o perfil/cookies expiraram
+    session = pool.acquire('avamec', login=perform_login)
+    driver = session.driver
     driver.get("https://avamecinterativo.mec.gov.br/app/dashboard/environments/179/edit")
-    perform_login(driver)
     # Após login e navegação, indique o arquivo xlsx desejado:
     xlsx_path = os.getenv('XLSX_CURSISTAS_PATH', '2025.2 Lista Original- Confirmação de matrícula.xlsx')
     baixar_relatorios_cursistas(driver, xlsx_path)
-    driver.quit()
\ No newline at end of file
+    pool.release(session)
\ No newline at end of file
@@ -3,10 +3,20 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-import re
 from typing import List, Dict, Tuple
 import io
 import os
+import sys
+
+# Helper to add project root to python path MUST be before src imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.identity import IdentityIndex, DEFAULT_DB as IDENTITY_DB
+from src.core.comparison import compare, load_avamec, avamec_file, summary, divergences, report_table
+from src.core.validation import validate
+from src.core.missing_grades import missing_grades
+from src.utils.emails import normalize_emails, compare_emails, NAO_CONVIDADO
+from src.utils.transcripts import extract_participants
 
 class ComparadorEmails:
     """
@@ -18,6 +28,7 @@ class ComparadorEmails:
         self.convidados_df = None
         self.grupos_tematicos_df = None
         self.emails_nao_convidados = None
+        self.comparacao = None
         
     def carregar_planilha_participantes(self, arquivo, formato='csv'):
         """
@@ -33,10 +44,9 @@ class ComparadorEmails:
             elif formato == 'excel':
                 self.participantes_df = pd.read_excel(arquivo)
             elif formato == 'txt':
-                # Para ata de texto do Google Meet
+                # Para ata de texto do Google Meet, lida linha a linha
                 with open(arquivo, 'r', encoding='utf-8') as f:
-                    conteudo = f.read()
-                self.participantes_df = self._extrair_participantes_do_texto(conteudo)
+                    self.participantes_df = self._extrair_participantes_do_texto(f)
             
             st.success(f"✅ Planilha de participantes carregada: {len(self.participantes_df)} registros")
             return True
@@ -84,43 +94,20 @@ class ComparadorEmails:
             st.error(f"❌ Erro ao carregar planilha de grupos temáticos: {str(e)}")
             return False
     
-    def _extrair_participantes_do_texto(self, texto: str) -> pd.DataFrame:
+    def _extrair_participantes_do_texto(self, texto) -> pd.DataFrame:
         """
         Extrai participantes de uma ata de texto do Google Meet.
         
         Args:
-            texto: Conteúdo da ata em texto
+            texto: Conteúdo da ata em texto ou arquivo aberto (lido linha a linha)
             
         Returns:
             DataFrame com participantes extraídos
         """
-        # Regex para encontrar emails
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, texto)
-        
-        # Regex para encontrar nomes (linhas que não contêm @)
-        linhas = texto.split('\n')
-        nomes = []
-        
-        for linha in linhas:
-            linha = linha.strip()
-            if linha and '@' not in linha and len(linha) > 2:
-                # Remove caracteres especiais e números no início
-                nome_limpo = re.sub(r'^[\d\s\-\.]+', '', linha)
-                if nome_limpo and len(nome_limpo) > 2:
-                    nomes.append(nome_limpo)
-        
-        # Criar DataFrame
-        dados = []
-        for i, email in enumerate(emails):
-            nome = nomes[i] if i < len(nomes) else f"Participante {i+1}"
-            dados.append({
-                'nome': nome,
-                'email': email,
-                'origem': 'Google Meet'
-            })
-        
-        return pd.DataFrame(dados)
+        # Cada e-mail fica com o nome da própria linha ou da linha mais próxima
+        dados = extract_participants(texto)
+        dados['nome'] = dados['nome'].where(dados['nome'] != '', 'Participante ' + (dados.index + 1).astype(str))
+        return dados[['nome', 'email', 'horario', 'sala']].assign(origem='Google Meet')
     
     def extrair_emails_participantes(self, coluna_email='email', coluna_nome='nome'):
         """
@@ -135,11 +122,11 @@ class ComparadorEmails:
             return False
         
         try:
-            # Padronizar emails
-            self.participantes_df[coluna_email] = self.participantes_df[coluna_email].str.lower().str.strip()
-            
-            # Remover duplicatas
-            self.participantes_df = self.participantes_df.drop_duplicates(subset=[coluna_email])
+            # Padronizar emails (minúsculas, sem espaços) e remover duplicatas, inclusive aliases do Gmail
+            normalizados = normalize_emails(self.participantes_df[coluna_email])
+            self.participantes_df[coluna_email] = normalizados['email']
+            validos = normalizados['key'] != ''
+            self.participantes_df = self.participantes_df[validos & ~normalizados['key'].duplicated()]
             
             st.success(f"✅ Emails dos participantes extraídos: {len(self.participantes_df)} únicos")
             return True
@@ -159,18 +146,15 @@ class ComparadorEmails:
             return False
         
         try:
-            # Padronizar emails dos convidados
-            self.convidados_df[coluna_email_convidados] = self.convidados_df[coluna_email_convidados].str.lower().str.strip()
-            
-            # Encontrar participantes não convidados
-            emails_participantes = set(self.participantes_df['email'])
-            emails_convidados = set(self.convidados_df[coluna_email_convidados])
-            
-            emails_nao_convidados = emails_participantes - emails_convidados
+            # Convidados x participantes pela chave canônica do e-mail (aliases do Gmail contam como o mesmo)
+            self.comparacao = compare_emails(self.convidados_df[coluna_email_convidados], self.participantes_df['email'])
+            tabela = self.comparacao.table
+            chaves_nao_convidados = tabela.loc[tabela['status'] == NAO_CONVIDADO, 'key']
             
             # Criar DataFrame com participantes não convidados
+            chaves_participantes = normalize_emails(self.participantes_df['email'])['key']
             self.emails_nao_convidados = self.participantes_df[
-                self.participantes_df['email'].isin(emails_nao_convidados)
+                chaves_participantes.isin(chaves_nao_convidados)
             ].copy()
             
             st.success(f"✅ Comparação concluída: {len(self.emails_nao_convidados)} participantes não convidados")
@@ -226,9 +210,12 @@ class ComparadorEmails:
         if self.emails_nao_convidados is None or len(self.emails_nao_convidados) == 0:
             return None
         
-        # Extrair domínios
-        dominios = self.emails_nao_convidados['email'].str.extract(r'@(.+)')[0]
-        contagem_dominios = dominios.value_counts().head(10)
+        # Domínios já contados na comparação
+        if self.comparacao is not None:
+            contagem_dominios = self.comparacao.by_domain[NAO_CONVIDADO]
+            contagem_dominios = contagem_dominios[contagem_dominios > 0].sort_values(ascending=False).head(10)
+        else:
+            contagem_dominios = normalize_emails(self.emails_nao_convidados['email'])['domain'].value_counts().head(10)
         
         fig = px.bar(
             x=contagem_dominios.index,
@@ -265,7 +252,7 @@ def main():
     st.sidebar.title("Navegação")
     modo = st.sidebar.radio(
         "Selecione o Modo:", 
-        ["Visão Geral", "Comparador de Emails", "Análise de Notas Avamec", "Comparação Planilhas vs Avamec"], 
+        ["Visão Geral", "Comparador de Emails", "Análise de Notas Avamec", "Comparação Planilhas vs Avamec", "Qualidade dos Dados"], 
         key="nav_mode"
     )
     
@@ -275,8 +262,24 @@ def main():
         render_email_comparator(comparador)
     elif modo == "Análise de Notas Avamec":
         render_grade_analysis()
-    else:  # Comparação Planilhas vs Avamec
+    elif modo == "Comparação Planilhas vs Avamec":
         render_comparison_dashboard()
+    else:  # Qualidade dos Dados
+        render_validation()
+
+@st.cache_data(show_spinner=False)
+def _load_overview_cached(grades_file, version):
+    """Cursistas e notas faltantes por grupo; `version` (mtime do CSV) invalida o cache."""
+    by_group = missing_grades(pd.read_csv(grades_file, header=0)).by_group
+    salas = by_group.columns.drop(['alunos', 'alunos_com_faltas'])
+    faltantes = by_group[salas].sum(axis=1)
+    return pd.DataFrame({
+        'Grupo': by_group.index,
+        'Cursistas': by_group['alunos'].values,
+        'Notas Faltantes': faltantes.values,
+        'Status': ("⚠️ " + faltantes.astype(str) + " notas faltando").where(faltantes > 0, "✅ Completo").values,
+    })
+
 
 def render_overview():
     st.header("📊 Visão Geral - PRODITEC")
@@ -291,50 +294,16 @@ def render_overview():
         return
     
     try:
-        # Load data
-        df = pd.read_csv(csv_path, header=0)
-        
-        # Find group column
-        group_col = None
-        for col in df.columns:
-            if df[col].astype(str).str.contains('Turma [AB]', regex=True, na=False).any():
-                group_col = col
-                break
-        
-        if not group_col:
-            st.error("Não foi possível identificar a coluna de grupos.")
-            return
-        
-        # Extract Turma info
-        df['Turma'] = df[group_col].astype(str).str.extract(r'(Turma [AB] - Grupo \d+)', expand=False)
-        
-        # Filter valid groups
-        df_valid = df[df['Turma'].notna()]
-        
-        # Calculate metrics
-        total_grupos = df_valid['Turma'].nunique()
-        total_cursistas = len(df_valid)
-        
-        # Find Sala columns
-        sala_cols = [c for c in df.columns if 'Sala' in c and c != 'Sala']
-        
-        # Count groups with missing grades
-        grupos_com_falta = set()
-        for grupo in df_valid['Turma'].unique():
-            df_grupo = df_valid[df_valid['Turma'] == grupo]
-            
-            # Check if any student in this group has missing grades
-            for _, row in df_grupo.iterrows():
-                for sala in sala_cols:
-                    valor = str(row[sala]).strip()
-                    # Only empty cells, not zeros
-                    if valor in ['', 'nan', 'NaN'] or pd.isna(row[sala]):
-                        grupos_com_falta.add(grupo)
-                        break
-                if grupo in grupos_com_falta:
-                    break
-        
-        qtd_grupos_com_falta = len(grupos_com_falta)
+        # Agregados calculados uma vez por versão do CSV
+        grupo_df = _load_overview_cached(csv_path, _mtime(csv_path))
+    except ValueError:
+        st.error("Não foi possível identificar a coluna de grupos.")
+        return
+    
+    try:
+        total_grupos = len(grupo_df)
+        total_cursistas = int(grupo_df['Cursistas'].sum())
+        qtd_grupos_com_falta = int((grupo_df['Notas Faltantes'] > 0).sum())
         
         # Display metrics
         st.markdown("### 📈 Métricas Gerais")
@@ -368,30 +337,6 @@ def render_overview():
         st.markdown("---")
         st.markdown("### 📋 Detalhamento por Grupo")
         
-        # Create summary table
-        grupo_data = []
-        for grupo in sorted(df_valid['Turma'].unique()):
-            df_grupo = df_valid[df_valid['Turma'] == grupo]
-            qtd_alunos = len(df_grupo)
-            
-            # Count missing grades
-            total_missing = 0
-            for _, row in df_grupo.iterrows():
-                for sala in sala_cols:
-                    valor = str(row[sala]).strip()
-                    if valor in ['', 'nan', 'NaN'] or pd.isna(row[sala]):
-                        total_missing += 1
-            
-            status = "✅ Completo" if total_missing == 0 else f"⚠️ {total_missing} notas faltando"
-            
-            grupo_data.append({
-                'Grupo': grupo,
-                'Cursistas': qtd_alunos,
-                'Notas Faltantes': total_missing,
-                'Status': status
-            })
-        
-        grupo_df = pd.DataFrame(grupo_data)
         st.dataframe(grupo_df, use_container_width=True, hide_index=True)
         
         # Chart: Groups with missing grades
@@ -679,6 +624,21 @@ def render_grade_analysis():
     except Exception as e:
         st.error(f"Erro ao ler arquivo de dados: {e}")
 
+@st.cache_data(show_spinner=False)
+def _load_comparison_cached(grades_file, avamec_path, identity_db, versions):
+    """Comparação planilhas x Avamec; `versions` (mtimes dos arquivos) invalida o cache quando algo muda."""
+    df_grades = pd.read_csv(grades_file, header=0)
+    index = IdentityIndex(identity_db)
+    try:
+        return compare(df_grades, load_avamec(avamec_path), index=index)
+    finally:
+        index.close()
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if path and os.path.exists(path) else None
+
+
 def render_comparison_dashboard():
     """Renderiza dashboard de comparação entre Planilhas e Avamec"""
     st.header("📊 Comparação: Planilhas vs Avamec")
@@ -687,9 +647,7 @@ def render_comparison_dashboard():
     grades_file = os.path.join(base_dir, 'data', 'grades_consolidados.csv')
     
     # Tentar arquivo completo primeiro, depois o parcial
-    avamec_file = os.path.join(base_dir, 'data', 'avamec_completo.json')
-    if not os.path.exists(avamec_file):
-        avamec_file = os.path.join(base_dir, 'data', 'avamec_status_situacao.json')
+    avamec_path = avamec_file(os.path.join(base_dir, 'data'))
     
     # Verificar arquivos
     if not os.path.exists(grades_file):
@@ -697,121 +655,56 @@ def render_comparison_dashboard():
         st.info("Execute: python3 src/core/consolidate_grades.py")
         return
     
-    if not os.path.exists(avamec_file):
-        st.warning(f"⚠️ Dados do Avamec não encontrados: {avamec_file}")
+    if not avamec_path:
+        st.warning(f"⚠️ Dados do Avamec não encontrados: {os.path.join(base_dir, 'data', 'avamec_status_situacao.json')}")
         st.info("Execute: python3 scripts/scrape_avamec_completo.py")
         st.info("Mostrando apenas dados das planilhas...")
-        avamec_data = {}
-    else:
-        # Carregar dados do Avamec
-        with open(avamec_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            avamec_data = {a['nome'].strip().upper(): a for a in data.get('alunos', [])}
-    
-    # Carregar dados das planilhas
-    df_grades = pd.read_csv(grades_file, header=0)
-    
-    # Colunas
-    name_col = df_grades.columns[1]
-    status_col = 'Extra_Col_61'
     
-    # Encontrar coluna de grupo
-    group_col = None
-    for col in df_grades.columns:
-        if df_grades[col].astype(str).str.contains('Turma [AB]', regex=True, na=False).any():
-            group_col = col
-            break
+    # A comparação é calculada uma vez por versão dos dados; os filtros só recortam o resultado
+    versions = (_mtime(grades_file), _mtime(avamec_path), _mtime(IDENTITY_DB))
+    result = _load_comparison_cached(grades_file, avamec_path, IDENTITY_DB, versions)
     
-    if not group_col:
+    if result['Turma'].isna().all():
         st.error("Coluna de grupo não encontrada!")
         return
     
-    # Extrair turma e grupo
-    df_grades['Turma_Grupo'] = df_grades[group_col].astype(str).str.extract(r'(Turma [AB] - Grupo \d+)', expand=False)
-    df_grades['Turma'] = df_grades['Turma_Grupo'].str.extract(r'(Turma [AB])', expand=False)
-    df_grades['Grupo'] = df_grades['Turma_Grupo'].str.extract(r'(Grupo \d+)', expand=False)
-    
     # FILTROS NO SIDEBAR
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔍 Filtros")
     
     # Filtro de Turma
-    turmas_disponiveis = ['Todas'] + sorted([t for t in df_grades['Turma'].unique() if pd.notna(t)])
+    turmas_disponiveis = ['Todas'] + sorted(result['Turma'].dropna().unique())
     selected_turma = st.sidebar.selectbox("Selecione a Turma:", turmas_disponiveis, key="comp_turma")
     
     # Filtrar por turma
+    mask = pd.Series(True, index=result.index)
     if selected_turma != 'Todas':
-        df_filtered = df_grades[df_grades['Turma'] == selected_turma].copy()
-    else:
-        df_filtered = df_grades.copy()
+        mask &= result['Turma'].eq(selected_turma).fillna(False)
     
     # Filtro de Grupo
-    grupos_disponiveis = ['Todos'] + sorted([g for g in df_filtered['Grupo'].unique() if pd.notna(g)])
+    grupos_disponiveis = ['Todos'] + sorted(result.loc[mask, 'Grupo'].dropna().unique())
     selected_grupo = st.sidebar.selectbox("Selecione o Grupo:", grupos_disponiveis, key="comp_grupo")
     
     # Filtrar por grupo
     if selected_grupo != 'Todos':
-        df_filtered = df_filtered[df_filtered['Grupo'] == selected_grupo].copy()
-    
-    # Criar dados comparativos
-    comparison_data = []
-    for _, row in df_filtered.iterrows():
-        nome = str(row[name_col]).strip()
-        nome_upper = nome.upper()
-        status_planilha = str(row[status_col]).strip() if status_col in df_filtered.columns else 'N/A'
-        grupo = str(row['Turma_Grupo'])
-        
-        # Buscar no Avamec
-        avamec_info = avamec_data.get(nome_upper, {})
-        situacao_avamec = avamec_info.get('situacao_parcial', '—')
-        
-        # Determinar status da nota
-        if situacao_avamec == '—':
-            status_nota = '⏳ Aguardando'
-        else:
-            try:
-                nota = float(situacao_avamec)
-                status_nota = '✅ Lançada' if nota > 0 else '⚠️ Zero'
-            except:
-                status_nota = '❓ Verificar'
-        
-        comparison_data.append({
-            'Nome': nome,
-            'Grupo': grupo,
-            'Status_Planilha': status_planilha,
-            'Situacao_Avamec': situacao_avamec,
-            'Status_Nota': status_nota
-        })
-    
-    df_comp = pd.DataFrame(comparison_data)
+        mask &= result['Grupo'].eq(selected_grupo).fillna(False)
+    df_comp = result[mask]
+    stats = summary(df_comp)
     
     # MÉTRICAS
     col1, col2, col3, col4 = st.columns(4)
     
-    total = len(df_comp)
-    com_avamec = len([x for x in df_comp['Situacao_Avamec'] if x != '—'])
-    aguardando = len([x for x in df_comp['Status_Nota'] if 'Aguardando' in x])
-    
-    # Calcular divergências
-    divergencias = 0
-    for _, row in df_comp.iterrows():
-        if row['Situacao_Avamec'] != '—':
-            try:
-                nota = float(row['Situacao_Avamec'])
-                status_avamec = 'Aprovado' if nota >= 7 else 'Reprovado'
-                if row['Status_Planilha'].upper() != status_avamec.upper():
-                    divergencias += 1
-            except:
-                pass
+    com_avamec = stats['com_avamec']
+    divergencias = stats['divergencias']
     
     with col1:
-        st.metric("Total de Cursistas", total)
+        st.metric("Total de Cursistas", stats['total'])
     with col2:
         st.metric("Com Dados Avamec", com_avamec)
     with col3:
         st.metric("🔴 Divergências", divergencias)
     with col4:
-        st.metric("⏳ Aguardando", aguardando)
+        st.metric("⏳ Aguardando", stats['aguardando'])
     
     st.markdown("---")
     
@@ -822,27 +715,12 @@ def render_comparison_dashboard():
         
         # Preparar dados para gráfico
         status_counts = {
-            'Aprovado (Planilhas)': len(df_comp[df_comp['Status_Planilha'].str.upper() == 'APROVADO']),
-            'Reprovado (Planilhas)': len(df_comp[df_comp['Status_Planilha'].str.upper() == 'REPROVADO']),
+            'Aprovado (Planilhas)': stats['aprovado_planilha'],
+            'Reprovado (Planilhas)': stats['reprovado_planilha'],
+            'Aprovado (Avamec)': stats['aprovado_avamec'],
+            'Reprovado (Avamec)': stats['reprovado_avamec'],
         }
         
-        # Contar status Avamec
-        aprovado_avamec = 0
-        reprovado_avamec = 0
-        for _, row in df_comp.iterrows():
-            if row['Situacao_Avamec'] != '—':
-                try:
-                    nota = float(row['Situacao_Avamec'])
-                    if nota >= 7:
-                        aprovado_avamec += 1
-                    else:
-                        reprovado_avamec += 1
-                except:
-                    pass
-        
-        status_counts['Aprovado (Avamec)'] = aprovado_avamec
-        status_counts['Reprovado (Avamec)'] = reprovado_avamec
-        
         import plotly.graph_objects as go
         
         fig = go.Figure(data=[
@@ -861,15 +739,9 @@ def render_comparison_dashboard():
         # Distribuição de Notas Avamec
         st.subheader("📈 Distribuição de Notas (Avamec)")
         
-        notas_avamec = []
-        for _, row in df_comp.iterrows():
-            if row['Situacao_Avamec'] != '—':
-                try:
-                    notas_avamec.append(float(row['Situacao_Avamec']))
-                except:
-                    pass
+        notas_avamec = df_comp['Nota_Avamec'].dropna()
         
-        if notas_avamec:
+        if not notas_avamec.empty:
             fig_hist = go.Figure(data=[go.Histogram(x=notas_avamec, nbinsx=11, marker_color='green')])
             fig_hist.update_layout(title='Distribuição de Notas do Avamec',
                                   xaxis_title='Nota', yaxis_title='Quantidade')
@@ -879,31 +751,14 @@ def render_comparison_dashboard():
     if divergencias > 0:
         st.subheader(f"⚠️ Divergências Encontradas ({divergencias})")
         
-        divergent_students = []
-        for _, row in df_comp.iterrows():
-            if row['Situacao_Avamec'] != '—':
-                try:
-                    nota = float(row['Situacao_Avamec'])
-                    status_avamec = 'Aprovado' if nota >= 7 else 'Reprovado'
-                    if row['Status_Planilha'].upper() != status_avamec.upper():
-                        divergent_students.append({
-                            'Nome': row['Nome'],
-                            'Grupo': row['Grupo'],
-                            'Planilhas': row['Status_Planilha'],
-                            'Avamec': f"{row['Situacao_Avamec']} ({status_avamec})"
-                        })
-                except:
-                    pass
-        
-        df_div = pd.DataFrame(divergent_students)
+        df_div = divergences(df_comp)
         st.dataframe(df_div, use_container_width=True)
     
     # TABELA COMPLETA
     st.subheader("📋 Tabela Detalhada")
     
     # Renomear colunas para exibição
-    df_display = df_comp.copy()
-    df_display.columns = ['Nome', 'Grupo', 'Status Final (Planilhas)', 'Situação Parcial (Avamec)', 'Status da Nota']
+    df_display = report_table(df_comp)
     
     st.dataframe(df_display, use_container_width=True, height=400)
     
@@ -915,3 +770,49 @@ def render_comparison_dashboard():
         file_name=f"comparacao_{selected_turma}_{selected_grupo}_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
         mime="text/csv"
     )
+
+
+@st.cache_data(show_spinner=False)
+def _load_validation_cached(grades_file, version):
+    """Validação de todos os grupos; `version` (mtime do CSV) invalida o cache."""
+    return validate(pd.read_csv(grades_file, header=0))
+
+
+def render_validation():
+    """Renderiza as tabelas de validação de qualidade dos dados (src/core/validation.py)"""
+    st.header("🩺 Qualidade dos Dados - Todos os Grupos")
+    
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    grades_file = os.path.join(base_dir, 'data', 'grades_consolidados.csv')
+    
+    if not os.path.exists(grades_file):
+        st.error(f"❌ Arquivo não encontrado: {grades_file}")
+        st.info("Execute: python3 src/core/consolidate_grades.py")
+        return
+    
+    try:
+        summary_df, issues = _load_validation_cached(grades_file, _mtime(grades_file))
+    except ValueError:
+        st.error("Coluna de grupo não encontrada!")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Grupos", len(summary_df))
+    col2.metric("Grupos com atenção", int((summary_df['status'] != '✅ OK').sum()))
+    col3.metric("Problemas", len(issues))
+    
+    st.subheader("📋 Resumo por Grupo")
+    st.dataframe(summary_df, use_container_width=True)
+    
+    st.subheader("⚠️ Problemas Encontrados")
+    regras = sorted(issues['regra'].unique())
+    selected = st.multiselect("Tipos de problema:", regras, default=regras, key="val_regras")
+    df_issues = issues[issues['regra'].isin(selected)]
+    st.dataframe(df_issues, use_container_width=True, height=400)
+    
+    st.download_button(
+        label="📥 Baixar Problemas (CSV)",
+        data=df_issues.to_csv(index=False, encoding='utf-8-sig'),
+        file_name=f"validacao_grupos_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+        mime="text/csv"
+    )
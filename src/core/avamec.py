@@ -3,14 +3,12 @@ import time
 import logging
 import json
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup, NavigableString
 from src.utils.i18n import t
+from src.core.browser import pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,20 +24,19 @@ AVAMEC_PASSWORD = os.getenv('AVAMEC_PASSWORD')
 class AvamecScraper:
     def __init__(self):
         self.driver = None
+        self.session = None
         self.setup_driver()
 
     def setup_driver(self):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless") # Commented out for debugging/visual confirmation
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        
-        logger.info("Setting up Chrome driver...")
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        logger.info("Acquiring Chrome driver from session pool...")
+        self.session = pool.acquire('avamec', headless=True, ensure_login=False)
+        self.driver = self.session.driver
 
     def login(self):
+        # Reuses the warm profile / stored cookies and only falls back to the form
+        return self.session.ensure_logged_in(login=self._submit_login_form)
+
+    def _submit_login_form(self, driver):
         if not AVAMEC_USER or not AVAMEC_PASSWORD:
             logger.error("Credentials not found in .env file. Please set AVAMEC_USER and AVAMEC_PASSWORD.")
             return False
@@ -92,8 +89,10 @@ class AvamecScraper:
             return False
 
     def close(self):
-        if self.driver:
-            self.driver.quit()
+        if self.session:
+            pool.release(self.session)
+            self.session = None
+            self.driver = None
 
     def scrape_grades(self, course_id, course_name):
         """
@@ -0,0 +1,483 @@
+"""
+Shared, authenticated browser sessions for the Selenium tools.
+
+Every scraper used to start its own Chrome, run ChromeDriverManager and
+log in again. This module keeps one warm profile per site under
+data/profiles/<site>, a single canonical cookie store under
+data/cookies/<site>.json and a process-wide pool of drivers, so
+back-to-back pipeline steps reuse the same logged-in browser.
+"""
+import os
+import json
+import time
+import pickle
+import atexit
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+
+from src.core.chromedriver import resolve_chromedriver
+from config.browser_config import BLOCK_RESOURCES, BLOCKED_URL_PATTERNS, BLOCKED_URLS_EXTRA
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+COOKIE_DIR = os.path.join(BASE_DIR, 'data', 'cookies')
+PROFILE_DIR = os.path.join(BASE_DIR, 'data', 'profiles')
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+@dataclass
+class SiteProfile:
+    """How to reach a site and how to tell whether the session is still valid."""
+    name: str
+    home_url: str
+    check_url: str
+    logged_out_markers: List[str] = field(default_factory=list)
+    ready_xpath: Optional[str] = None
+    cookie_domain: Optional[str] = None
+    legacy_cookie_files: List[str] = field(default_factory=list)
+    # Scraping profiles skip images/fonts; interactive ones (WhatsApp QR code) keep them
+    scraping: bool = True
+    # Extra CDP block patterns on top of config.browser_config.BLOCKED_URL_PATTERNS
+    blocked_urls: List[str] = field(default_factory=list)
+
+
+SITES: Dict[str, SiteProfile] = {
+    'avamec': SiteProfile(
+        name='avamec',
+        home_url='https://avamecinterativo.mec.gov.br/',
+        check_url='https://avamecinterativo.mec.gov.br/app/dashboard',
+        logged_out_markers=['/login'],
+        legacy_cookie_files=[
+            'data/avamec_cookies.json',
+            'data/avamec_cookies.txt',
+            'cookies/avamec_session.pkl',
+        ],
+    ),
+    'google': SiteProfile(
+        name='google',
+        home_url='https://docs.google.com',
+        check_url='https://docs.google.com/spreadsheets/',
+        logged_out_markers=['accounts.google.com', 'ServiceLogin'],
+        cookie_domain='.google.com',
+        legacy_cookie_files=['data/google_cookies.txt'],
+    ),
+    'whatsapp': SiteProfile(
+        name='whatsapp',
+        home_url='https://web.whatsapp.com/',
+        check_url='https://web.whatsapp.com/',
+        ready_xpath='//*[@id="side"]',
+        scraping=False,
+    ),
+}
+
+
+def get_site(site):
+    if site not in SITES:
+        raise ValueError(f"Unknown site '{site}'. Known sites: {sorted(SITES)}")
+    return SITES[site]
+
+
+class CookieStore:
+    """
+    Canonical cookie store: one JSON list (Selenium format) per site.
+
+    The first time a site is read, the legacy files the scripts used to
+    write (JSON lists, "a=b; c=d" text files, pickled Firefox cookies) are
+    imported so existing sessions keep working.
+    """
+
+    def __init__(self, directory=COOKIE_DIR):
+        self.directory = directory
+
+    def path(self, site):
+        return os.path.join(self.directory, f"{site}.json")
+
+    def load(self, site) -> List[dict]:
+        path = self.path(site)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+        else:
+            cookies = self._import_legacy(get_site(site))
+            if cookies:
+                self.save(site, cookies)
+        return self._drop_expired(cookies)
+
+    def save(self, site, cookies):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(site)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cookies, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(cookies)} cookies for {site} to {path}")
+
+    def is_expired(self, site) -> bool:
+        """True when there are no usable cookies left for the site."""
+        return not self.load(site)
+
+    def apply(self, driver, site) -> int:
+        """Loads the stored cookies into the driver. Returns how many were accepted."""
+        profile = get_site(site)
+        cookies = self.load(site)
+        if not cookies:
+            return 0
+
+        driver.get(profile.home_url)
+        added = 0
+        for cookie in cookies:
+            # Chrome rejects SameSite=None cookies that are not secure
+            if cookie.get('sameSite') == 'None' and not cookie.get('secure', False):
+                continue
+            try:
+                driver.add_cookie(cookie)
+                added += 1
+            except Exception:
+                continue
+        logger.info(f"Loaded {added}/{len(cookies)} cookies for {site}")
+        return added
+
+    def refresh_from(self, driver, site):
+        """Stores the cookies currently held by the browser as the canonical set."""
+        cookies = driver.get_cookies()
+        if cookies:
+            self.save(site, cookies)
+
+    @staticmethod
+    def _drop_expired(cookies):
+        now = time.time()
+        return [c for c in cookies if not c.get('expiry') or c['expiry'] > now]
+
+    def _import_legacy(self, profile: SiteProfile) -> List[dict]:
+        for relative_path in profile.legacy_cookie_files:
+            path = os.path.join(BASE_DIR, relative_path)
+            if not os.path.exists(path):
+                continue
+            try:
+                if path.endswith('.pkl'):
+                    with open(path, 'rb') as f:
+                        cookies = pickle.load(f)
+                elif path.endswith('.json'):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        cookies = json.load(f)
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        cookies = self._parse_cookie_header(f.read(), profile.cookie_domain)
+            except Exception as e:
+                logger.warning(f"Could not import legacy cookies from {path}: {e}")
+                continue
+            if cookies:
+                logger.info(f"Imported {len(cookies)} legacy cookies from {relative_path}")
+                return cookies
+        return []
+
+    @staticmethod
+    def _parse_cookie_header(cookie_str, domain=None):
+        cookies = []
+        for item in cookie_str.strip().split(';'):
+            if '=' not in item:
+                continue
+            name, value = item.strip().split('=', 1)
+            cookie = {'name': name, 'value': value}
+            if domain:
+                cookie['domain'] = domain
+            cookies.append(cookie)
+        return cookies
+
+
+# Flags that cut Chrome start-up work; safe for every profile
+FAST_START_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-features=Translate,OptimizationHints,MediaRouter",
+    "--window-size=1920,1080",
+]
+
+# Extra flags for scraping profiles: nothing the scrapers read depends on them
+SCRAPING_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-remote-fonts",
+]
+
+# Start-up time (seconds) of every driver launched by this process
+startup_times: List[float] = []
+
+
+def default_blocked_urls(extra=None) -> List[str]:
+    """Block list for scraping drivers (empty when BLOCK_RESOURCES=0)."""
+    if not BLOCK_RESOURCES:
+        return []
+    return BLOCKED_URL_PATTERNS + BLOCKED_URLS_EXTRA + list(extra or [])
+
+
+def apply_resource_blocking(driver, patterns):
+    """Blocks requests matching `patterns` through CDP (Network.setBlockedURLs)."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    if patterns:
+        logger.info(f"Blocking {len(patterns)} resource patterns")
+
+
+def new_chrome_driver(profile_name=None, headless=False, download_dir=None, scraping=False, blocked_urls=None):
+    """
+    Starts Chrome with a tuned flag set, optionally on a persistent profile under data/profiles.
+
+    Scraping drivers block images, fonts, media and analytics by default;
+    pass `blocked_urls=[]` to turn the interception off.
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    for arg in FAST_START_ARGS:
+        options.add_argument(arg)
+    options.add_argument(f"user-agent={USER_AGENT}")
+    prefs = {}
+    if scraping:
+        for arg in SCRAPING_ARGS:
+            options.add_argument(arg)
+        prefs["profile.managed_default_content_settings.images"] = 2
+        # Scrapers wait for their own elements, no need to wait for every subresource
+        options.page_load_strategy = 'eager'
+    if profile_name:
+        user_data_dir = os.path.join(PROFILE_DIR, profile_name)
+        os.makedirs(user_data_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+    if download_dir:
+        prefs.update({
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True
+        })
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+
+    started = time.perf_counter()
+    # An explicit driver path keeps Selenium Manager (and the network) out of the start-up
+    driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+    elapsed = time.perf_counter() - started
+    startup_times.append(elapsed)
+    logger.info(f"Chrome started in {elapsed:.2f}s (profile={profile_name}, headless={headless}, scraping={scraping})")
+
+    if blocked_urls is None:
+        blocked_urls = default_blocked_urls() if scraping else []
+    if blocked_urls:
+        apply_resource_blocking(driver, blocked_urls)
+    return driver
+
+
+class BrowserSession:
+    """A pooled driver bound to one site."""
+
+    def __init__(self, site, driver, profile_name, headless, cookie_store):
+        self.site = site
+        self.profile = get_site(site)
+        self.driver = driver
+        self.profile_name = profile_name
+        self.headless = headless
+        self.cookie_store = cookie_store
+        self.validated_at = None
+
+    def is_logged_in(self, timeout=5) -> bool:
+        self._wait_document_ready(timeout)
+        current_url = self.driver.current_url or ''
+        if any(marker in current_url for marker in self.profile.logged_out_markers):
+            return False
+        if self.profile.ready_xpath:
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                if self.driver.find_elements(By.XPATH, self.profile.ready_xpath):
+                    return True
+                time.sleep(0.5)
+            return False
+        return True
+
+    def ensure_logged_in(self, login: Optional[Callable] = None, max_age=300, timeout=5) -> bool:
+        """
+        Makes sure the session is authenticated.
+
+        The warm profile is tried first, then the canonical cookie store and
+        only then the `login(driver)` callback. Successful sessions write
+        their cookies back to the store.
+        """
+        if self.validated_at and time.time() - self.validated_at < max_age:
+            return True
+
+        self.driver.get(self.profile.check_url)
+        if self.is_logged_in(timeout=timeout):
+            return self._mark_valid()
+
+        logger.info(f"Session for {self.site} expired, trying stored cookies...")
+        if self.cookie_store.apply(self.driver, self.site):
+            self.driver.get(self.profile.check_url)
+            if self.is_logged_in(timeout=timeout):
+                return self._mark_valid()
+
+        if login is None:
+            logger.warning(f"Not logged in to {self.site} and no login flow was provided.")
+            return False
+
+        logger.info(f"Logging in to {self.site}...")
+        if login(self.driver) is False:
+            return False
+        self.driver.get(self.profile.check_url)
+        if self.is_logged_in(timeout=timeout):
+            return self._mark_valid()
+        logger.error(f"Login to {self.site} did not produce a valid session.")
+        return False
+
+    def invalidate(self):
+        self.validated_at = None
+
+    def set_download_dir(self, download_dir):
+        os.makedirs(download_dir, exist_ok=True)
+        self.driver.execute_cdp_cmd('Page.setDownloadBehavior', {
+            'behavior': 'allow',
+            'downloadPath': download_dir
+        })
+
+    def _wait_document_ready(self, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                if self.driver.execute_script("return document.readyState") == 'complete':
+                    return
+            except Exception:
+                pass
+            time.sleep(0.2)
+
+    def _mark_valid(self):
+        self.validated_at = time.time()
+        self.cookie_store.refresh_from(self.driver, self.site)
+        return True
+
+
+def manual_login(driver):
+    """Login flow for sites with CAPTCHA/QR code: the user logs in by hand."""
+    print("⚠️ Faça login manualmente no navegador...")
+    input("Pressione ENTER após fazer login...")
+    return True
+
+
+class SessionPool:
+    """
+    Process-wide pool of browser sessions.
+
+    `acquire` hands out an idle session for the site (or starts one),
+    `release` puts it back instead of quitting Chrome. All drivers are
+    closed at interpreter exit.
+    """
+
+    def __init__(self, cookie_store=None):
+        self.cookie_store = cookie_store or CookieStore()
+        self._idle: Dict[tuple, List[BrowserSession]] = {}
+        self._busy: List[BrowserSession] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close_all)
+
+    def acquire(self, site, login=None, headless=False, download_dir=None, ensure_login=True,
+                profile_name=None) -> BrowserSession:
+        """
+        Hands out a session for `site`.
+
+        `profile_name` pins a specific Chrome profile (e.g. one WhatsApp
+        account per profile); by default any free profile of the site is used.
+        """
+        key = (site, headless)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            matching = [s for s in idle if profile_name in (None, s.profile_name)]
+            session = matching[-1] if matching else None
+            if session is not None:
+                idle.remove(session)
+            else:
+                if profile_name and any(s.profile_name == profile_name for s in self._busy):
+                    raise RuntimeError(f"Profile {profile_name} is already in use")
+                profile_name = profile_name or self._free_profile_name(site)
+                driver = new_chrome_driver(profile_name, headless=headless, download_dir=download_dir,
+                                           scraping=get_site(site).scraping,
+                                           blocked_urls=self._blocked_urls(get_site(site)))
+                session = BrowserSession(site, driver, profile_name, headless, self.cookie_store)
+            self._busy.append(session)
+
+        if not self._is_alive(session):
+            logger.warning(f"Pooled driver for {site} died, starting a new one.")
+            session.driver = new_chrome_driver(session.profile_name, headless=headless, download_dir=download_dir,
+                                               scraping=session.profile.scraping,
+                                               blocked_urls=self._blocked_urls(session.profile))
+            session.invalidate()
+        if download_dir:
+            session.set_download_dir(download_dir)
+        if ensure_login:
+            session.ensure_logged_in(login=login)
+        return session
+
+    def release(self, session: BrowserSession):
+        with self._lock:
+            if session in self._busy:
+                self._busy.remove(session)
+            self._idle.setdefault((session.site, session.headless), []).append(session)
+
+    def discard(self, session: BrowserSession):
+        """Quits a session that should not be reused (e.g. a broken driver)."""
+        with self._lock:
+            if session in self._busy:
+                self._busy.remove(session)
+        self._quit(session)
+
+    def close_all(self):
+        with self._lock:
+            sessions = self._busy + [s for idle in self._idle.values() for s in idle]
+            self._busy = []
+            self._idle = {}
+        for session in sessions:
+            self._quit(session)
+
+    def _free_profile_name(self, site):
+        # Chrome locks a user-data-dir, so concurrent drivers need their own copy
+        in_use = {s.profile_name for s in self._busy}
+        in_use.update(s.profile_name for idle in self._idle.values() for s in idle)
+        if site not in in_use:
+            return site
+        n = 2
+        while f"{site}-{n}" in in_use:
+            n += 1
+        return f"{site}-{n}"
+
+    @staticmethod
+    def _blocked_urls(profile: SiteProfile):
+        return default_blocked_urls(profile.blocked_urls) if profile.scraping else []
+
+    @staticmethod
+    def _is_alive(session):
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(session):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+
+# Global instance for easy access
+pool = SessionPool()
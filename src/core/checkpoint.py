@@ -0,0 +1,138 @@
+"""
+Append-only JSONL journal for long scrapes.
+
+Each scraped group is appended (and fsync'd) as one line as soon as it is
+done, so a crash on group 17 keeps groups 1-16. With `resume=True` the
+current run is continued and completed groups are skipped; otherwise a new
+run starts and the previous journal is kept as `<journal>.prev`.
+
+Journal lines:
+    {"type": "run", "run_id": "...", "started_at": "..."}
+    {"type": "group", "run_id": "...", "key": "Turma A|Grupo 01", "records": [...], "done_at": "..."}
+
+The final JSON is assembled by streaming the journal (`write_json`), one
+record at a time.
+"""
+import os
+import json
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJournal:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.run_id = None
+        self.completed = {}  # group key -> number of records
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load_last_run()
+        if self.run_id:
+            logger.info(f"Resuming run {self.run_id}: {len(self.completed)} group(s) already done")
+        else:
+            self._start_run()
+
+    def _read_lines(self):
+        """Yields parsed journal lines, skipping a truncated last line left by a crash."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring corrupt journal line {line_no} in {self.path}")
+
+    def _drop_partial_tail(self):
+        """Cuts a half-written last line so the next append starts on a fresh line."""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+                logger.warning(f"Dropped a partial line at the end of {self.path}")
+
+    def _load_last_run(self):
+        self._drop_partial_tail()
+        for _, entry in self._read_lines():
+            if entry.get('type') == 'run':
+                self.run_id = entry['run_id']
+                self.completed = {}
+            elif entry.get('type') == 'group' and entry.get('run_id') == self.run_id:
+                self.completed[entry['key']] = len(entry.get('records', []))
+
+    def _start_run(self):
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.prev")
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.completed = {}
+        self._append({'type': 'run', 'run_id': self.run_id, 'started_at': datetime.now().isoformat()})
+
+    def _append(self, entry):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def commit(self, key, records):
+        """Checkpoints a finished group."""
+        records = list(records)
+        self._append({
+            'type': 'group',
+            'run_id': self.run_id,
+            'key': key,
+            'records': records,
+            'done_at': datetime.now().isoformat()
+        })
+        self.completed[key] = len(records)
+
+    @property
+    def total_records(self):
+        return sum(self.completed.values())
+
+    def iter_records(self):
+        """Streams the records of the current run (the last entry wins if a group was re-scraped)."""
+        last_line = {}
+        for line_no, entry in self._read_lines():
+            if entry.get('type') == 'group' and entry.get('run_id') == self.run_id:
+                last_line[entry['key']] = line_no
+
+        for line_no, entry in self._read_lines():
+            if entry.get('type') == 'group' and last_line.get(entry.get('key')) == line_no:
+                yield from entry.get('records', [])
+
+    def write_json(self, output_file, records_key=None, meta=None):
+        """
+        Writes the run's records to `output_file` without holding them all in memory.
+
+        With `records_key` the output is an object (`meta` fields + the list
+        under that key); otherwise it is a plain list.
+        """
+        tmp_path = f"{output_file}.tmp"
+        count = 0
+        indent = '\n    ' if records_key else '\n  '
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if records_key:
+                f.write('{\n')
+                for name, value in (meta or {}).items():
+                    f.write(f'  {json.dumps(name)}: {json.dumps(value, ensure_ascii=False)},\n')
+                f.write(f'  {json.dumps(records_key)}: [')
+            else:
+                f.write('[')
+
+            for record in self.iter_records():
+                f.write(',' if count else '')
+                f.write(indent + json.dumps(record, ensure_ascii=False))
+                count += 1
+
+            f.write('\n  ]\n}\n' if records_key else '\n]\n')
+        os.replace(tmp_path, output_file)
+        return count
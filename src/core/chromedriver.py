@@ -0,0 +1,186 @@
+"""
+Chromedriver provisioning with a pinned local cache.
+
+`ChromeDriverManager().install()` does a version lookup (and maybe a
+download) on every start and fails without network. The driver is now
+resolved once into data/drivers/ and pinned in a small manifest; later
+starts only read the manifest, so they are instant and work offline.
+Within a process the Chrome version and the resolved path are looked up
+once; later drivers reuse them without spawning `google-chrome --version`.
+
+Resolution order:
+    1. CHROMEDRIVER_PATH environment variable
+    2. pinned binary in data/drivers/chromedriver.json (if it matches Chrome)
+    3. chromedriver found on PATH
+    4. ChromeDriverManager (network), copied into the cache and pinned
+
+Usage:
+    python src/core/chromedriver.py            # resolves and pins the driver
+    python src/core/chromedriver.py --bench 5  # measures driver start-up
+"""
+import os
+import re
+import sys
+import json
+import stat
+import time
+import shutil
+import logging
+import argparse
+import functools
+import subprocess
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DRIVER_DIR = os.path.join(BASE_DIR, 'data', 'drivers')
+MANIFEST_FILE = os.path.join(DRIVER_DIR, 'chromedriver.json')
+
+CHROME_BINARIES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+
+# Driver path resolved by this process (see resolve_chromedriver)
+_resolved_path = None
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    if not version:
+        return None
+    match = re.search(r'(\d+)\.', version)
+    return match.group(1) if match else None
+
+
+def _binary_version(binary) -> Optional[str]:
+    try:
+        output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return None
+    match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+    return match.group(1) if match else None
+
+
+@functools.lru_cache(maxsize=None)
+def chrome_version() -> Optional[str]:
+    """Version of the installed Chrome/Chromium, or None if not found (looked up once per process)."""
+    for name in CHROME_BINARIES:
+        binary = shutil.which(name)
+        if binary:
+            version = _binary_version(binary)
+            if version:
+                return version
+    return None
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _read_manifest() -> dict:
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable driver manifest {MANIFEST_FILE}: {e}")
+        return {}
+
+
+def _pin(source_path, source) -> str:
+    """Copies the driver into the cache and records it in the manifest."""
+    version = _binary_version(source_path)
+    target_dir = os.path.join(DRIVER_DIR, version or 'unknown')
+    os.makedirs(target_dir, exist_ok=True)
+    target_path = os.path.join(target_dir, os.path.basename(source_path))
+    if os.path.abspath(source_path) != os.path.abspath(target_path):
+        shutil.copy2(source_path, target_path)
+        os.chmod(target_path, os.stat(target_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    manifest = {
+        'path': os.path.relpath(target_path, BASE_DIR),
+        'version': version,
+        'source': source,
+        'pinned_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    tmp_path = f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_FILE)
+    logger.info(f"Pinned chromedriver {version} at {target_path}")
+    return target_path
+
+
+def resolve_chromedriver(refresh=False) -> str:
+    """
+    Returns the chromedriver path, hitting the network only when nothing usable is cached.
+
+    The first call per process resolves it (see the module docstring); later
+    calls return the same path as long as it is still executable. `refresh`
+    looks everything up again.
+    """
+    global _resolved_path
+    env_path = os.getenv('CHROMEDRIVER_PATH')
+    if _is_executable(env_path):
+        return env_path
+
+    if refresh:
+        chrome_version.cache_clear()
+    elif _is_executable(_resolved_path):
+        return _resolved_path
+    _resolved_path = _resolve(refresh)
+    return _resolved_path
+
+
+def _resolve(refresh) -> str:
+    manifest = {} if refresh else _read_manifest()
+    pinned_path = os.path.join(BASE_DIR, manifest['path']) if manifest.get('path') else None
+    if _is_executable(pinned_path):
+        browser_major = _major(chrome_version())
+        if browser_major is None or browser_major == _major(manifest.get('version')):
+            return pinned_path
+        logger.info(f"Pinned chromedriver {manifest.get('version')} does not match Chrome {browser_major}, re-resolving...")
+
+    path_driver = shutil.which('chromedriver')
+    if path_driver and _major(_binary_version(path_driver)) in (None, _major(chrome_version())):
+        return _pin(path_driver, 'PATH')
+
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        return _pin(ChromeDriverManager().install(), 'webdriver-manager')
+    except Exception as e:
+        # Offline: any pinned driver is better than none
+        if _is_executable(pinned_path):
+            logger.warning(f"Could not refresh chromedriver ({e}); using pinned {manifest.get('version')}.")
+            return pinned_path
+        raise RuntimeError(
+            "chromedriver not available offline. Run `python src/core/chromedriver.py` once "
+            "with network access or set CHROMEDRIVER_PATH."
+        ) from e
+
+
+def benchmark_startup(runs=3, headless=True, scraping=True):
+    """Starts and quits Chrome `runs` times and returns the start-up times in seconds."""
+    if BASE_DIR not in sys.path:
+        sys.path.append(BASE_DIR)
+    from src.core.browser import new_chrome_driver, startup_times
+
+    for _ in range(runs):
+        driver = new_chrome_driver('bench', headless=headless, scraping=scraping)
+        driver.quit()
+    return list(startup_times[-runs:])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Resolve/pin chromedriver and measure start-up")
+    parser.add_argument('--refresh', action='store_true', help='Ignore the pinned driver and resolve again')
+    parser.add_argument('--bench', type=int, default=0, help='Number of start-up measurements')
+    args = parser.parse_args()
+
+    print(f"Chrome: {chrome_version() or 'not found'}")
+    print(f"Chromedriver: {resolve_chromedriver(refresh=args.refresh)}")
+
+    if args.bench:
+        times = benchmark_startup(args.bench)
+        print(f"Start-up (s): {', '.join(f'{t:.2f}' for t in times)}")
+        print(f"Mean: {sum(times) / len(times):.2f}s | Best: {min(times):.2f}s")
@@ -1,99 +1,225 @@
+"""
+Cell-by-cell comparison of the AVAMEC gradebooks (full_scraper.py ->
+data/avamec_data_full.json) with the consolidated planilhas.
 
-import csv
+The export is streamed record by record (ScrapeJournal.write_json puts one
+record per line) into a long frame (cursista, grupo, sala, valor). Gradebook
+headers are aligned to the planilha columns ('Sala 01', 'Sala de
+aprendizagem 1 - ...' -> 'Sala 1'; 'Ambientação' as is) and headers that
+match no column are ignored. The planilha is melted the same way, and both
+sides meet in a single outer merge on (identity join key, sala), so the
+whole course is compared in one pass:
+
+    igual             same grade on both sides
+    diferente         both sides have a grade and they differ
+    sem_nota_planilha AVAMEC has a grade, the planilha cell is empty
+    sem_nota_avamec   the planilha has a grade, the AVAMEC cell is empty
+    sem_planilha      the cursista is in the gradebook but not in the planilha
+    sem_avamec        the cursista is in the planilha (in a group present in
+                      the export) but not in the gradebook
+                      (these two are one row per cursista, without sala)
+
+data/fixtures/avamec_gradebook_sample.json is a small export in the same
+format (four Turma B - Grupo 01 students), used with --fixture.
+"""
+import os
+import re
+import sys
 import json
 import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.identity import IdentityIndex
+from src.core.comparison import GROUP_PATTERN, find_group_column
+from src.core.validation import sala_columns
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(base_dir, 'data')
+CSV_PATH = os.path.join(DATA_DIR, 'grades_consolidados.csv')
+GRADEBOOK_PATH = os.path.join(DATA_DIR, 'avamec_data_full.json')
+FIXTURE_PATH = os.path.join(DATA_DIR, 'fixtures', 'avamec_gradebook_sample.json')
+OUTPUT_PATH = os.path.join(DATA_DIR, 'comparacao_notas.csv')
+
+SALA_HEADER = re.compile(r'\bsala\b\D*?0*(\d+)', re.IGNORECASE)
+EXTRA_COLUMNS = ('Ambientação',)
+TOLERANCE = 0.01
+
+IGUAL = 'igual'
+DIFERENTE = 'diferente'
+SEM_NOTA_PLANILHA = 'sem_nota_planilha'
+SEM_NOTA_AVAMEC = 'sem_nota_avamec'
+SEM_PLANILHA = 'sem_planilha'
+SEM_AVAMEC = 'sem_avamec'
+
+DIFF_COLUMNS = ['grupo', 'nome', 'sala', 'planilha', 'avamec', 'resultado']
+
+
+def iter_gradebook(path):
+    """
+    Yields the records of a gradebook export one at a time. The layout
+    written by ScrapeJournal.write_json (one record per line) is streamed;
+    anything else is parsed as a whole.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() == '[':
+            first = f.readline().strip().rstrip(',')
+            if first.startswith('{') and first.endswith('}'):
+                yield json.loads(first)
+                for line in f:
+                    line = line.strip().rstrip(',')
+                    if line and line != ']':
+                        yield json.loads(line)
+                return
+        f.seek(0)
+        yield from json.load(f)
+
+
+def align_activity(header, columns):
+    """The planilha column of a gradebook header, or None."""
+    match = SALA_HEADER.search(header)
+    if match:
+        column = f"Sala {int(match.group(1))}"
+        return column if column in columns else None
+    header = header.strip()
+    return next((c for c in columns if c.casefold() == header.casefold()), None)
+
+
+def to_grade(values):
+    """'8', '8,5', '10.0' -> float; empty/non-numeric -> NaN."""
+    return pd.to_numeric(pd.Series(values, dtype='string').str.strip().str.replace(',', '.', regex=False),
+                         errors='coerce')
+
+
+def load_gradebook(records, columns):
+    """Long frame (grupo, nome, sala, avamec) of the records, aligned to the planilha `columns`."""
+    rows = []
+    aligned = {}
+    for record in records:
+        turma = record.get('turma', '')
+        match = re.search(r'Grupo \d+', record.get('grupo', ''))
+        grupo = f"{turma} - {match.group(0)}" if match else record.get('grupo', '')
+        for header, value in (record.get('grades') or {}).items():
+            if header not in aligned:
+                aligned[header] = align_activity(header, columns)
+            if aligned[header]:
+                rows.append((grupo, record.get('name', ''), aligned[header], value))
+    ignored = sorted(h for h, column in aligned.items() if column is None)
+    if ignored:
+        logger.info(f"Gradebook headers without a planilha column: {ignored}")
+    gradebook = pd.DataFrame(rows, columns=['grupo', 'nome', 'sala', 'valor'])
+    gradebook['avamec'] = to_grade(gradebook.pop('valor')).values
+    return gradebook
+
+
+def load_planilha(df):
+    """Long frame (grupo, nome, sala, planilha) of the consolidated grades."""
+    group_col = find_group_column(df)
+    groups = (df[group_col].astype('string').str.extract(GROUP_PATTERN, expand=False)
+              if group_col else pd.Series(pd.NA, index=df.index, dtype='string'))
+    columns = sala_columns(df) + [c for c in EXTRA_COLUMNS if c in df.columns]
+    wide = df[columns].apply(to_grade)
+    wide.insert(0, 'nome', df.iloc[:, 1].astype('string').str.strip())
+    wide.insert(0, 'grupo', groups)
+    wide = wide[wide['grupo'].notna()]
+    return wide.melt(id_vars=['grupo', 'nome'], var_name='sala', value_name='planilha')
+
+
+def compare_gradebook(df_grades, records, index=None):
+    """Every (cursista, sala) pair of both sides with the result of the comparison; see the module docstring."""
+    planilha = load_planilha(df_grades)
+    gradebook = load_gradebook(records, set(planilha['sala']))
+    if gradebook.empty:
+        return pd.DataFrame(columns=DIFF_COLUMNS)
+
+    own = index is None
+    index = index or IdentityIndex()
+    try:
+        planilha['key'] = index.join_keys(planilha, name='nome').values
+        gradebook['key'] = index.join_keys(gradebook, name='nome').values
+    finally:
+        if own:
+            index.close()
+
+    # Only the salas and groups the export covers
+    planilha = planilha[planilha['sala'].isin(gradebook['sala'].unique())
+                        & planilha['grupo'].isin(gradebook['grupo'].unique())]
+    planilha = planilha[planilha['key'].notna()].drop_duplicates(['key', 'sala'], keep='last')
+    gradebook = gradebook[gradebook['key'].notna()].drop_duplicates(['key', 'sala'], keep='last')
+
+    merged = planilha.merge(gradebook, on=['key', 'sala'], how='outer', suffixes=('_planilha', '_avamec'))
+    # A cell missing on one side of a cursista known to both is an empty grade, not an absent cursista
+    in_planilha = merged['key'].isin(planilha['key'].unique())
+    in_avamec = merged['key'].isin(gradebook['key'].unique())
+    has_p = merged['planilha'].notna()
+    has_a = merged['avamec'].notna()
+    same = np.isclose(merged['planilha'].astype(float), merged['avamec'].astype(float), atol=TOLERANCE,
+                      equal_nan=True)
+    resultado = np.select(
+        [~in_planilha, ~in_avamec, has_p & has_a & ~same, has_a & ~has_p, has_p & ~has_a],
+        [SEM_PLANILHA, SEM_AVAMEC, DIFERENTE, SEM_NOTA_PLANILHA, SEM_NOTA_AVAMEC],
+        default=IGUAL,
+    )
+    result = pd.DataFrame({
+        'key': merged['key'],
+        'grupo': merged['grupo_planilha'].fillna(merged['grupo_avamec']),
+        'nome': merged['nome_planilha'].fillna(merged['nome_avamec']),
+        'sala': merged['sala'],
+        'planilha': merged['planilha'],
+        'avamec': merged['avamec'],
+        'resultado': resultado,
+    })
+    # A cursista missing on one side is one row, not one per sala
+    absent = result['resultado'].isin([SEM_PLANILHA, SEM_AVAMEC])
+    students = result[absent].drop_duplicates('key').assign(sala=pd.NA, planilha=np.nan, avamec=np.nan)
+    result = pd.concat([result[~absent], students])
+    order = {column: i for i, column in enumerate(sala_columns(df_grades) + list(EXTRA_COLUMNS))}
+    return (result.assign(_ordem=result['sala'].map(order))
+            .sort_values(['grupo', 'nome', '_ordem'], kind='stable')
+            .drop(columns=['key', '_ordem'])
+            .reset_index(drop=True))
+
+
+def run_comparison(gradebook_path=GRADEBOOK_PATH, csv_path=CSV_PATH, output=None, show_all=False):
+    print(f"Comparando {os.path.relpath(gradebook_path, base_dir)} com {os.path.relpath(csv_path, base_dir)}...")
+
+    df = pd.read_csv(csv_path, header=0)
+    result = compare_gradebook(df, iter_gradebook(gradebook_path))
+
+    if result.empty:
+        print("Nenhuma nota no arquivo do Avamec (execute: python src/core/full_scraper.py).")
+        return result
+
+    counts = result['resultado'].value_counts()
+    compared = result['sala'].notna()
+    print(f"\n{result['nome'].nunique()} cursistas, {compared.sum()} notas comparadas")
+    for resultado in (IGUAL, DIFERENTE, SEM_NOTA_PLANILHA, SEM_NOTA_AVAMEC, SEM_PLANILHA, SEM_AVAMEC):
+        print(f"  {resultado:<18} {counts.get(resultado, 0)}")
+
+    diffs = result if show_all else result[result['resultado'] != IGUAL]
+    if not diffs.empty:
+        print("\n--- Diferenças ---")
+        print(diffs.to_string(index=False, na_rep='—'))
+
+    if output:
+        diffs.to_csv(output, index=False, encoding='utf-8-sig')
+        print(f"\n📄 Diferenças salvas em: {output}")
+    return result
 
-# Scraped Data (Embedded from browser subagent result)
-scraped_data = [
-  {
-    "name": "Andressa Mariele Ribeiro Pereira de Souza",
-    "grades": {
-      "Sala 01": "10", "Sala 02": "10", "Sala 03": "10", "Sala 04": "10", "Sala 05": "8"
-    }
-  },
-  {
-    "name": "Antonia Núbia Nonato Evangelista",
-    "grades": {
-      "Sala 01": "8", "Sala 02": "10", "Sala 03": "10", "Sala 04": "10", "Sala 05": "10"
-    }
-  },
-  {
-    "name": "Ilma Celia GUEDES Santos",
-    "grades": {
-      "Sala 01": "10", "Sala 02": "10", "Sala 03": "10", "Sala 04": "10", "Sala 05": "10"
-    }
-  },
-  {
-    "name": "Luciane Aparecida Rodrigues",
-    "grades": {
-      "Sala 01": "10", "Sala 02": "10", "Sala 03": "10", "Sala 04": "10", "Sala 05": "10"
-    }
-  }
-]
-# I will use a simplified check for now with just these sample students to demonstrate the diff, 
-# but ideally I would have the full JSON. 
-# Since I only have 4 in the sample text but the agent said 21 were found, I'll use these 4 to spot check.
-# If the user needs a FULL report, I might need to re-run scraping to output the FULL JSON to a file first.
-# However, the user asked "qual o resultado da comparação". 
-# The subagent output showed: "Status de Lançamento: A maioria dos alunos possui notas lançadas até a Sala 05."
-
-CSV_PATH = 'data/grades_consolidados.csv'
-
-def normalize_name(name):
-    return name.lower().strip()
-
-def run_comparison():
-    print(f"Comparing data for Turma B - Grupo 01...")
-    
-    csv_students = {}
-    
-    with open(CSV_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader) # logic header
-        header2 = next(reader) # human header
-        
-        # Identify indices
-        # Based on previous `head` output: 
-        # ... ,Sala 1,_19,_20,_21,Sala 2, ...
-        # Let's verify indices.
-        # "Sala 1" is at index?
-        try:
-            # print(f"Headers: {header}") # Debug
-            # Find indices fuzzily
-            sala1_idx = next(i for i, h in enumerate(header) if "Sala 1" in h)
-            # We don't strictly need the indices if we just checking for group membership and row content existence.
-        except StopIteration:
-            print(f"Could not find 'Sala 1' in headers: {header[:20]}...")
-            # Fallback: check if row has values
-        
-        for row in reader:
-            # Check for group in any column because index varies
-            if "Turma B - Grupo 01" in row:
-                name = row[1] # Name is usually index 1
-                csv_students[normalize_name(name)] = row
-
-
-    print(f"Found {len(csv_students)} students in CSV for this group.")
-    
-    print("\n--- Differences (Sample) ---")
-    for scraped in scraped_data:
-        norm_name = normalize_name(scraped['name'])
-        csv_row = csv_students.get(norm_name)
-        
-        if not csv_row:
-            print(f"[MISSING IN CSV] {scraped['name']}")
-            continue
-            
-        print(f"Checking {scraped['name']}:")
-        # Compare Sala 1 status
-        # Scraped says "10". CSV has "10"s?
-        print(f"  Avamec (Sala 1-5): Has grades (e.g. {scraped['grades']['Sala 01']}, {scraped['grades']['Sala 05']})")
-        # I'm not parsing the exact CSV columns blindly, but the user wants to know if they DIFFER.
-        # If the CSV has grades, they are likely synced. If CSV has 0s, they are not.
-        
-        # Heuristic: Check if '10' or '8' strings exist in the CSV row?
-        has_grades_csv = any(x.strip().startswith('10') or x.strip().startswith('8') or x.strip().startswith('9') for x in csv_row[10:50])
-        print(f"  CSV: {'Has Grades' if has_grades_csv else 'NO GRADES (Zeros/Empty)'}")
 
 if __name__ == "__main__":
-    run_comparison()
+    parser = argparse.ArgumentParser(description="Compara as notas do Avamec (gradebook) com as planilhas")
+    parser.add_argument('--gradebook', default=GRADEBOOK_PATH, help="Export do full_scraper.py")
+    parser.add_argument('--fixture', action='store_true', help="Usa o export de exemplo em data/fixtures/")
+    parser.add_argument('--csv', default=CSV_PATH, help="Planilha consolidada")
+    parser.add_argument('--output', default=None, help=f"Salva as diferenças em CSV (ex.: {os.path.relpath(OUTPUT_PATH, base_dir)})")
+    parser.add_argument('--all', action='store_true', help="Lista também as notas iguais")
+    args = parser.parse_args()
+    run_comparison(FIXTURE_PATH if args.fixture else args.gradebook, args.csv, args.output, args.all)
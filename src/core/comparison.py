@@ -0,0 +1,163 @@
+"""
+Planilha x AVAMEC comparison shared by scripts/comparacao_status.py and the
+comparison dashboard (compara_emails.render_comparison_dashboard).
+
+`compare` joins the consolidated grades with the AVAMEC "situação parcial"
+through the identity index (src/core/identity.py) in one hash join and
+derives every flag with vectorized conditions, so the CLI and the dashboard
+read the same result frame (one row per planilha row):
+
+    Nome, Turma_Grupo, Turma, Grupo   cursista and where they are
+    Status_Planilha                   Status Final of the planilha
+    Situacao_Avamec                   AVAMEC value as exported ('—' if absent)
+    Nota_Avamec, Status_Avamec        the value as a number, Aprovado/Reprovado
+    Status_Nota                       Aguardando / Zero / Lançada / Verificar
+    Com_Avamec, Aguardando, Divergente
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.identity import IdentityIndex
+
+DATA_DIR = os.path.join(base_dir, 'data')
+# Arquivo completo primeiro, depois o parcial
+AVAMEC_FILES = ('avamec_completo.json', 'avamec_status_situacao.json')
+
+STATUS_COL = 'Extra_Col_61'  # Coluna BJ = Status Final
+GROUP_PATTERN = r'(Turma [AB] - Grupo \d+)'
+PASSING_GRADE = 7
+MISSING = '—'
+
+NOTA_AGUARDANDO = '⏳ Aguardando lançamento'
+NOTA_ZERO = '⚠️ Zero lançado'
+NOTA_LANCADA = '✅ Lançada'
+NOTA_VERIFICAR = '❓ Verificar'
+
+# Columns of the CSV/table views, as the reports have always shown them
+REPORT_COLUMNS = {
+    'Nome': 'Nome',
+    'Turma_Grupo': 'Grupo',
+    'Status_Planilha': 'Status Final (Planilhas)',
+    'Situacao_Avamec': 'Situação Parcial (Avamec)',
+    'Status_Nota': 'Status da Nota',
+}
+
+
+def avamec_file(data_dir=DATA_DIR):
+    """The AVAMEC export to use (complete one first), or None."""
+    candidates = (os.path.join(data_dir, filename) for filename in AVAMEC_FILES)
+    return next((path for path in candidates if os.path.exists(path)), None)
+
+
+def find_group_column(df):
+    """Column holding 'Turma X - Grupo NN' (Source_Sheet_Title in the consolidated CSV)."""
+    if 'Source_Sheet_Title' in df.columns:
+        return 'Source_Sheet_Title'
+    for col in df.columns:
+        if df[col].astype(str).str.contains('Turma [AB]', regex=True, na=False).any():
+            return col
+    return None
+
+
+def load_avamec(path):
+    """AVAMEC export -> DataFrame(nome, situacao_parcial, grupo)."""
+    if not path or not os.path.exists(path):
+        return pd.DataFrame(columns=['nome', 'situacao_parcial', 'grupo'], dtype=object)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    alunos = pd.DataFrame(data.get('alunos', []), columns=['nome', 'situacao_parcial', 'grupo'])
+    return alunos[alunos['nome'].notna()].astype(object)
+
+
+def compare(df_grades, df_avamec, index=None):
+    """One row per planilha row with the AVAMEC situation and the derived flags (see module docstring)."""
+    own = index is None
+    index = index or IdentityIndex()
+    try:
+        name_col = df_grades.columns[1]  # Segunda coluna = nome
+        grade_keys = index.join_keys(df_grades, name=name_col,
+                                     emails=[c for c in ('_6', '_7') if c in df_grades.columns],
+                                     cpf='_9' if '_9' in df_grades.columns else None)
+        avamec_keys = index.join_keys(df_avamec, name='nome')
+    finally:
+        if own:
+            index.close()
+
+    group_col = find_group_column(df_grades)
+    groups = df_grades[group_col].astype('string') if group_col else pd.Series(pd.NA, index=df_grades.index, dtype='string')
+    result = pd.DataFrame({
+        'Nome': df_grades[name_col].astype('string').str.strip().fillna('nan'),
+        'Turma_Grupo': groups.str.extract(GROUP_PATTERN, expand=False).fillna(groups).fillna('N/A'),
+        'Status_Planilha': (df_grades[STATUS_COL].astype('string').str.strip().fillna('')
+                            if STATUS_COL in df_grades.columns else 'N/A'),
+        '_key': grade_keys.values,
+    }, index=df_grades.index)
+    result['Turma'] = result['Turma_Grupo'].str.extract(r'(Turma [AB])', expand=False)
+    result['Grupo'] = result['Turma_Grupo'].str.extract(r'(Grupo \d+)', expand=False)
+
+    # Hash join on the identity keys; same person twice in the export: the last line wins
+    situacoes = pd.Series(df_avamec['situacao_parcial'].values, index=avamec_keys.values)
+    situacoes = situacoes[situacoes.index.notna()]
+    situacoes = situacoes[~situacoes.index.duplicated(keep='last')]
+    situacao = result.pop('_key').map(situacoes)
+    result['Com_Avamec'] = situacao.notna()
+    result['Situacao_Avamec'] = situacao.astype(object).where(result['Com_Avamec'], MISSING)
+    nota = pd.to_numeric(situacao, errors='coerce')
+    result['Nota_Avamec'] = nota
+    result['Status_Avamec'] = pd.Series(np.where(nota >= PASSING_GRADE, 'Aprovado', 'Reprovado'),
+                                        index=result.index).where(nota.notna())
+    result['Status_Nota'] = np.select(
+        [~result['Com_Avamec'], nota == 0, nota.notna()],
+        [NOTA_AGUARDANDO, NOTA_ZERO, NOTA_LANCADA],
+        default=NOTA_VERIFICAR,
+    )
+    result['Aguardando'] = ~result['Com_Avamec']
+    divergente = result['Status_Planilha'].str.upper() != result['Status_Avamec'].str.upper()
+    result['Divergente'] = (nota.notna() & divergente).fillna(False).astype(bool)
+    return result
+
+
+def load_comparison(data_dir=DATA_DIR, index=None):
+    """compare() over the consolidated CSV and the AVAMEC export found in `data_dir`."""
+    df_grades = pd.read_csv(os.path.join(data_dir, 'grades_consolidados.csv'), header=0)
+    return compare(df_grades, load_avamec(avamec_file(data_dir)), index=index)
+
+
+def summary(result):
+    """Counts for the headline metrics and the Planilhas x Avamec chart."""
+    planilha = result['Status_Planilha'].str.upper()
+    return {
+        'total': len(result),
+        'com_avamec': int(result['Com_Avamec'].sum()),
+        'sem_avamec': int((~result['Com_Avamec']).sum()),
+        'aguardando': int(result['Aguardando'].sum()),
+        'divergencias': int(result['Divergente'].sum()),
+        'aprovado_planilha': int((planilha == 'APROVADO').sum()),
+        'reprovado_planilha': int((planilha == 'REPROVADO').sum()),
+        'aprovado_avamec': int((result['Status_Avamec'] == 'Aprovado').sum()),
+        'reprovado_avamec': int((result['Status_Avamec'] == 'Reprovado').sum()),
+    }
+
+
+def divergences(result):
+    """Rows where the planilha status disagrees with the AVAMEC grade."""
+    div = result[result['Divergente']]
+    return pd.DataFrame({
+        'Nome': div['Nome'],
+        'Grupo': div['Turma_Grupo'],
+        'Planilhas': div['Status_Planilha'],
+        'Avamec': div['Situacao_Avamec'].astype(str) + ' (' + div['Status_Avamec'] + ')',
+    })
+
+
+def report_table(result):
+    """The five report columns with their display names."""
+    return result[list(REPORT_COLUMNS)].rename(columns=REPORT_COLUMNS)
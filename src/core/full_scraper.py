@@ -1,48 +1,44 @@
 import os
+import sys
 import time
-import json
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+import argparse
+
+# Setup Env - Must be before src imports
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from src.core.browser import pool
+from src.core.checkpoint import ScrapeJournal
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+OUTPUT_FILE = "data/avamec_data_full.json"
+JOURNAL_FILE = "data/avamec_data_full.journal.jsonl"
+
 class AvamecFullScraper:
     def __init__(self):
-        options = webdriver.ChromeOptions()
         # IMPORTANT: No headless mode - we need maximized window
-        # options.add_argument("--headless") 
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--start-maximized")
-        options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        self.session = pool.acquire('avamec', headless=False, ensure_login=False)
+        self.driver = self.session.driver
         self.wait = WebDriverWait(self.driver, 20)
 
-    def load_cookies(self, domain):
+    def load_cookies(self, domain=None):
+        # Warm profile first, then the canonical cookie store (data/cookies/avamec.json)
         try:
-            with open('data/avamec_cookies.txt', 'r') as f:
-                cookie_str = f.read().strip()
-                
-            self.driver.get(domain)
-            
-            for item in cookie_str.split(';'):
-                if '=' in item:
-                    name, value = item.strip().split('=', 1)
-                    self.driver.add_cookie({'name': name, 'value': value})
-            logger.info("Cookies loaded.")
-            self.driver.refresh()
-            time.sleep(2)
+            if self.session.ensure_logged_in():
+                logger.info("Session ready.")
+            else:
+                logger.error("AVAMEC session expired. Refresh data/cookies/avamec.json or log in once with the profile.")
         except Exception as e:
             logger.error(f"Error loading cookies: {e}")
 
-    def scrape_course(self, course_id, course_name):
+    def scrape_course(self, course_id, course_name, journal=None):
         logger.info(f"Processing {course_name} ({course_id})...")
         base_url = f"https://avamecinterativo.mec.gov.br/app/dashboard/environments/{course_id}"
         self.driver.get(base_url)
@@ -69,6 +65,11 @@ class AvamecFullScraper:
         course_data = []
         
         for group_name in groups_found:
+            group_key = f"{course_name}|{group_name}"
+            if journal and journal.is_done(group_key):
+                logger.info(f"Skipping {group_name} (already in journal)")
+                continue
+
             logger.info(f"Scraping {group_name}...")
             self.driver.get(base_url)
             time.sleep(3)
@@ -146,34 +147,42 @@ class AvamecFullScraper:
                     
                 logger.info(f"Extracted {len(result.get('students', []))} students from {group_name}")
                 
-                for student in result.get('students', []):
-                    student_data = {
+                group_data = [
+                    {
                         "turma": course_name,
                         "grupo": group_name,
                         "name": student['name'],
                         "grades": student['grades']
                     }
-                    course_data.append(student_data)
+                    for student in result.get('students', [])
+                ]
+                if journal:
+                    journal.commit(group_key, group_data)
+                else:
+                    course_data.extend(group_data)
             
             except Exception as e:
                 logger.error(f"Gradebook failed for {group_name}: {e}")
                 
         return course_data
 
-    def run(self):
-        self.load_cookies("https://avamecinterativo.mec.gov.br/")
-        
-        all_data = []
-        # Turma A (179), Turma B (180)
-        all_data.extend(self.scrape_course("179", "Turma A"))
-        all_data.extend(self.scrape_course("180", "Turma B"))
-        
-        output_file = "data/avamec_data_full.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(all_data, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"Saved {len(all_data)} student records to {output_file}")    
-        self.driver.quit()
+    def run(self, resume=False):
+        """Scrapes both courses, checkpointing each group; `resume` skips groups done in the last run."""
+        journal = ScrapeJournal(JOURNAL_FILE, resume=resume)
+        try:
+            self.load_cookies("https://avamecinterativo.mec.gov.br/")
+
+            # Turma A (179), Turma B (180)
+            self.scrape_course("179", "Turma A", journal)
+            self.scrape_course("180", "Turma B", journal)
+        finally:
+            pool.release(self.session)
+
+        count = journal.write_json(OUTPUT_FILE)
+        logger.info(f"Saved {count} student records to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    AvamecFullScraper().run()
+    parser = argparse.ArgumentParser(description="Scrape all AVAMEC gradebooks")
+    parser.add_argument('--resume', action='store_true', help='Skip groups already saved in the journal of the last run')
+    args = parser.parse_args()
+    AvamecFullScraper().run(resume=args.resume)
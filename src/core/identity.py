@@ -0,0 +1,381 @@
+"""
+Identity index: one stable ID per cursista across the planilhas, AVAMEC,
+Meet and WhatsApp.
+
+Every source identifies people differently (name in AVAMEC, e-mail in Meet,
+phone in the WhatsApp ledger, everything in the planilhas). The index keeps,
+in SQLite, one row per cursista and an alias table mapping every normalized
+key seen for them to their ID:
+
+    kind   value (normalized)            cursista_id  source
+    cpf    12345678909                   1            planilha
+    email  fulano.silva@example.com      2            planilha
+    phone  +5585900000000                2            planilha
+    name   FULANA DE TAL SOUZA           7            avamec
+
+`resolve` registers a batch of records: each one is linked by CPF, then
+e-mail, then phone, then exact name; records left over are linked by fuzzy
+name (src/utils/names.py, one to one, high threshold) and the rest become
+new cursistas. The fuzzy work happens once, when a source is indexed, so
+the reporting tools only do dictionary lookups (`ids_for`, `join_keys`).
+
+    python src/core/identity.py build
+    python src/core/identity.py lookup "Fulana de Tal Souza" 123.456.789-09
+    python src/core/identity.py stats
+"""
+import os
+import re
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.utils.names import normalize_names, match_names
+from src.utils.phones import normalize_phones, STATUS_INVALID
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = os.path.join(base_dir, 'data', 'identity.db')
+
+# A record known only by name is linked to an existing cursista above this
+# similarity (typos, a dropped surname); below it, it becomes a new cursista
+LINK_THRESHOLD = 0.85
+
+# Strong keys first: the first alias found decides the ID
+KEY_PRIORITY = ('cpf', 'email', 'phone', 'name')
+
+# "CANCELADA - MARIA ..." in the planilhas: the status is not part of the name
+STATUS_PREFIX = re.compile(r'^\s*(CANCELAD[OA]|TRANSFERID[OA]|DESISTENTE|DESISTIU)\s*[-–:]?\s*', re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursistas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT,
+    name_key TEXT,
+    email TEXT,
+    cpf TEXT,
+    phone TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    cursista_id INTEGER NOT NULL REFERENCES cursistas (id),
+    source TEXT,
+    raw TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (kind, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_aliases_cursista ON aliases (cursista_id);
+"""
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _blank(n, index):
+    return pd.Series([''] * n, index=index, dtype='object')
+
+
+def name_keys(values):
+    """Normalized names, without the CANCELADA/DESISTIU prefixes of the planilhas."""
+    series = pd.Series(values).astype('string').str.replace(STATUS_PREFIX, '', regex=True)
+    return normalize_names(series).astype(object)
+
+
+def email_keys(values):
+    """Lower case, no whitespace anywhere; '' when it is not an address."""
+    series = pd.Series(values).astype('string').str.lower().str.replace(r'\s+', '', regex=True).fillna('')
+    return series.where(series.str.contains(r'^[^@]+@[^@]+\.[^@]+$', regex=True), '').astype(object)
+
+
+def cpf_keys(values):
+    """The 11 digits of a CPF (leading zeros restored when read as a number); '' otherwise."""
+    series = pd.Series(values).astype('string').str.replace(r'\.0$', '', regex=True)
+    digits = series.str.replace(r'\D', '', regex=True).fillna('')
+    digits = digits.where(digits.str.len() < 9, digits.str.zfill(11))
+    return digits.where((digits.str.len() == 11) & ~digits.str.fullmatch(r'(\d)\1{10}'), '').astype(object)
+
+
+def phone_keys(values):
+    """E.164 phone ('+5585999998888') for valid Brazilian numbers; '' otherwise."""
+    normalized = normalize_phones(pd.Series(list(values), dtype='object'))
+    valid = (normalized['status'] != STATUS_INVALID) & normalized['e164'].notna()
+    return normalized['e164'].where(valid, '').fillna('').astype(object).set_axis(pd.Series(values).index)
+
+
+KEY_FUNCTIONS = {'cpf': cpf_keys, 'email': email_keys, 'phone': phone_keys, 'name': name_keys}
+
+
+class IdentityIndex:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self._aliases = None
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.conn:
+            yield self.conn
+
+    def _alias_map(self):
+        """{(kind, value): cursista_id}, loaded once per connection and kept in sync by resolve()."""
+        if self._aliases is None:
+            self._aliases = {(kind, value): cid for kind, value, cid in
+                             self.conn.execute("SELECT kind, value, cursista_id FROM aliases")}
+        return self._aliases
+
+    @staticmethod
+    def keys(df, name=None, emails=(), cpf=None, phone=None):
+        """
+        Normalized key columns of a batch of records: `name`, `cpf`, `phone`
+        and one `email<N>` per e-mail column ('' where missing).
+        """
+        emails = [emails] if isinstance(emails, str) else list(emails)
+        n = len(df)
+        keys = pd.DataFrame(index=df.index)
+        keys['cpf'] = cpf_keys(df[cpf]).values if cpf else _blank(n, df.index)
+        for i, col in enumerate(emails):
+            keys[f'email{i}'] = email_keys(df[col]).values
+        keys['phone'] = phone_keys(df[phone]).values if phone else _blank(n, df.index)
+        keys['name'] = name_keys(df[name]).values if name else _blank(n, df.index)
+        return keys
+
+    @staticmethod
+    def _ordered(row_keys):
+        """(kind, value) pairs of one record, strongest first, skipping empty keys."""
+        for column, value in row_keys.items():
+            if value:
+                yield ('email' if column.startswith('email') else column), value
+
+    def _cpf_conflict(self, cursista_cpf, cid, record_cpf):
+        """A name match cannot join two people with different CPFs (homonyms)."""
+        return bool(record_cpf) and bool(cursista_cpf.get(cid)) and cursista_cpf[cid] != record_cpf
+
+    def resolve(self, df, source, name=None, emails=(), cpf=None, phone=None):
+        """
+        Registers a batch of records from one source and returns their cursista
+        IDs (a nullable Int64 Series aligned with `df`; <NA> for records with
+        no usable key). All new cursistas and aliases are written in one
+        transaction.
+        """
+        keys = self.keys(df, name, emails, cpf, phone)
+        columns = ['cpf'] + [c for c in keys.columns if c.startswith('email')] + ['phone', 'name']
+        records = [dict(zip(columns, values)) for values in keys[columns].itertuples(index=False)]
+        known = self._alias_map()
+        cursista_cpf = {cid: value for cid, value in
+                        self.conn.execute("SELECT id, cpf FROM cursistas WHERE cpf IS NOT NULL")}
+
+        def find(record):
+            for kind, value in self._ordered(record):
+                cid = known.get((kind, value))
+                if cid is None:
+                    continue
+                if kind == 'name' and self._cpf_conflict(cursista_cpf, cid, record['cpf']):
+                    return None
+                return cid
+            return None
+
+        ids = [find(record) for record in records]
+
+        # Fuzzy pass: records still unknown against the names of the indexed cursistas
+        pending = [i for i, cid in enumerate(ids) if cid is None and records[i]['name']]
+        if pending:
+            indexed = self.conn.execute("SELECT id, name_key FROM cursistas WHERE name_key IS NOT NULL").fetchall()
+            if indexed:
+                result = match_names([records[i]['name'] for i in pending], [row[1] for row in indexed],
+                                     threshold=LINK_THRESHOLD)
+                for left, right in zip(result.pairs['left'], result.pairs['right']):
+                    cid = indexed[right][0]
+                    record = records[pending[left]]
+                    if not self._cpf_conflict(cursista_cpf, cid, record['cpf']):
+                        ids[pending[left]] = cid
+
+        at = _now()
+        raw_names = df[name].astype('string').fillna('').tolist() if name else [''] * len(df)
+        created = 0
+        with self.transaction() as conn:
+            for i, record in enumerate(records):
+                if not any(record.values()):
+                    continue
+                # Earlier records of this batch may have registered this person already
+                cid = ids[i] if ids[i] is not None else find(record)
+                emails_found = [v for k, v in self._ordered(record) if k == 'email']
+                if cid is None:
+                    cursor = conn.execute(
+                        "INSERT INTO cursistas (nome, name_key, email, cpf, phone, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (raw_names[i].strip() or None, record['name'] or None,
+                         emails_found[0] if emails_found else None,
+                         record['cpf'] or None, record['phone'] or None, at, at)
+                    )
+                    cid = cursor.lastrowid
+                    created += 1
+                else:
+                    conn.execute(
+                        "UPDATE cursistas SET nome = COALESCE(nome, ?), name_key = COALESCE(name_key, ?), "
+                        "email = COALESCE(email, ?), cpf = COALESCE(cpf, ?), phone = COALESCE(phone, ?), "
+                        "updated_at = ? WHERE id = ?",
+                        (raw_names[i].strip() or None, record['name'] or None,
+                         emails_found[0] if emails_found else None,
+                         record['cpf'] or None, record['phone'] or None, at, cid)
+                    )
+                if record['cpf']:
+                    cursista_cpf.setdefault(cid, record['cpf'])
+                ids[i] = cid
+                for kind, value in self._ordered(record):
+                    # An alias keeps the first cursista it was seen with (homonyms stay apart)
+                    conn.execute(
+                        "INSERT INTO aliases (kind, value, cursista_id, source, raw, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (kind, value) DO UPDATE SET last_seen = excluded.last_seen",
+                        (kind, value, cid, source, raw_names[i] if kind == 'name' else None, at, at)
+                    )
+                    known.setdefault((kind, value), cid)
+
+        logger.info(f"Identity index: {len(records)} record(s) from {source}, {created} new cursista(s)")
+        return pd.Series(ids, index=df.index, dtype='Int64')
+
+    def lookup(self, values, kind):
+        """IDs for values of one kind ('name', 'email', 'cpf' or 'phone'); <NA> when unknown."""
+        values = pd.Series(values)
+        known = self._alias_map()
+        keys = KEY_FUNCTIONS[kind](values)
+        return pd.Series([known.get((kind, key)) if key else None for key in keys],
+                         index=values.index, dtype='Int64')
+
+    def alias_map(self):
+        """{(kind, normalized value): cursista_id} of every known alias (a copy, safe to keep)."""
+        return dict(self._alias_map())
+
+    def ids_for(self, df, name=None, emails=(), cpf=None, phone=None):
+        """Read-only `resolve`: IDs by CPF, e-mail, phone, then exact name; <NA> when unknown."""
+        keys = self.keys(df, name, emails, cpf, phone)
+        known = self._alias_map()
+        columns = ['cpf'] + [c for c in keys.columns if c.startswith('email')] + ['phone', 'name']
+        ids = []
+        for values in keys[columns].itertuples(index=False):
+            record = dict(zip(columns, values))
+            ids.append(next((known[(kind, value)] for kind, value in self._ordered(record)
+                             if (kind, value) in known), None))
+        return pd.Series(ids, index=df.index, dtype='Int64')
+
+    def join_keys(self, df, name=None, emails=(), cpf=None, phone=None):
+        """
+        Join key per record: 'id:<cursista>' when the index knows the person,
+        'nome:<normalized name>' otherwise, so tools still work (by name) on
+        records the index has not seen yet; None when there is neither.
+        """
+        ids = self.ids_for(df, name, emails, cpf, phone)
+        names = name_keys(df[name]) if name else _blank(len(df), df.index)
+        return pd.Series([f'id:{cid}' if pd.notna(cid) else (f'nome:{key}' if key else None)
+                          for cid, key in zip(ids, names)], index=df.index, dtype=object)
+
+    def aliases(self, cursista_id):
+        return pd.read_sql_query("SELECT kind, value, source, raw, first_seen, last_seen FROM aliases "
+                                 "WHERE cursista_id = ? ORDER BY kind, value", self.conn, params=[int(cursista_id)])
+
+    def cursistas(self):
+        return pd.read_sql_query("SELECT * FROM cursistas ORDER BY id", self.conn)
+
+    def stats(self):
+        """Aliases per kind and source."""
+        return pd.read_sql_query("SELECT kind, source, COUNT(*) AS aliases, COUNT(DISTINCT cursista_id) AS cursistas "
+                                 "FROM aliases GROUP BY kind, source ORDER BY kind, source", self.conn)
+
+
+def _load_avamec_names(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    alunos = data.get('alunos', []) if isinstance(data, dict) else []
+    return pd.DataFrame({'nome': [a.get('nome') for a in alunos if a.get('nome')]})
+
+
+def build_index(index=None, data_dir=None, ledger_path=None):
+    """
+    (Re)indexes every local source, strongest first: the consolidated
+    planilhas (CPF, e-mails, phone, name), the AVAMEC exports (name) and the
+    WhatsApp send ledger (phone, name). Safe to run after every pipeline
+    update: known records only refresh their aliases.
+    """
+    data_dir = data_dir or os.path.join(base_dir, 'data')
+    ledger_path = ledger_path or os.path.join(base_dir, 'bot_whatsapp', 'send_ledger.db')
+    own = index is None
+    index = index or IdentityIndex()
+    try:
+        grades_file = os.path.join(data_dir, 'grades_consolidados.csv')
+        if os.path.exists(grades_file):
+            df = pd.read_csv(grades_file, header=0, dtype=str)
+            emails = [c for c in ('_6', '_7') if c in df.columns]
+            index.resolve(df, 'planilha', name=df.columns[1], emails=emails,
+                          cpf='_9' if '_9' in df.columns else None, phone='_8' if '_8' in df.columns else None)
+
+        for filename in ('avamec_completo.json', 'avamec_status_situacao.json', 'avamec_turma_b_completo.json'):
+            path = os.path.join(data_dir, filename)
+            if os.path.exists(path):
+                index.resolve(_load_avamec_names(path), 'avamec', name='nome')
+
+        if os.path.exists(ledger_path):
+            with sqlite3.connect(ledger_path) as ledger:
+                sends = pd.read_sql_query("SELECT DISTINCT phone, name FROM sends", ledger)
+            index.resolve(sends, 'whatsapp', name='name', phone='phone')
+        return index.stats()
+    finally:
+        if own:
+            index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de identidade dos cursistas")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help="Indexa planilhas, AVAMEC e o ledger do WhatsApp")
+    lookup = sub.add_parser('lookup', help="Procura nomes, e-mails, CPFs ou telefones")
+    lookup.add_argument('values', nargs='+')
+    sub.add_parser('stats', help="Aliases por tipo e fonte")
+    args = parser.parse_args()
+
+    index = IdentityIndex(args.db)
+    try:
+        if args.command == 'build':
+            print(build_index(index).to_string(index=False))
+        elif args.command == 'stats':
+            print(index.stats().to_string(index=False))
+        else:
+            values = pd.Series(args.values)
+            found = pd.Series(pd.NA, index=values.index, dtype='Int64')
+            for kind in KEY_PRIORITY:
+                found = found.fillna(index.lookup(values, kind))
+            cursistas = index.cursistas().set_index('id')
+            for value, cid in zip(values, found):
+                if pd.isna(cid):
+                    print(f"{value}: não encontrado")
+                    continue
+                row = cursistas.loc[int(cid)]
+                print(f"{value}: #{cid} {row['nome']} | {row['email'] or '-'} | CPF {row['cpf'] or '-'} | {row['phone'] or '-'}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,141 @@
+"""
+Missing-grades report for every Turma/Grupo of the consolidated grades.
+
+`missing_grades` builds the students x salas mask once for the whole CSV
+(validation.missing_grades_mask: only empty cells are missing, zero is a
+grade) and derives everything else from it with column operations:
+
+    students   one row per student with at least one missing grade
+    by_group   per group: alunos, alunos_com_faltas and one count per sala
+    by_sala    per sala: how many students miss it, over all groups
+    cells      the mask as coordinates (grupo, linha, nome, sala), one row
+               per missing grade -- the machine-readable output
+
+`format_report` renders the text report (the layout of the old Turma B
+Grupo 01 report, one section per group, then the group x sala counts) and
+`write_outputs` saves the text, the cells CSV and the aggregates as JSON.
+"""
+import os
+import sys
+import json
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.comparison import GROUP_PATTERN, find_group_column
+from src.core.validation import sala_columns, missing_grades_mask, missing_salas_text
+
+DATA_DIR = os.path.join(base_dir, 'data')
+
+MissingGrades = namedtuple('MissingGrades', ['students', 'by_group', 'by_sala', 'cells'])
+
+
+def missing_grades(df, grupos=None):
+    """Missing grades of every group (or only of `grupos`); see the module docstring."""
+    group_col = find_group_column(df)
+    if group_col is None:
+        raise ValueError("Coluna de grupo não encontrada")
+    groups = df[group_col].astype('string').str.extract(GROUP_PATTERN, expand=False)
+    keep = groups.notna()
+    if grupos:
+        keep &= groups.isin(list(grupos))
+    df, groups = df[keep], groups[keep]
+
+    salas = sala_columns(df)
+    mask = missing_grades_mask(df, salas)
+    names = df.iloc[:, 1].astype('string').fillna('')
+    per_student = mask.sum(axis=1)
+
+    has_missing = per_student > 0
+    students = pd.DataFrame({
+        'grupo': groups,
+        'linha': df.index,
+        'nome': names,
+        'faltantes': per_student,
+        'salas': missing_salas_text(mask),
+    }, index=df.index)[has_missing].reset_index(drop=True)
+
+    by_group = mask.groupby(groups).sum()
+    by_group.insert(0, 'alunos_com_faltas', has_missing.groupby(groups).sum())
+    by_group.insert(0, 'alunos', groups.groupby(groups).size())
+    by_group = by_group.rename_axis('grupo').sort_index()
+
+    by_sala = pd.DataFrame({'alunos_sem_nota': mask.sum(axis=0), 'total_alunos': len(mask)}).rename_axis('sala')
+
+    rows, cols = np.nonzero(mask.to_numpy())
+    cells = pd.DataFrame({
+        'grupo': groups.to_numpy()[rows],
+        'linha': df.index.to_numpy()[rows],
+        'nome': names.to_numpy()[rows],
+        'sala': np.array(salas, dtype=object)[cols],
+    })
+    return MissingGrades(students, by_group, by_sala, cells)
+
+
+def load_missing_grades(data_dir=DATA_DIR, grupos=None):
+    """missing_grades() over the consolidated CSV in `data_dir`."""
+    return missing_grades(pd.read_csv(os.path.join(data_dir, 'grades_consolidados.csv'), header=0), grupos)
+
+
+def format_report(result, now=None):
+    """Text report: one section per group with each student's missing salas, then the totals."""
+    now = now or datetime.now()
+    lines = [
+        "=" * 80,
+        "NOTAS FALTANTES - TODOS OS GRUPOS" if len(result.by_group) != 1
+        else f"NOTAS FALTANTES - {result.by_group.index[0].upper().replace(' - ', ' ')}",
+        f"Data: {now.strftime('%d/%m/%Y %H:%M')}",
+        "=" * 80,
+    ]
+    students = result.students.groupby('grupo', sort=False)
+    for grupo, row in result.by_group.iterrows():
+        lines.append("")
+        lines.append(f"--- {grupo} ---")
+        lines.append(f"\nTotal de alunos: {row['alunos']} ({row['alunos_com_faltas']} com notas faltantes)\n")
+        if grupo not in students.groups:
+            lines.append("✅ Nenhuma nota faltante")
+            lines.append("")
+            continue
+        for s in students.get_group(grupo).itertuples(index=False):
+            lines.append(f"📝 {s.nome}")
+            lines.append(f"   Faltam: {s.salas}")
+            lines.append("")
+
+    lines.append("=" * 80)
+    lines.append("NOTAS FALTANTES POR GRUPO E SALA")
+    lines.append("=" * 80)
+    lines.append(result.by_group.drop(columns=['alunos']).to_string())
+    lines.append("")
+    lines.append("=" * 80)
+    lines.append("NOTAS FALTANTES POR SALA")
+    lines.append("=" * 80)
+    for sala, row in result.by_sala.iterrows():
+        lines.append(f"{sala:<10} {row['alunos_sem_nota']:>4} de {row['total_alunos']} alunos")
+    lines.append("=" * 80)
+    return "\n".join(lines)
+
+
+def write_outputs(result, prefix, now=None):
+    """Writes <prefix>.txt (report), <prefix>.csv (cells) and <prefix>.json (aggregates); returns the paths."""
+    now = now or datetime.now()
+    paths = {ext: f"{prefix}.{ext}" for ext in ('txt', 'csv', 'json')}
+    with open(paths['txt'], 'w', encoding='utf-8') as f:
+        f.write(format_report(result, now) + "\n")
+    result.cells.to_csv(paths['csv'], index=False, encoding='utf-8-sig')
+    summary = {
+        'gerado_em': now.isoformat(timespec='seconds'),
+        'total_alunos': int(result.by_group['alunos'].sum()),
+        'alunos_com_faltas': int(result.by_group['alunos_com_faltas'].sum()),
+        'notas_faltantes': len(result.cells),
+        'por_grupo': {grupo: {k: int(v) for k, v in row.items()} for grupo, row in result.by_group.iterrows()},
+        'por_sala': {sala: int(n) for sala, n in result.by_sala['alunos_sem_nota'].items()},
+    }
+    with open(paths['json'], 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return paths
@@ -0,0 +1,483 @@
+"""
+Snapshot history of the consolidated grades and the AVAMEC status.
+
+Each pipeline run stores the current `grades_consolidados.csv` and AVAMEC
+export as a dated snapshot; the "what changed since yesterday" reports read
+this history instead of files copied by hand into data/backups.
+
+    data/snapshots/objects/ab/ab12...gz   file contents, gzip, named by SHA-256
+    data/snapshots/history.db             snapshots + per-student change records
+
+A snapshot whose content equals the previous one of the same kind is not
+stored at all, and identical contents seen again later share one object.
+When a snapshot is taken, the students are compared with the previous
+snapshot once (identity keys, src/core/identity.py) and only the students
+whose status/grade changed are written to `changes`; a snapshot dated
+before existing ones (an old backup imported late) also rewrites the
+changes of the snapshot that follows it. `diff(kind, since,
+until)` composes those records, so "what changed between X and Y" never
+reloads or re-joins the files.
+
+    python src/core/snapshots.py take
+    python src/core/snapshots.py import data/backups
+    python src/core/snapshots.py diff grades --since 2025-12-24
+"""
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.identity import IdentityIndex
+from src.core.comparison import STATUS_COL, GROUP_PATTERN, PASSING_GRADE, AVAMEC_FILES, find_group_column
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(base_dir, 'data')
+DEFAULT_ROOT = os.path.join(DATA_DIR, 'snapshots')
+
+KIND_GRADES = 'grades'
+KIND_AVAMEC = 'avamec'
+
+# Files snapshotted by take_all(), per kind (first existing file wins, as in the comparison)
+SOURCES = {
+    KIND_GRADES: ('grades_consolidados.csv',),
+    KIND_AVAMEC: AVAMEC_FILES,
+}
+
+# Hand-made backups: grades_20251224.csv, avamec_status_20251224_160846.json
+BACKUP_PATTERNS = {
+    KIND_GRADES: re.compile(r'^grades_.*\.csv$'),
+    KIND_AVAMEC: re.compile(r'^avamec_status_.*\.json$'),
+}
+BACKUP_DATE = re.compile(r'(\d{8})(?:_(\d{6}))?')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    taken_at TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    source TEXT,
+    size INTEGER NOT NULL,
+    students INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_kind_taken ON snapshots (kind, taken_at);
+CREATE TABLE IF NOT EXISTS changes (
+    kind TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    previous_id INTEGER NOT NULL REFERENCES snapshots (id),
+    key TEXT NOT NULL,
+    nome TEXT,
+    grupo TEXT,
+    old_present INTEGER NOT NULL,
+    new_present INTEGER NOT NULL,
+    old_status TEXT,
+    new_status TEXT,
+    old_nota REAL,
+    new_nota REAL,
+    PRIMARY KEY (snapshot_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_changes_kind_key ON changes (kind, key);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    snapshot_id INTEGER,
+    imported_at TEXT NOT NULL
+);
+"""
+
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _moment(value, end_of_day=True):
+    """'2025-12-24' -> '2025-12-24 23:59:59' (the state at the end of that day); datetimes as text."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    value = str(value).strip()
+    if len(value) == 10:
+        return f"{value} 23:59:59" if end_of_day else f"{value} 00:00:00"
+    return value
+
+
+def _status_from_nota(nota):
+    return pd.Series(np.where(nota >= PASSING_GRADE, 'APROVADO', 'REPROVADO'), index=nota.index).where(nota.notna(), 'INDEFINIDO')
+
+
+def read_students(kind, content, index):
+    """
+    One row per student of a snapshot, indexed by key, with `nome`, `grupo`,
+    `status` (upper case) and `nota` (AVAMEC only).
+
+    Planilha students are keyed by identity + group (a student moved to
+    another group shows up as removed there and new here); AVAMEC students
+    by identity only (the last line wins, as in the comparison).
+    """
+    if kind == KIND_GRADES:
+        df = pd.read_csv(io.BytesIO(content), header=0)
+        name_col = df.columns[1]
+        group_col = find_group_column(df)
+        groups = df[group_col].astype('string') if group_col else pd.Series('', index=df.index, dtype='string')
+        grupo = groups.str.extract(GROUP_PATTERN, expand=False).fillna(groups).fillna('')
+        keys = index.join_keys(df, name=name_col, emails=[c for c in ('_6', '_7') if c in df.columns],
+                               cpf='_9' if '_9' in df.columns else None)
+        students = pd.DataFrame({
+            'key': (keys.astype('string') + '|' + grupo).values,
+            'nome': df[name_col].astype('string').str.strip().values,
+            'grupo': grupo.values,
+            'status': (df[STATUS_COL].astype('string').str.strip().str.upper().fillna('').values
+                       if STATUS_COL in df.columns else ''),
+            'nota': np.nan,
+        })
+    else:
+        data = json.loads(content.decode('utf-8'))
+        alunos = pd.DataFrame(data.get('alunos', []), columns=['nome', 'situacao_parcial', 'grupo'])
+        alunos = alunos[alunos['nome'].notna()].reset_index(drop=True)
+        nota = pd.to_numeric(alunos['situacao_parcial'], errors='coerce')
+        students = pd.DataFrame({
+            'key': index.join_keys(alunos, name='nome').values,
+            'nome': alunos['nome'].astype('string').str.strip().values,
+            'grupo': alunos['grupo'].astype('string').fillna('').values,
+            'status': _status_from_nota(nota).values,
+            'nota': nota.values,
+        })
+    students = students[students['key'].notna()]
+    return students.drop_duplicates('key', keep='last').set_index('key')
+
+
+def student_changes(previous, current):
+    """Students whose presence, status or grade differ between two read_students() frames."""
+    merged = previous.join(current, how='outer', lsuffix='_old', rsuffix='_new')
+    merged['present_old'] = merged.index.isin(previous.index)
+    merged['present_new'] = merged.index.isin(current.index)
+    nota_changed = ~np.isclose(merged['nota_old'], merged['nota_new'], equal_nan=True)
+    changed = ((merged['present_old'] != merged['present_new'])
+               | (merged['status_old'].fillna('') != merged['status_new'].fillna(''))
+               | nota_changed)
+    merged = merged[changed]
+    return pd.DataFrame({
+        'key': merged.index,
+        'nome': merged['nome_new'].fillna(merged['nome_old']).values,
+        'grupo': merged['grupo_new'].fillna(merged['grupo_old']).values,
+        'old_present': merged['present_old'].astype(int).values,
+        'new_present': merged['present_new'].astype(int).values,
+        'old_status': merged['status_old'].values,
+        'new_status': merged['status_new'].values,
+        'old_nota': merged['nota_old'].values,
+        'new_nota': merged['nota_new'].values,
+    })
+
+
+def classify(changes):
+    """Label per change: novo, removido, aprovado (REPROVADO -> APROVADO), reprovado, status or nota."""
+    conditions = [
+        (changes['old_present'] == 0) & (changes['new_present'] == 1),
+        (changes['old_present'] == 1) & (changes['new_present'] == 0),
+        (changes['old_status'] == 'REPROVADO') & (changes['new_status'] == 'APROVADO'),
+        (changes['old_status'] == 'APROVADO') & (changes['new_status'] == 'REPROVADO'),
+        changes['old_status'].fillna('') != changes['new_status'].fillna(''),
+    ]
+    return np.select(conditions, ['novo', 'removido', 'aprovado', 'reprovado', 'status'], default='nota')
+
+
+class SnapshotStore:
+    def __init__(self, root=DEFAULT_ROOT, index=None):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, 'history.db'))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self._own_index = index is None
+        self.index = index or IdentityIndex()
+
+    def close(self):
+        self.conn.close()
+        if self._own_index:
+            self.index.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.conn:
+            yield self.conn
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def _store_object(self, digest, content):
+        """Writes the gzip object once (atomically); the same content is never stored twice."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(gzip.compress(content, mtime=0))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+
+    def read(self, snapshot_id):
+        """Raw file contents of a snapshot."""
+        row = self.conn.execute("SELECT digest FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Snapshot {snapshot_id} not found")
+        with open(self._object_path(row['digest']), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def students(self, snapshot_id):
+        """read_students() of a stored snapshot."""
+        kind = self.conn.execute("SELECT kind FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()['kind']
+        return read_students(kind, self.read(snapshot_id), self.index)
+
+    def latest(self, kind, before=None):
+        """Most recent snapshot of `kind` taken at or before `before` (any time if None)."""
+        query = "SELECT * FROM snapshots WHERE kind = ?"
+        params = [kind]
+        if before is not None:
+            query += " AND taken_at <= ?"
+            params.append(_moment(before))
+        return self.conn.execute(query + " ORDER BY taken_at DESC, id DESC LIMIT 1", params).fetchone()
+
+    def next_after(self, kind, taken_at):
+        """Oldest snapshot of `kind` taken after `taken_at`, or None."""
+        return self.conn.execute(
+            "SELECT * FROM snapshots WHERE kind = ? AND taken_at > ? ORDER BY taken_at, id LIMIT 1",
+            (kind, _moment(taken_at))).fetchone()
+
+    def _record_changes(self, conn, kind, snapshot_id, previous_id, changes):
+        """Replaces the change records of `snapshot_id` with `changes` (against `previous_id`)."""
+        conn.execute("DELETE FROM changes WHERE snapshot_id = ?", (snapshot_id,))
+        if changes is None or changes.empty:
+            return
+        rows = changes.astype(object).where(changes.notna(), None)
+        conn.executemany(
+            "INSERT INTO changes (kind, snapshot_id, previous_id, key, nome, grupo, old_present, new_present, "
+            "old_status, new_status, old_nota, new_nota) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((kind, snapshot_id, previous_id, *row) for row in rows.itertuples(index=False))
+        )
+
+    def take(self, kind, path, taken_at=None):
+        """
+        Stores `path` as a snapshot of `kind` and records the student changes
+        since the previous snapshot. Returns the new snapshot id, or None when
+        the content is the same as the previous snapshot (nothing is stored).
+
+        When a later snapshot already exists (an older backup imported after
+        newer ones), its changes are recomputed against the new snapshot, so
+        every change record keeps pointing at its actual predecessor.
+        """
+        with open(path, 'rb') as f:
+            content = f.read()
+        taken_at = _moment(taken_at) or _now()
+        digest = hashlib.sha256(content).hexdigest()
+        previous = self.latest(kind, before=taken_at)
+        if previous is not None and previous['digest'] == digest:
+            logger.info(f"Snapshot {kind}: unchanged since {previous['taken_at']}")
+            return None
+
+        current = read_students(kind, content, self.index)
+        changes = student_changes(self.students(previous['id']), current) if previous is not None else None
+        following = self.next_after(kind, taken_at)
+        following_changes = student_changes(current, self.students(following['id'])) if following is not None else None
+        self._store_object(digest, content)
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO snapshots (kind, taken_at, digest, source, size, students) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, taken_at, digest, os.path.abspath(path), len(content), len(current))
+            )
+            snapshot_id = cursor.lastrowid
+            self._record_changes(conn, kind, snapshot_id, previous['id'] if previous is not None else None, changes)
+            if following is not None:
+                self._record_changes(conn, kind, following['id'], snapshot_id, following_changes)
+        if following is not None:
+            logger.info(f"Snapshot {kind} #{following['id']} at {following['taken_at']}: changes recomputed "
+                        f"against #{snapshot_id} ({len(following_changes)} change(s))")
+        logger.info(f"Snapshot {kind} #{snapshot_id} at {taken_at}: {len(current)} student(s), "
+                     f"{0 if changes is None else len(changes)} change(s)")
+        return snapshot_id
+
+    def take_all(self, data_dir=DATA_DIR):
+        """Snapshots every source found in `data_dir`; {kind: snapshot id or None}."""
+        taken = {}
+        for kind, filenames in SOURCES.items():
+            path = next((os.path.join(data_dir, f) for f in filenames if os.path.exists(os.path.join(data_dir, f))), None)
+            if path:
+                taken[kind] = self.take(kind, path)
+        return taken
+
+    def import_backups(self, backup_dir=os.path.join(DATA_DIR, 'backups')):
+        """
+        One-off import of the hand-made backups (grades_*.csv, avamec_status_*.json),
+        dated by the name (YYYYMMDD[_HHMMSS]) or the file time. Files already
+        imported are skipped, so this is cheap to call every time.
+        """
+        if not os.path.isdir(backup_dir):
+            return 0
+        imported = {row[0] for row in self.conn.execute("SELECT path FROM imports")}
+        found = []
+        for filename in os.listdir(backup_dir):
+            path = os.path.abspath(os.path.join(backup_dir, filename))
+            kind = next((k for k, pattern in BACKUP_PATTERNS.items() if pattern.match(filename)), None)
+            if kind is None or path in imported:
+                continue
+            match = BACKUP_DATE.search(filename)
+            if match:
+                taken_at = datetime.strptime(match.group(1) + (match.group(2) or '000000'), '%Y%m%d%H%M%S')
+            else:
+                taken_at = datetime.fromtimestamp(os.path.getmtime(path))
+            found.append((taken_at, kind, path))
+        # Oldest first, so each backup is compared with the one before it (take() also
+        # rewires the snapshot that follows one dated before existing snapshots)
+        for taken_at, kind, path in sorted(found):
+            snapshot_id = self.take(kind, path, taken_at=taken_at)
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO imports (path, snapshot_id, imported_at) VALUES (?, ?, ?)",
+                             (path, snapshot_id, _now()))
+        return len(found)
+
+    def snapshots(self, kind=None):
+        query = "SELECT id, kind, taken_at, digest, source, size, students FROM snapshots"
+        params = []
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        return pd.read_sql_query(query + " ORDER BY kind, taken_at", self.conn, params=params)
+
+    def diff(self, kind, since=None, until=None):
+        """
+        Students whose state changed between the snapshot in force at `since`
+        and the one in force at `until` (dates are read as end of day; `since`
+        defaults to the previous snapshot, `until` to now). Changes that were
+        undone in between cancel out.
+
+        Columns: key, nome, grupo, mudanca (see classify), old_status,
+        new_status, old_nota, new_nota, old_present, new_present.
+        """
+        start, end = self._bounds(kind, since, until)
+        if end is None:
+            return pd.DataFrame(columns=['key', 'nome', 'grupo', 'mudanca'])
+        start_at = start['taken_at'] if start is not None else ''
+
+        records = pd.read_sql_query(
+            """
+            SELECT c.* FROM changes c JOIN snapshots s ON s.id = c.snapshot_id
+            WHERE c.kind = ? AND s.taken_at > ? AND s.taken_at <= ?
+            ORDER BY s.taken_at, s.id
+            """,
+            self.conn, params=[kind, start_at, end['taken_at']]
+        )
+        if records.empty:
+            return records.assign(mudanca=pd.Series(dtype=object))
+
+        # State before = "old" side of each student's first record, state after = "new" side of the last
+        first = records.drop_duplicates('key', keep='first').set_index('key')
+        last = records.drop_duplicates('key', keep='last').set_index('key').loc[first.index]
+        composed = pd.DataFrame({
+            'key': first.index,
+            'nome': last['nome'].values,
+            'grupo': last['grupo'].values,
+            'old_present': first['old_present'].values,
+            'new_present': last['new_present'].values,
+            'old_status': first['old_status'].values,
+            'new_status': last['new_status'].values,
+            'old_nota': first['old_nota'].values,
+            'new_nota': last['new_nota'].values,
+        })
+        same = ((composed['old_present'] == composed['new_present'])
+                & (composed['old_status'].fillna('') == composed['new_status'].fillna(''))
+                & np.isclose(composed['old_nota'].astype(float), composed['new_nota'].astype(float), equal_nan=True))
+        composed = composed[~same].reset_index(drop=True)
+        composed.insert(3, 'mudanca', classify(composed))
+        return composed
+
+    def transitions(self, kind, old='REPROVADO', new='APROVADO', since=None, until=None):
+        """Students that went from status `old` to `new` (e.g. REPROVADO -> APROVADO)."""
+        changes = self.diff(kind, since, until)
+        if changes.empty:
+            return changes
+        return changes[(changes['old_status'] == old) & (changes['new_status'] == new)].reset_index(drop=True)
+
+    def _bounds(self, kind, since, until):
+        """Snapshots in force at `since` (default: the one before `until`'s) and at `until`."""
+        end = self.latest(kind, before=until)
+        if end is None:
+            return None, None
+        if since is not None:
+            return self.latest(kind, before=since), end
+        start = self.conn.execute(
+            "SELECT * FROM snapshots WHERE kind = ? AND taken_at < ? ORDER BY taken_at DESC, id DESC LIMIT 1",
+            (kind, end['taken_at'])).fetchone()
+        return start, end
+
+    def period(self, kind, since=None, until=None):
+        """(taken_at before, taken_at after) of the two snapshots diff() compares."""
+        start, end = self._bounds(kind, since, until)
+        return (start['taken_at'] if start is not None else None), (end['taken_at'] if end is not None else None)
+
+
+def snapshot_sources(data_dir=DATA_DIR, root=DEFAULT_ROOT):
+    """Pipeline step: imports the old backups once, then snapshots the current files."""
+    store = SnapshotStore(root)
+    try:
+        store.import_backups(os.path.join(data_dir, 'backups'))
+        return store.take_all(data_dir)
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Histórico de snapshots das notas e do Avamec")
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('take', help="Guarda os arquivos atuais de data/ (se mudaram)")
+    imp = sub.add_parser('import', help="Importa backups antigos (grades_*.csv, avamec_status_*.json)")
+    imp.add_argument('backup_dir', nargs='?', default=os.path.join(DATA_DIR, 'backups'))
+    sub.add_parser('list', help="Lista os snapshots")
+    diff = sub.add_parser('diff', help="O que mudou entre duas datas")
+    diff.add_argument('kind', choices=sorted(SOURCES))
+    diff.add_argument('--since', default=None, help="Data inicial (AAAA-MM-DD); padrão: snapshot anterior")
+    diff.add_argument('--until', default=None, help="Data final (AAAA-MM-DD); padrão: agora")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    try:
+        if args.command == 'take':
+            print(store.take_all())
+        elif args.command == 'import':
+            print(f"{store.import_backups(args.backup_dir)} backup(s) importado(s)")
+        elif args.command == 'list':
+            print(store.snapshots().to_string(index=False))
+        else:
+            start, end = store.period(args.kind, args.since, args.until)
+            changes = store.diff(args.kind, args.since, args.until)
+            print(f"{args.kind}: {start or '(início)'} -> {end or '(nenhum snapshot)'}: {len(changes)} mudança(s)")
+            if not changes.empty:
+                print(changes.drop(columns=['key']).to_string(index=False))
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    main()
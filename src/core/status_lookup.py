@@ -0,0 +1,172 @@
+"""
+Batch status lookup: "what is the status of these 200 names?" in one call.
+
+`StatusIndex` is built once per data version from the planilha x AVAMEC
+comparison (src/core/comparison.py). It keeps, for every planilha row, the
+grades and the statuses, plus hash maps from every normalized key of the row
+(CPF, both e-mails, name -- the identity.py / utils.emails key functions) to
+the rows carrying it. Aliases the identity index learned from other sources
+(a name spelled as in AVAMEC, a Meet e-mail) resolve through the cursista
+ID. `lookup` classifies each query (an '@' is an e-mail, 11 digits a CPF,
+anything else a name), normalizes the whole batch with column operations and
+answers with dictionary lookups, so k queries cost O(k) whatever the size of
+the roster. One row per query and match (homonyms give several):
+
+    consulta, tipo, encontrado, nome, grupo, Ambientação, Sala 1 .. Sala 10,
+    status_planilha, situacao_avamec, status_avamec, status_nota
+
+    python src/core/status_lookup.py "Fulana de Tal Souza" fulano@example.com 123.456.789-09
+    python src/core/status_lookup.py --arquivo consultas.txt --csv resultado.csv
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.identity import IdentityIndex, name_keys, cpf_keys
+from src.core.comparison import compare, load_avamec, avamec_file
+from src.core.compare_grades import to_grade, EXTRA_COLUMNS
+from src.core.validation import sala_columns
+from src.utils.emails import normalize_emails
+
+DATA_DIR = os.path.join(base_dir, 'data')
+
+EMAIL_COLUMNS = ('_6', '_7')
+CPF_COLUMN = '_9'
+
+STATUS_COLUMNS = {
+    'Status_Planilha': 'status_planilha',
+    'Situacao_Avamec': 'situacao_avamec',
+    'Status_Avamec': 'status_avamec',
+    'Status_Nota': 'status_nota',
+}
+
+
+def query_kinds(values):
+    """'email', 'cpf' or 'name' for each query."""
+    series = pd.Series(values, dtype='string').str.strip().fillna('')
+    digits = series.str.replace(r'\D', '', regex=True)
+    is_email = series.str.contains('@', regex=False)
+    is_cpf = digits.str.len().between(9, 11) & ~series.str.contains(r'[^\d\s.\-/]', regex=True)
+    return pd.Series(np.select([is_email, is_cpf], ['email', 'cpf'], default='name'), index=series.index)
+
+
+def _positions(keys, rows=None):
+    """{key: row positions} for the non-empty keys; `rows` is the row of each key (default: its position)."""
+    keys = pd.Series(np.asarray(keys, dtype=object))
+    rows = np.arange(len(keys)) if rows is None else np.asarray(rows)
+    valid = (keys.notna() & (keys.fillna('') != '')).to_numpy()
+    keys, rows = keys[valid].reset_index(drop=True), rows[valid]
+    return {key: np.unique(rows[group]) for key, group in keys.groupby(keys).indices.items()}
+
+
+class StatusIndex:
+    """Grades and statuses of every planilha row, addressable by CPF, e-mail, name and cursista ID."""
+
+    def __init__(self, df_grades, df_avamec, index=None):
+        own = index is None
+        index = index or IdentityIndex()
+        try:
+            result = compare(df_grades, df_avamec, index=index)
+            emails = [c for c in EMAIL_COLUMNS if c in df_grades.columns]
+            ids = index.ids_for(df_grades, name=df_grades.columns[1], emails=emails,
+                                cpf=CPF_COLUMN if CPF_COLUMN in df_grades.columns else None)
+            self._aliases = index.alias_map()
+        finally:
+            if own:
+                index.close()
+
+        grades = df_grades[[c for c in EXTRA_COLUMNS if c in df_grades.columns] + sala_columns(df_grades)]
+        self.table = pd.concat([
+            pd.DataFrame({'nome': result['Nome'].values, 'grupo': result['Turma_Grupo'].values}, dtype=object),
+            grades.apply(to_grade).astype(float).reset_index(drop=True),
+            result[list(STATUS_COLUMNS)].rename(columns=STATUS_COLUMNS).astype(object).reset_index(drop=True),
+        ], axis=1)
+
+        # Both e-mail columns point to the row they came from
+        email_rows = [normalize_emails(df_grades[c])['key'].to_numpy() for c in emails]
+        self._rows = {
+            'name': _positions(name_keys(df_grades.iloc[:, 1]).values),
+            'cpf': _positions(cpf_keys(df_grades[CPF_COLUMN]).values if CPF_COLUMN in df_grades.columns else []),
+            'email': _positions(np.concatenate(email_rows) if emails else [],
+                                np.tile(np.arange(len(df_grades)), len(emails))),
+            'id': _positions(ids.astype(object).values),
+        }
+
+    def lookup(self, values):
+        """Status of every query in `values`; see the module docstring."""
+        queries = pd.Series(list(values), dtype='string').str.strip().fillna('')
+        kinds = query_kinds(queries)
+        keys = pd.Series('', index=queries.index, dtype=object)
+        alias_keys = keys.copy()
+        for kind in ('name', 'cpf', 'email'):
+            selected = kinds == kind
+            if not selected.any():
+                continue
+            if kind == 'email':
+                normalized = normalize_emails(queries[selected])
+                keys[selected] = normalized['key']
+                alias_keys[selected] = normalized['email']
+            else:
+                keys[selected] = (name_keys if kind == 'name' else cpf_keys)(queries[selected]).values
+                alias_keys[selected] = keys[selected]
+
+        empty = np.array([], dtype=int)
+        positions, origins = [], []
+        for i, (kind, key, alias) in enumerate(zip(kinds, keys, alias_keys)):
+            rows = self._rows[kind].get(key, empty) if key else empty
+            if not len(rows) and alias:
+                # Spelled as in another source: through the cursista ID of the identity index
+                cid = self._aliases.get((kind, alias))
+                rows = self._rows['id'].get(cid, empty) if cid is not None else empty
+            positions.append(rows if len(rows) else [-1])
+            origins.append(np.full(max(len(rows), 1), i))
+
+        positions = np.concatenate(positions).astype(int)
+        origins = np.concatenate(origins)
+        found = positions >= 0
+        matches = self.table.reindex(positions).reset_index(drop=True)
+        matches.insert(0, 'encontrado', found)
+        matches.insert(0, 'tipo', kinds.to_numpy()[origins])
+        matches.insert(0, 'consulta', queries.to_numpy()[origins])
+        return matches
+
+
+def load_status_index(data_dir=DATA_DIR, index=None):
+    """StatusIndex over the consolidated CSV and the AVAMEC export found in `data_dir`."""
+    df_grades = pd.read_csv(os.path.join(data_dir, 'grades_consolidados.csv'), header=0)
+    return StatusIndex(df_grades, load_avamec(avamec_file(data_dir)), index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta em lote: notas, situação no Avamec e status por nome, e-mail ou CPF")
+    parser.add_argument('consultas', nargs='*', help="Nomes, e-mails ou CPFs")
+    parser.add_argument('--arquivo', help="Arquivo com uma consulta por linha")
+    parser.add_argument('--csv', help="Salva o resultado em CSV")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    values = list(args.consultas)
+    if args.arquivo:
+        with open(args.arquivo, 'r', encoding='utf-8') as f:
+            values.extend(line.strip() for line in f if line.strip())
+    if not values:
+        parser.error("informe consultas ou --arquivo")
+
+    result = load_status_index(args.data_dir).lookup(values)
+    found = result.groupby('consulta', sort=False)['encontrado'].any()
+    print(f"{len(values)} consultas: {int(found.sum())} encontradas, {int((~found).sum())} não encontradas\n")
+    print(result.to_string(index=False, na_rep='—'))
+    if args.csv:
+        result.to_csv(args.csv, index=False, encoding='utf-8-sig')
+        print(f"\n📄 Resultado salvo em: {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,8 @@ if base_dir not in sys.path:
 from src.core.avamec import AvamecScraper
 from src.core.full_scraper import AvamecFullScraper
 from src.core.consolidate_grades import consolidate_grades
+from src.core.identity import build_index
+from src.core.snapshots import snapshot_sources
 from scripts.download_sheets_selenium import download_sheets_selenium
 from src.utils.i18n import i18n, t
 
@@ -64,6 +66,22 @@ def run_pipeline(full_scrape=False):
     except Exception as e:
         logger.error(f"Error during consolidation: {e}", exc_info=True)
 
+    # 4. Identity index (planilhas + AVAMEC + WhatsApp ledger)
+    logger.info("Step 4: Updating identity index...")
+    try:
+        build_index()
+        logger.info("Identity index updated.")
+    except Exception as e:
+        logger.error(f"Error updating identity index: {e}", exc_info=True)
+
+    # 5. Snapshot history (grades + AVAMEC status)
+    logger.info("Step 5: Snapshotting data...")
+    try:
+        taken = snapshot_sources()
+        logger.info(f"Snapshots taken: {taken}")
+    except Exception as e:
+        logger.error(f"Error taking snapshots: {e}", exc_info=True)
+
     logger.info("Pipeline finished.")
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""
+Data-quality rules for the consolidated grades (one row per cursista, one
+group per "Turma X - Grupo NN").
+
+The rules are declared in RULES and evaluated together: every row rule is a
+vectorized mask over the whole frame, and a single groupby turns the masks
+into per-group counts, on which the group rules run. `validate` returns two
+tables that the CLI (scripts/validate_groups.py) and the dashboard print as
+they are:
+
+    summary   one row per group: alunos, one count column per rule, status
+    issues    one row per problem: grupo, regra, linha, nome, valor, detalhe
+              (linha is the data row of the CSV, from 0; empty for group rules)
+"""
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+from src.core.comparison import GROUP_PATTERN, find_group_column
+
+DATA_DIR = os.path.join(base_dir, 'data')
+
+# Expected students per group
+MIN_STUDENTS = 15
+MAX_STUDENTS = 35
+MIN_NAME_LENGTH = 3
+
+STATUS_OK = '✅ OK'
+STATUS_ATTENTION = '⚠️ ATENÇÃO'
+STATUS_FEW = '⚠️ POUCOS ALUNOS'
+STATUS_MANY = '⚠️ MUITOS ALUNOS'
+
+ISSUE_COLUMNS = ['grupo', 'regra', 'linha', 'nome', 'valor', 'detalhe']
+
+# scope 'row': check(frame) -> boolean mask, one entry per student
+# scope 'group': check(summary) -> boolean mask, one entry per group
+# detail(hits) -> (valor, detalhe) columns of the issues table
+Rule = namedtuple('Rule', ['code', 'scope', 'title', 'check', 'detail'])
+
+
+def sala_columns(df):
+    """Grade columns of the rooms ('Sala 1' ... 'Sala 10'), in sheet order."""
+    return [c for c in df.columns if 'Sala' in c and c != 'Sala']
+
+
+def missing_grades_mask(df, salas=None):
+    """Students x salas boolean frame: True where the grade cell is empty (zero is a grade)."""
+    salas = sala_columns(df) if salas is None else salas
+    cells = df[salas].astype('string').apply(lambda col: col.str.strip())
+    return (cells.isna() | cells.isin(['', 'nan', 'NaN'])).astype(bool)
+
+
+def missing_salas_text(mask):
+    """'Sala 2, Sala 7' per student, from a missing_grades_mask."""
+    if mask.shape[1] == 0:
+        return pd.Series('', index=mask.index, dtype='string')
+    labels = np.where(mask.to_numpy(), np.array([f"{c}, " for c in mask.columns], dtype=object), '')
+    return pd.Series(labels.sum(axis=1), index=mask.index, dtype='string').str.rstrip(', ')
+
+
+def _ids(frame):
+    return frame['_id'].str.strip()
+
+
+def _names(frame):
+    return frame['_nome'].str.strip()
+
+
+def _non_numeric_id(frame):
+    return ~_ids(frame).str.fullmatch(r'[+-]?\d+').fillna(False).astype(bool)
+
+
+def _empty_name(frame):
+    names = _names(frame)
+    return (names.isna() | (names.str.len() < MIN_NAME_LENGTH) | (names == 'nan')).fillna(True).astype(bool)
+
+
+def _missing_grades(frame):
+    return frame['_salas_faltantes'] > 0
+
+
+def _group_size(hits):
+    return hits['alunos'].astype(str), f"esperado {MIN_STUDENTS}-{MAX_STUDENTS} alunos"
+
+
+RULES = (
+    Rule('id_nao_numerico', 'row', 'IDs não numéricos', _non_numeric_id,
+         lambda hits: (hits['_id'].fillna('nan'), 'ID não é um número inteiro')),
+    Rule('nome_vazio', 'row', 'Nomes vazios', _empty_name,
+         lambda hits: (hits['_nome'].fillna('nan'), f"Nome vazio ou com menos de {MIN_NAME_LENGTH} caracteres")),
+    Rule('notas_faltantes', 'row', 'Notas faltantes', _missing_grades,
+         lambda hits: (hits['_salas_faltantes'].astype(str), 'Faltam: ' + hits['_salas'])),
+    Rule('poucos_alunos', 'group', 'Poucos alunos', lambda s: s['alunos'] < MIN_STUDENTS, _group_size),
+    Rule('muitos_alunos', 'group', 'Quantidade anormal', lambda s: s['alunos'] > MAX_STUDENTS, _group_size),
+)
+
+ValidationResult = namedtuple('ValidationResult', ['summary', 'issues'])
+
+
+def _frame(df, group_col):
+    """The columns the rules read, under fixed names, for the rows that belong to a group."""
+    groups = df[group_col].astype('string').str.extract(GROUP_PATTERN, expand=False)
+    salas = sala_columns(df)
+    missing = missing_grades_mask(df, salas)
+    frame = pd.DataFrame({
+        'grupo': groups,
+        '_id': df.iloc[:, 0].astype('string'),
+        '_nome': df.iloc[:, 1].astype('string'),
+        '_salas_faltantes': missing.sum(axis=1),
+        '_salas': missing_salas_text(missing),
+    }, index=df.index)
+    return frame[frame['grupo'].notna()]
+
+
+def validate(df, rules=RULES):
+    """Runs `rules` over every group of the consolidated grades; see the module docstring."""
+    group_col = find_group_column(df)
+    if group_col is None:
+        raise ValueError("Coluna de grupo não encontrada")
+    frame = _frame(df, group_col)
+
+    row_rules = [r for r in rules if r.scope == 'row']
+    group_rules = [r for r in rules if r.scope == 'group']
+    masks = pd.DataFrame({rule.code: rule.check(frame) for rule in row_rules}, index=frame.index)
+
+    # One groupby for everything: group size and the count of every row rule
+    summary = (masks.assign(alunos=1)
+               .groupby(frame['grupo'], sort=True)
+               .sum()
+               .rename_axis('grupo')
+               .reset_index())
+    summary = summary[['grupo', 'alunos'] + [r.code for r in row_rules]]
+    for rule in group_rules:
+        summary[rule.code] = rule.check(summary).astype(bool)
+
+    conditions = [summary[r.code] > 0 for r in row_rules if r.code != 'notas_faltantes']
+    attention = np.logical_or.reduce(conditions) if conditions else np.zeros(len(summary), dtype=bool)
+    few = summary['poucos_alunos'] if 'poucos_alunos' in summary else False
+    many = summary['muitos_alunos'] if 'muitos_alunos' in summary else False
+    summary['status'] = np.select([few, many, attention], [STATUS_FEW, STATUS_MANY, STATUS_ATTENTION],
+                                  default=STATUS_OK)
+
+    issues = []
+    for rule in rules:
+        if rule.scope == 'row':
+            hits = frame[masks[rule.code]]
+            linha, nome = hits.index, hits['_nome'].fillna('')
+        else:
+            hits = summary[summary[rule.code]]
+            linha, nome = pd.NA, ''
+        if hits.empty:
+            continue
+        valor, detalhe = rule.detail(hits)
+        issues.append(pd.DataFrame({
+            'grupo': hits['grupo'].values,
+            'regra': rule.title,
+            'linha': linha,
+            'nome': nome if isinstance(nome, str) else nome.values,
+            'valor': valor.values,
+            'detalhe': detalhe.values if isinstance(detalhe, pd.Series) else detalhe,
+        }))
+    if issues:
+        issues = pd.concat(issues, ignore_index=True)
+        issues['linha'] = issues['linha'].astype('Int64')
+        issues = issues.sort_values(['grupo', 'regra', 'linha'], kind='stable').reset_index(drop=True)
+    else:
+        issues = pd.DataFrame(columns=ISSUE_COLUMNS)
+    return ValidationResult(summary, issues[ISSUE_COLUMNS])
+
+
+def load_validation(data_dir=DATA_DIR):
+    """validate() over the consolidated CSV in `data_dir`."""
+    return validate(pd.read_csv(os.path.join(data_dir, 'grades_consolidados.csv'), header=0))
@@ -79,6 +79,27 @@ def test_data_processing():
         print(f"❌ Erro no processamento de dados: {e}")
         return False
 
+def test_transcript_pairing():
+    """
+    Testa se a leitura linha a linha da ata pareia nomes e e-mails como a leitura do texto inteiro.
+    """
+    print("\n🔍 Testando pareamento de nomes na ata...")
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from src.utils.transcripts import extract_participants
+
+    casos = {
+        # Um endereço mais abaixo não pode levar o nome que é do anterior
+        "a@x.com\n12\nMaria Souza\n--\nb@x.com\nJoao Pedro": ['Maria Souza', 'Joao Pedro'],
+        # Cadeia: c leva Ana Lima, b fica com Bia Reis (mais próxima por cima) e a fica sem nome
+        "a@x.com\n--\nBia Reis\n--\nb@x.com\nAna Lima\nc@x.com": ['', 'Bia Reis', 'Ana Lima'],
+    }
+    for texto, esperados in casos.items():
+        nomes = extract_participants(texto)['nome'].tolist()
+        assert nomes == esperados, f"{nomes} != {esperados}"
+    print(f"✅ {len(casos)} atas pareadas corretamente")
+    return True
+
 def test_file_operations():
     """
     Testa operações com arquivos.
@@ -124,7 +145,12 @@ def main():
         print("\n❌ Teste de processamento de dados falhou.")
         return False
     
-    # Teste 3: Operações com arquivos
+    # Teste 3: Pareamento de nomes na ata
+    if not test_transcript_pairing():
+        print("\n❌ Teste de pareamento de nomes falhou.")
+        return False
+
+    # Teste 4: Operações com arquivos
     if not test_file_operations():
         print("\n❌ Teste de operações com arquivos falhou.")
         return False
@@ -0,0 +1,101 @@
+"""
+E-mail normalization and matching shared by the Meet tools (compara_emails
+ComparadorEmails, verificador_grupos, meet/monitor.py MonitorSalas).
+
+`normalize_emails` works on a whole Series with vectorized string operations
+and returns, for every value:
+
+    email    the address as written, lower case, whitespace removed
+             anywhere ('joao .silva@gmail.com ' -> 'joao.silva@gmail.com');
+             '' when it is not an address
+    key      the canonical mailbox used for matching: Gmail ignores dots and
+             '+tag' in the local part and googlemail.com is gmail.com, so
+             'Joao.Silva+meet@googlemail.com' -> 'joaosilva@gmail.com';
+             other domains keep their local part (only the case is folded)
+    domain   the domain of the key
+
+`compare_emails` puts the invited and the attended lists in one outer join
+on the key and returns the per-address status (presente / ausente /
+nao_convidado) and per-domain counts. Addresses are pulled out of pasted or
+exported Meet text by src/utils/transcripts.py.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+EMAIL_PATTERN = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+VALID_EMAIL = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+GMAIL_DOMAINS = ('gmail.com', 'googlemail.com')
+
+PRESENTE = 'presente'
+AUSENTE = 'ausente'
+NAO_CONVIDADO = 'nao_convidado'
+
+EmailComparison = namedtuple('EmailComparison', ['table', 'by_domain', 'stats'])
+
+
+def normalize_emails(values):
+    """DataFrame(email, key, domain) for a Series/list of addresses; see the module docstring."""
+    series = pd.Series(values)
+    email = (series.astype('string')
+             .str.lower()
+             .str.replace(r'\s+', '', regex=True)
+             .str.strip('<>;,.()"\'')
+             .fillna(''))
+    email = email.where(email.str.contains(VALID_EMAIL, regex=True), '')
+
+    parts = email.str.extract(r'^(?P<local>[^@]*)@(?P<domain>.*)$').fillna('')
+    gmail = parts['domain'].isin(GMAIL_DOMAINS)
+    local = parts['local'].where(~gmail, parts['local'].str.split('+').str[0].str.replace('.', '', regex=False))
+    domain = parts['domain'].where(~gmail, 'gmail.com')
+    key = (local + '@' + domain).where(email != '', '')
+    return pd.DataFrame({
+        'email': email.astype(object),
+        'key': key.astype(object),
+        'domain': domain.where(email != '', '').astype(object),
+    }, index=series.index)
+
+
+def email_key(value):
+    """Canonical key of one address ('' when it is not an address)."""
+    return normalize_emails([value])['key'].iloc[0]
+
+
+def compare_emails(invited, attended):
+    """
+    Invited vs attended addresses (Series/lists), matched on the canonical key.
+
+    Returns EmailComparison(table, by_domain, stats): `table` has one row per
+    key with the invited/attended spellings, the status and `alias` (True
+    when both sides use different spellings of the same mailbox);
+    `by_domain` counts the statuses per domain.
+    """
+    left = normalize_emails(invited)
+    left = left[left['key'] != ''].drop_duplicates('key')
+    right = normalize_emails(attended)
+    right = right[right['key'] != ''].drop_duplicates('key')
+
+    table = left.merge(right, on='key', how='outer', suffixes=('_convidado', '_participante'), indicator=True)
+    table['domain'] = table['domain_convidado'].fillna(table['domain_participante'])
+    table['status'] = np.select([table['_merge'] == 'both', table['_merge'] == 'left_only'],
+                                [PRESENTE, AUSENTE], default=NAO_CONVIDADO)
+    table['alias'] = (table['_merge'] == 'both') & (table['email_convidado'] != table['email_participante'])
+    table = table[['key', 'email_convidado', 'email_participante', 'domain', 'status', 'alias']]
+
+    by_domain = pd.crosstab(table['domain'], table['status'])
+    by_domain = by_domain.reindex(columns=[PRESENTE, AUSENTE, NAO_CONVIDADO], fill_value=0)
+    by_domain = by_domain.assign(total=by_domain.sum(axis=1)).sort_values('total', ascending=False)
+
+    counts = table['status'].value_counts()
+    stats = {
+        'convidados': len(left),
+        'participantes': len(right),
+        'presentes': int(counts.get(PRESENTE, 0)),
+        'ausentes': int(counts.get(AUSENTE, 0)),
+        'nao_convidados': int(counts.get(NAO_CONVIDADO, 0)),
+        'aliases': int(table['alias'].sum()),
+    }
+    return EmailComparison(table.reset_index(drop=True), by_domain, stats)
@@ -0,0 +1,171 @@
+"""
+Person-name matching shared by the comparison scripts (planilha x AVAMEC x
+Moodle).
+
+`normalize_name` / `normalize_names` give the join key used everywhere:
+accents stripped, upper case, single spaces. `match_names` pairs two lists of
+names one to one:
+
+    1. exact matches on the normalized form;
+    2. blocking: the remaining names of one side go into a `NameIndex` of
+       character trigrams of the first and last names, so each name is only
+       scored against the few candidates sharing the most trigrams instead
+       of against the whole other list;
+    3. scoring with difflib's ratio (the same scale as the old
+       SequenceMatcher loops, so existing thresholds keep their meaning),
+       pruned with the cheap upper bounds real_quick_ratio/quick_ratio;
+    4. assignment: candidate pairs above the threshold are taken greedily by
+       descending score, each name used at most once. Whatever is left on
+       either side is an orphan.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+from difflib import SequenceMatcher
+from itertools import chain
+
+import pandas as pd
+
+# Same cut-off as the old check_names_discrepancy loop ("provável erro de digitação")
+DEFAULT_THRESHOLD = 0.68
+
+# Candidates scored per name after blocking
+MAX_CANDIDATES = 12
+
+IGNORED_KEYWORDS = ('CANCELADA', 'CANCELADO', 'TRANSFERIDO', 'TRANSFERIDA', 'DESISTENTE', 'DESISTIU')
+
+# Connectives that say nothing about who the person is
+PARTICLES = frozenset({'DE', 'DA', 'DO', 'DAS', 'DOS', 'E', 'DI', 'DU'})
+
+MatchResult = namedtuple('MatchResult', ['pairs', 'left_orphans', 'right_orphans'])
+
+
+def normalize_name(name):
+    """'  José  da Silva ' -> 'JOSE DA SILVA'; anything that is not a string -> ''."""
+    if not isinstance(name, str):
+        return ''
+    name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', name.strip().upper())
+
+
+def normalize_names(names):
+    """Vectorized normalize_name over a Series/list; missing values become ''."""
+    series = pd.Series(names).astype('string')
+    return (series.str.normalize('NFKD')
+            .str.replace(r'[\u0300-\u036f]', '', regex=True)
+            .str.strip()
+            .str.upper()
+            .str.replace(r'\s+', ' ', regex=True)
+            .fillna(''))
+
+
+def is_ignored(name):
+    """True when the name cell marks a cancelled, transferred or dropped-out student."""
+    name = str(name).upper()
+    return any(keyword in name for keyword in IGNORED_KEYWORDS)
+
+
+def blocking_keys(norm):
+    """Trigrams of the first and last names (particles skipped), padded so short names still get keys."""
+    tokens = [t for t in norm.split() if t not in PARTICLES] or norm.split()
+    if not tokens:
+        return set()
+    keys = set()
+    for token in {tokens[0], tokens[-1]}:
+        padded = f" {token} "
+        keys.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return keys
+
+
+class NameIndex:
+    """Trigram index over a list of normalized names, for blocking and best-match lookups."""
+
+    def __init__(self, names, max_candidates=MAX_CANDIDATES):
+        self.names = list(names)
+        self.max_candidates = max_candidates
+        postings = defaultdict(list)
+        for position, norm in enumerate(self.names):
+            for key in blocking_keys(norm):
+                postings[key].append(position)
+        self.postings = dict(postings)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, norm, limit=None):
+        """Positions of the names sharing the most blocking keys with `norm`, best first."""
+        hits = Counter(chain.from_iterable(self.postings.get(key, ()) for key in blocking_keys(norm)))
+        return [position for position, _ in hits.most_common(limit or self.max_candidates)]
+
+    def scores(self, norm, threshold=DEFAULT_THRESHOLD, limit=None):
+        """(position, ratio) of the candidates whose ratio is above `threshold`."""
+        matcher = SequenceMatcher(None, autojunk=False)
+        # SequenceMatcher caches its analysis of seq2: the query stays there
+        matcher.set_seq2(norm)
+        found = []
+        for position in self.candidates(norm, limit):
+            matcher.set_seq1(self.names[position])
+            if matcher.real_quick_ratio() <= threshold or matcher.quick_ratio() <= threshold:
+                continue
+            score = matcher.ratio()
+            if score > threshold:
+                found.append((position, score))
+        return found
+
+    def best(self, norm, threshold=DEFAULT_THRESHOLD):
+        """(position, ratio) of the closest name, or None when nothing is above `threshold`."""
+        found = self.scores(norm, threshold)
+        return max(found, key=lambda item: item[1]) if found else None
+
+
+def match_names(left, right, threshold=DEFAULT_THRESHOLD, max_candidates=MAX_CANDIDATES):
+    """
+    One-to-one matching of two name lists (raw or normalized).
+
+    Returns MatchResult(pairs, left_orphans, right_orphans): `pairs` is a
+    DataFrame with the positions `left`/`right` of each matched pair and its
+    `score` (1.0 for exact matches); the orphans are lists of positions that
+    got no partner. Empty names are never matched.
+    """
+    left_norm = list(normalize_names(left))
+    right_norm = list(normalize_names(right))
+
+    # 1. Exact matches (first come, first served for duplicated names)
+    right_by_name = defaultdict(list)
+    for position, norm in enumerate(right_norm):
+        if norm:
+            right_by_name[norm].append(position)
+    pairs = []
+    left_rest = []
+    for position, norm in enumerate(left_norm):
+        waiting = right_by_name.get(norm)
+        if norm and waiting:
+            pairs.append((position, waiting.pop(0), 1.0))
+        elif norm:
+            left_rest.append(position)
+    used_right = {pair[1] for pair in pairs}
+    right_rest = [p for p, norm in enumerate(right_norm) if norm and p not in used_right]
+
+    # 2-3. Blocking + scoring of what is left
+    index = NameIndex([right_norm[p] for p in right_rest], max_candidates)
+    scored = []
+    for position in left_rest:
+        for candidate, score in index.scores(left_norm[position], threshold):
+            scored.append((score, position, right_rest[candidate]))
+
+    # 4. Greedy one-to-one assignment, best pairs first (ties keep input order)
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+    taken_left, taken_right = set(), set()
+    for score, l_pos, r_pos in scored:
+        if l_pos in taken_left or r_pos in taken_right:
+            continue
+        taken_left.add(l_pos)
+        taken_right.add(r_pos)
+        pairs.append((l_pos, r_pos, score))
+
+    pairs_df = pd.DataFrame(pairs, columns=['left', 'right', 'score'])
+    return MatchResult(
+        pairs=pairs_df,
+        left_orphans=[p for p in left_rest if p not in taken_left],
+        right_orphans=[p for p in right_rest if p not in taken_right],
+    )
@@ -0,0 +1,136 @@
+"""
+Brazilian phone normalization shared by the WhatsApp tooling and reports.
+
+`normalize_phones` works on a whole pandas Series with vectorized string
+operations and returns, for every number, its canonical E.164 form
+(`+5585999998888`), a dedupe key and a status:
+
+    ok         already complete (country code + DDD + number)
+    fixed      completed automatically (country code and/or mobile 9 added)
+    ambiguous  more than one valid reading; the most likely one is used
+    invalid    cannot be turned into a Brazilian number (no E.164 form)
+
+The key is the E.164 string for valid numbers and the bare digits for
+invalid ones, so two spellings of the same number always dedupe together.
+"""
+import numpy as np
+import pandas as pd
+
+# DDDs (area codes) in use in Brazil
+VALID_DDDS = {
+    '11', '12', '13', '14', '15', '16', '17', '18', '19',
+    '21', '22', '24', '27', '28',
+    '31', '32', '33', '34', '35', '37', '38',
+    '41', '42', '43', '44', '45', '46', '47', '48', '49',
+    '51', '53', '54', '55',
+    '61', '62', '63', '64', '65', '66', '67', '68', '69',
+    '71', '73', '74', '75', '77', '79',
+    '81', '82', '83', '84', '85', '86', '87', '88', '89',
+    '91', '92', '93', '94', '95', '96', '97', '98', '99',
+}
+
+STATUS_OK = 'ok'
+STATUS_FIXED = 'fixed'
+STATUS_AMBIGUOUS = 'ambiguous'
+STATUS_INVALID = 'invalid'
+
+
+VALID_DDD_CODES = np.array(sorted(int(ddd) for ddd in VALID_DDDS))
+POW10 = 10 ** np.arange(19, dtype=np.int64)
+
+
+def _as_numbers(phones: pd.Series) -> np.ndarray:
+    """Digits of every phone as an int64 (0 when there are none)."""
+    if pd.api.types.is_numeric_dtype(phones):
+        values = phones.to_numpy(dtype='float64', na_value=0)
+        return np.where((values > 0) & (values < 1e18), values, 0).astype(np.int64)
+
+    text = phones.astype(str).fillna('')
+    # One regex pass: drop a trailing ".0" (numbers read as floats) and every non-digit
+    digits = text.str.replace(r'\.0+$|[^0-9]', '', regex=True).str.slice(0, 18)
+    values = digits.replace('', '0').to_numpy(dtype='S18').astype(np.int64)
+
+    # Spreadsheet exports sometimes write long numbers as 8.59999E+10
+    scientific = text.str.contains('E+', regex=False).to_numpy(dtype=bool)
+    if scientific.any():
+        parsed = pd.to_numeric(text[scientific], errors='coerce').fillna(0)
+        values[scientific] = parsed.clip(0, 1e17).astype(np.int64)
+    return values
+
+
+def _length(values: np.ndarray) -> np.ndarray:
+    return np.searchsorted(POW10, values, side='right')
+
+
+def _digit_at(values, length, position):
+    """Digit at `position` (0-based, from the left) of each number."""
+    return (values // POW10[np.clip(length - position - 1, 0, None)]) % 10
+
+
+def normalize_phones(phones) -> pd.DataFrame:
+    """
+    Normalizes a Series (or list) of phone numbers.
+
+    Returns a DataFrame with the same index and the columns
+    `digits`, `e164`, `key`, `status` and `reason`.
+    """
+    phones = phones if isinstance(phones, pd.Series) else pd.Series(list(phones), dtype='object')
+    values = _as_numbers(phones)
+    length = _length(values)
+    has_cc = (length >= 2) & (values // POW10[np.clip(length - 2, 0, None)] == 55)
+
+    # Strip the country code where the length says it is there. An 11-digit
+    # mobile starting with 55 is read as DDD 55 (RS), but it may also be a
+    # country code followed by a number without DDD.
+    cc_stripped = np.isin(length, [12, 13]) & has_cc
+    ambiguous = (length == 11) & has_cc & (_digit_at(values, length, 2) == 9)
+    national = np.where(cc_stripped, values % POW10[np.clip(length - 2, 0, None)], values)
+
+    nat_len = _length(national)
+    ddd = national // POW10[np.clip(nat_len - 2, 0, None)]
+    first = _digit_at(national, nat_len, 2)
+    mobile_8 = (nat_len == 10) & (first >= 6)                  # mobile missing the 9
+    landline = (nat_len == 10) & (first >= 2) & (first <= 5)
+    mobile_9 = (nat_len == 11) & (first == 9)
+    national = np.where(mobile_8, ddd * POW10[9] + 9 * POW10[8] + national % POW10[8], national)
+
+    valid_ddd = np.isin(ddd, VALID_DDD_CODES)
+    valid = valid_ddd & (mobile_8 | landline | mobile_9)
+
+    status = np.select(
+        [~valid, ambiguous, mobile_8 | ~cc_stripped],
+        [STATUS_INVALID, STATUS_AMBIGUOUS, STATUS_FIXED],
+        default=STATUS_OK
+    )
+    reason = np.select(
+        [length == 0, (length < 10) | (length > 13), ~valid_ddd, ~valid, ambiguous, mobile_8, ~cc_stripped],
+        ['empty', 'length', 'ddd', 'number', 'DDD 55 or country code without DDD', 'mobile 9 added',
+         'country code added'],
+        default=''
+    )
+
+    digits = pd.Series(values.astype(str), index=phones.index).where(length > 0, '')
+    e164 = ('+55' + pd.Series(national.astype(str), index=phones.index)).where(valid)
+    return pd.DataFrame({
+        'digits': digits,
+        'e164': e164,
+        'key': e164.fillna(digits),
+        'status': status,
+        'reason': reason,
+    }, index=phones.index)
+
+
+def phone_keys(phones) -> pd.Series:
+    """Dedupe keys for a Series of phones (E.164 when valid)."""
+    return normalize_phones(phones)['key']
+
+
+def phone_key(phone) -> str:
+    """Dedupe key for a single phone."""
+    return normalize_phones([phone])['key'].iloc[0]
+
+
+def to_e164(phone):
+    """E.164 form of a single phone, or None if it is invalid."""
+    value = normalize_phones([phone])['e164'].iloc[0]
+    return None if pd.isna(value) else value
@@ -0,0 +1,135 @@
+"""
+Streaming parser for Google Meet exports: attendance lists, chat and
+transcripts pasted or saved as text.
+
+`iter_participants` reads any iterable of lines (an open file, a
+StringIO) one line at a time and yields a Participant(nome, email, horario,
+sala, linha) for every address it finds:
+
+    nome     the rest of the address's own line ('Maria Souza
+             <maria@x.com>') or, when the line holds only the address, the
+             closest name line within `max_distance` lines -- pairs are taken
+             closest first (above before below), each name used once; ''
+             when there is none
+    horario  the last timestamp seen ('10:02', '01:15:30'), on the same line
+             or on a line of its own above; None before the first one
+    sala     the last room header seen ('Grupo 03', 'Sala 2', 'Breakout
+             room 4', 'Turma B - Grupo 01'), or the `sala` given
+    linha    line number, from 1
+
+Only the lines that can still pair with an address are kept, so multi-hour
+transcripts are read in constant memory. An address is only given its name
+once every address that could change the outcome has all its lines read,
+so the pairs are the same as when the whole text is read at once (see
+`iter_participants`); records come out in line order, (2 * max_distance)² +
+max_distance lines behind the reader. `extract_participants` collects them
+in a DataFrame.
+"""
+import io
+import re
+from collections import namedtuple, deque
+
+import pandas as pd
+
+from src.utils.emails import EMAIL_PATTERN
+
+TIMESTAMP_PATTERN = re.compile(r'\b(\d{1,2}:\d{2}(?::\d{2})?)\b')
+ROOM_PATTERN = re.compile(
+    r'^\W*(?:turma\s+\w+\s*-\s*)?(?:sala(?:\s+temática)?|grupo|breakout\s+room)\s*(?:n[º°o.]*\s*)?0*(\d+)\W*$',
+    re.IGNORECASE,
+)
+LEADING_PATTERN = re.compile(r'^[\d\s\-\.]+')
+SPACES_PATTERN = re.compile(r'\s+')
+NAME_STRIP = ' \t-–:;,<>()[]|'
+MIN_NAME_LENGTH = 3
+
+# Lines a name may be away from its address
+MAX_NAME_DISTANCE = 2
+
+Participant = namedtuple('Participant', ['nome', 'email', 'horario', 'sala', 'linha'])
+
+
+def _clean(text):
+    """What is left of a line once addresses and timestamps are removed."""
+    return SPACES_PATTERN.sub(' ', LEADING_PATTERN.sub('', text)).strip(NAME_STRIP)
+
+
+def _pair(pending, names, max_distance, read=None):
+    """
+    {position in pending: name line} for the addresses without a name of their own.
+
+    Addresses whose lines below are not all read yet (past line `read`) do
+    not take part: a name they would win could otherwise go to another one.
+    """
+    candidates = sorted(
+        (distance, after, position, p.linha + (distance if after else -distance))
+        for position, p in enumerate(pending)
+        if not p.nome and (read is None or p.linha + max_distance <= read)
+        for distance in range(1, max_distance + 1) for after in (False, True)
+    )
+    taken, paired = set(), {}
+    for _, _, position, line in candidates:
+        if line in names and line not in taken and position not in paired:
+            taken.add(line)
+            paired[position] = line
+    return paired
+
+
+def _resolve(pending, names, max_distance, until=None, read=None):
+    """Pairs the pending addresses and yields those up to line `until` (all when None), `read` lines read."""
+    paired = _pair(pending, names, max_distance, read)
+    position = 0
+    while pending and (until is None or pending[0].linha <= until):
+        record = pending.popleft()
+        line = paired.get(position)
+        if line is not None:
+            record = record._replace(nome=names.pop(line))
+        yield record
+        position += 1
+
+
+def iter_participants(lines, sala=None, max_distance=MAX_NAME_DISTANCE):
+    """Participant records of an iterable of lines; see the module docstring."""
+    horario = None
+    names = {}          # name line -> name, only the lines still within reach
+    pending = deque()   # addresses waiting for the lines below them
+    # Two addresses compete for a name when at most 2 * max_distance lines apart, and
+    # a lost name makes the loser settle for a farther one, which can in turn take a
+    # name from the next address: a chain, whose every link is a strictly worse
+    # (distance, above/below) rank. With 2 * max_distance ranks, an address's pair
+    # is final once the addresses up to (2 * max_distance)² lines below have all
+    # their lines read
+    horizon = (2 * max_distance) ** 2 + max_distance
+    for number, line in enumerate(lines, 1):
+        stamp = TIMESTAMP_PATTERN.search(line)
+        if stamp:
+            horario = stamp.group(1)
+            line = TIMESTAMP_PATTERN.sub(' ', line)
+        emails = EMAIL_PATTERN.findall(line)
+        if emails:
+            rest = _clean(EMAIL_PATTERN.sub(' ', line))
+            nome = rest if len(rest) >= MIN_NAME_LENGTH else ''
+            pending.extend(Participant(nome, email, horario, sala, number) for email in emails)
+        else:
+            room = ROOM_PATTERN.match(line)
+            if room:
+                sala = int(room.group(1))
+            else:
+                rest = _clean(line)
+                if len(rest) >= MIN_NAME_LENGTH:
+                    names[number] = rest
+
+        if pending and pending[0].linha <= number - horizon:
+            yield from _resolve(pending, names, max_distance, until=number - horizon, read=number)
+        # Names above the reach of every address still to come
+        reach = (pending[0].linha if pending else number + 1) - max_distance
+        while names and next(iter(names)) < reach:
+            del names[next(iter(names))]
+
+    yield from _resolve(pending, names, max_distance)
+
+
+def extract_participants(text, sala=None, max_distance=MAX_NAME_DISTANCE):
+    """DataFrame(nome, email, horario, sala, linha) of a text or an iterable of lines (e.g. an open file)."""
+    lines = io.StringIO(text) if isinstance(text, str) else text
+    return pd.DataFrame(list(iter_participants(lines, sala, max_distance)), columns=Participant._fields)
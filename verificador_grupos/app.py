@@ -1,8 +1,15 @@
+import io
 import os
-import re
+import sys
 import pandas as pd
 from flask import Flask, render_template, request, flash, redirect, url_for
 
+# Raiz do projeto no path para reaproveitar src/utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.emails import normalize_emails
+from src.utils.transcripts import iter_participants
+
 # --- Configuração do App ---
 
 app = Flask(__name__)
@@ -10,9 +17,6 @@ app.secret_key = 'uma-chave-secreta-muito-forte' # Necessário para 'flash messa
 app.config['UPLOAD_FOLDER'] = 'uploads'
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Regex para extrair e-mails de um bloco de texto
-EMAIL_REGEX = r'[\w\.-]+@[\w\.-]+'
-
 # --- Funções de Lógica Principal ---
 
 def load_expected_data(spreadsheet_path):
@@ -25,8 +29,9 @@ def load_expected_data(spreadsheet_path):
         spreadsheet_path (str): O caminho para o arquivo da planilha.
 
     Returns:
-        dict: Um dicionário onde a chave é o e-mail (lowercase) 
-              e o valor é o número do grupo (int).
+        dict: Um dicionário onde a chave é o e-mail canônico (minúsculas,
+              sem espaços; no Gmail sem pontos nem '+tag') e o valor é o
+              número do grupo (int).
               Ex: {'aluno1@gmail.com': 1, 'aluno2@gmail.com': 3}
     """
     try:
@@ -44,14 +49,10 @@ def load_expected_data(spreadsheet_path):
         email_col = next(col for col in df.columns if 'email' in col)
         group_col = next(col for col in df.columns if 'grupo' in col)
 
-        # Transforma em dicionário, limpando e-mails e convertendo grupo para int
-        expected_data = {}
-        for _, row in df.iterrows():
-            email = str(row[email_col]).strip().lower()
-            if '@' in email: # Garante que é um e-mail válido
-                expected_data[email] = int(row[group_col])
-        
-        return expected_data
+        # Transforma em dicionário, com a chave canônica do e-mail e o grupo como int
+        keys = normalize_emails(df[email_col])['key']
+        valid = keys != ''  # Garante que é um e-mail válido
+        return dict(zip(keys[valid], df.loc[valid, group_col].astype(int)))
 
     except Exception as e:
         print(f"Erro ao ler planilha: {e}")
@@ -66,20 +67,20 @@ def parse_actual_data(form_data):
 
     Returns:
         dict: Um dicionário onde a chave é o número do grupo (int)
-              e o valor é um set de e-mails (lowercase) encontrados.
+              e o valor é um set de e-mails (chave canônica) encontrados.
               Ex: {1: {'aluno1@gmail.com', 'aluno4@gmail.com'}, 2: set()}
     """
-    actual_data_by_group = {}
+    # Cada campo é lido linha a linha como um grupo; os e-mails de todos são normalizados de uma vez
+    grupos, emails = [], []
     for i in range(1, 11):
-        group_key = f'group{i}'
-        pasted_text = form_data.get(group_key, '')
-        
-        # Encontra todos os e-mails no texto colado e os normaliza
-        emails_found = re.findall(EMAIL_REGEX, pasted_text)
-        emails_set = {email.strip().lower() for email in emails_found}
-        
-        actual_data_by_group[i] = emails_set
-    
+        for participante in iter_participants(io.StringIO(form_data.get(f'group{i}', '')), sala=i):
+            grupos.append(i)
+            emails.append(participante.email)
+
+    keys = pd.Series(normalize_emails(emails)['key'].values, index=grupos, dtype=object)
+    keys = keys[keys != '']
+    actual_data_by_group = {i: set(keys[keys.index == i]) for i in range(1, 11)}
+
     return actual_data_by_group
 
 def generate_discrepancy_report(expected_data, actual_data_by_group):